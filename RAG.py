@@ -1,19 +1,33 @@
 import os
+import re
 import json
-import pandas as pd
-import chromadb
-from chromadb.utils import embedding_functions
-from typing import List, Dict, Any, Optional
+import time
+import asyncio
+import threading
+import uuid
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
 import argparse
 from rich.console import Console
 from rich.panel import Panel
 from rich.progress import Progress
 from rich.table import Table
+from rich.live import Live
 from dotenv import load_dotenv
-import google.generativeai as genai
 
-# Import the IFC analyzer module
-import ifc_analyzer
+# Heavy dependencies (pandas, chromadb, sentence-transformers, google.generativeai and
+# the IFC analyzer) are imported on first use so that light commands start quickly
+from llm_clients import LLMClient, GeminiClient, StubLLMClient
+from reranker import CrossEncoderReranker
+from context_builder import build_context, estimate_tokens
+import rag_server
+from analysis_store import AnalysisResultStore
+from query_cache import EmbeddingCache, ResultCache, SemanticAnswerCache, get_collection_version, bump_collection_version
+from vector_store import VectorStore, BACKENDS, PRECISIONS, open_backend
+from index_snapshot import model_fingerprint, export_snapshot, import_snapshot
+from index_watcher import IndexWatcher
+from quantity_cube import QUANTITY_CUBE_FILE, ALL, load_quantity_cube, write_quantity_cube
+from spatial_index import SPATIAL_INDEX_FILE, load_spatial_index, write_spatial_index
 
 # Load environment variables (for Gemini API key)
 load_dotenv()
@@ -21,33 +35,105 @@ load_dotenv()
 # Configure console for pretty printing
 console = Console()
 
+# Sentence-transformer model used to embed documents and queries
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Lightweight embedding model
+
+# Process-wide embedding function, shared by the converter and all query engines
+_embedding_function = None
+_embedding_lock = threading.Lock()
+
+
+def get_embedding_function():
+    """Return the shared embedding function, loading the model on first use"""
+    global _embedding_function
+    with _embedding_lock:
+        if _embedding_function is None:
+            from chromadb.utils import embedding_functions
+            _embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=EMBEDDING_MODEL
+            )
+    return _embedding_function
+
+
+# Element ids listed per element type in answers from the violation index
+MAX_LISTED_ELEMENTS = 50
+
+# Words that mark a question as one about missing parameters (answered from the violation index);
+# whole words only, so "black" or "mission" do not count
+VIOLATION_PATTERN = re.compile(r"\b(?:miss|misses|missing|lacks?|lacking|without)\b")
+
+# Words that mark a question as an aggregation over quantities (answered from the quantity cube);
+# whole words only, so "summary" or "consumption" do not count
+AGGREGATION_PATTERN = re.compile(r"\b(?:total|sum|aggregate|takeoff|take-off)\b|\bhow much\b")
+
+# Phrases asking for a breakdown per storey or material, and the cube dimension they name
+BREAKDOWN_PATTERN = re.compile(r"\b(?:per|by|each|every|for each)\s+(storey|story|floor|level|material)")
+BREAKDOWN_DIMENSIONS = {"storey": "storey", "story": "storey", "floor": "storey", "level": "storey", "material": "material"}
+
+# Keywords that identify each element type (as named by the export files) in a question
+ELEMENT_TYPE_KEYWORDS = {
+    "door": ["door"],
+    "proxy": ["proxy"],
+    "slab": ["slab"],
+    "wall": ["wall"],
+    "wallstandardcase": ["wall"],
+    "windows": ["window"],
+}
+
+
+def shard_collection_name(collection_name: str, element_type: str) -> str:
+    """Name of the per-element-type shard of a collection (e.g. "ifc_elements_door")"""
+    return f"{collection_name}_{element_type}"
+
+
+def detect_element_types(query: str) -> List[str]:
+    """Return the element types mentioned in a query, or an empty list if ambiguous"""
+    query_lower = query.lower()
+    return [
+        element_type for element_type, keywords in ELEMENT_TYPE_KEYWORDS.items()
+        if any(keyword in query_lower for keyword in keywords)
+    ]
+
+
 class ExcelToChromaConverter:
     """Convert Excel files to ChromaDB collections for RAG"""
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
-        """Initialize the converter with a persistence directory"""
+    def __init__(self, persist_directory: str = "./chroma_db", backend: str = "chroma", precision: str = "float32"):
+        """Initialize the converter with a persistence directory and vector backend
+        
+        precision ("float32", "float16" or "int8") sets how the numpy backend stores embeddings.
+        """
         self.persist_directory = persist_directory
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"  # Lightweight embedding model
-        )
         
         # Create the persistence directory if it doesn't exist
         os.makedirs(persist_directory, exist_ok=True)
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path=persist_directory)
-        console.print(f"[green]Initialized ChromaDB at {persist_directory}[/green]")
+        # Initialize the vector backend (ChromaDB client or NumPy matrices)
+        self.backend = open_backend(backend, persist_directory, precision=precision)
+        console.print(f"[green]Initialized {backend} vector store at {persist_directory}[/green]")
+    
+    @property
+    def embedding_function(self):
+        """Shared embedding function (the model is loaded when first needed)"""
+        return get_embedding_function()
+        
+    @staticmethod
+    def prepare_documents_from_excel(excel_file_path: str, df=None, raise_errors: bool = False) -> List[Dict[str, Any]]:
+        """Prepare documents from an Excel file (or its already loaded frame) for embedding into ChromaDB
+
+        Errors are reported and give no documents, unless raise_errors is set.
+        """
+        from excel_loader import read_excel_cached
         
-    def prepare_documents_from_excel(self, excel_file_path: str) -> List[Dict[str, Any]]:
-        """Prepare documents from an Excel file for embedding into ChromaDB"""
         try:
             # Check if file exists
-            if not os.path.exists(excel_file_path):
+            if df is None and not os.path.exists(excel_file_path):
                 console.print(f"[red]Error: File {excel_file_path} not found[/red]")
                 return []
                 
-            # Read the Excel file
-            df = pd.read_excel(excel_file_path)
+            # Read the Excel file (from its parsed cache if unchanged)
+            if df is None:
+                df = read_excel_cached(excel_file_path)
             
             # Handle missing values
             df = df.fillna("")
@@ -80,32 +166,41 @@ class ExcelToChromaConverter:
             return documents
             
         except Exception as e:
+            if raise_errors:
+                raise
             console.print(f"[red]Error processing {excel_file_path}: {e}[/red]")
             return []
         
-    def create_collection(self, collection_name: str, documents: List[Dict[str, Any]]) -> None:
-        """Create a collection in ChromaDB with the given documents"""
+    def _ask_replace_existing(self, collection_name: str) -> bool:
+        """Ask the user whether an existing collection should be replaced"""
+        console.print(f"[blue]Collection '{collection_name}' already exists.[/blue]")
+        choice = console.input("\n[bold yellow]Use existing collection or create new one? (existing/new):[/bold yellow] ")
+        return choice.lower() in ["new", "n"]
+    
+    def create_collection(self, collection_name: str, documents: List[Dict[str, Any]], replace_existing: Optional[bool] = None) -> bool:
+        """Create a collection in ChromaDB with the given documents
+        
+        If the collection already exists the user is asked whether to replace it,
+        unless replace_existing is given. Returns True if the collection was (re)built.
+        """
         # Check if collection already exists
-        collection_exists = collection_name in [col.name for col in self.client.list_collections()]
+        collection_exists = collection_name in self.backend.list_collections()
         
         if collection_exists:
-            # Ask user what to do
-            console.print(f"[blue]Collection '{collection_name}' already exists.[/blue]")
-            choice = console.input("\n[bold yellow]Use existing collection or create new one? (existing/new):[/bold yellow] ")
+            if replace_existing is None:
+                # Ask user what to do
+                replace_existing = self._ask_replace_existing(collection_name)
             
-            if choice.lower() in ["new", "n"]:
-                self.client.delete_collection(name=collection_name)
+            if replace_existing:
+                self.backend.delete_collection(collection_name)
                 console.print(f"[yellow]Deleted existing collection: {collection_name}[/yellow]")
             else:
                 console.print(f"[green]Using existing collection: {collection_name}[/green]")
-                return  # Keep existing collection and don't add documents
+                return False  # Keep existing collection and don't add documents
         
         # Create new collection
         console.print(f"[green]Creating new collection: {collection_name}[/green]")
-        collection = self.client.create_collection(
-            name=collection_name,
-            embedding_function=self.embedding_function
-        )
+        collection = self.backend.create_collection(collection_name, self.embedding_function)
         
         # Add documents in batches to avoid memory issues
         batch_size = 100
@@ -128,51 +223,130 @@ class ExcelToChromaConverter:
                 )
                 
                 progress.update(task, advance=len(batch))
+        
+        # Write out documents buffered by the backend
+        collection.save()
+        
+        # Invalidate cached query results for this collection
+        bump_collection_version(self.persist_directory, collection_name)
             
         console.print(f"[green]Added {len(documents)} documents to collection {collection_name}[/green]")
+        return True
+    
+    def _delete_collections(self, collection_names: List[str]) -> None:
+        """Delete collections belonging to a previous index layout"""
+        for name in collection_names:
+            self.backend.delete_collection(name)
+            console.print(f"[yellow]Deleted collection from previous layout: {name}[/yellow]")
+        
+    def process_excel_files(self, excel_files: List[str], collection_name: str, shard_by_type: bool = False) -> None:
+        """Process multiple Excel files and add them to a single collection
+        
+        With shard_by_type, one collection per element type is created instead
+        (named "<collection_name>_<element_type>"), so each HNSW index stays small.
+        """
+        from excel_loader import load_excel_files
         
-    def process_excel_files(self, excel_files: List[str], collection_name: str) -> None:
-        """Process multiple Excel files and add them to a single collection"""
-        all_documents = []
+        documents_by_type = {}
+        
+        # Parse all files at once (in parallel, or from their cache)
+        frames = load_excel_files(excel_files)
+        
+        # Precompute quantity totals for aggregation questions and index element bounding boxes
+        write_quantity_cube(frames, os.path.join(self.persist_directory, QUANTITY_CUBE_FILE))
+        write_spatial_index(frames, os.path.join(self.persist_directory, SPATIAL_INDEX_FILE))
         
         with Progress() as progress:
             task = progress.add_task("[cyan]Processing Excel files...", total=len(excel_files))
             
             for excel_file in excel_files:
                 console.print(f"[blue]Processing {excel_file}...[/blue]")
-                documents = self.prepare_documents_from_excel(excel_file)
-                all_documents.extend(documents)
+                documents = self.prepare_documents_from_excel(excel_file, frames[excel_file]) if excel_file in frames else []
+                if documents:
+                    element_type = documents[0]["metadata"]["ElementType"]
+                    documents_by_type.setdefault(element_type, []).extend(documents)
                 console.print(f"[green]Extracted {len(documents)} documents from {excel_file}[/green]")
                 progress.update(task, advance=1)
-                
-        # Create collection with all documents
-        self.create_collection(collection_name, all_documents)
+        
+        existing = self.backend.list_collections()
+        shard_prefix = shard_collection_name(collection_name, "")
+        old_shards = [name for name in existing if name.startswith(shard_prefix)]
+        
+        if not shard_by_type:
+            # Create collection with all documents
+            all_documents = [doc for documents in documents_by_type.values() for doc in documents]
+            if self.create_collection(collection_name, all_documents) and old_shards:
+                self._delete_collections(old_shards)
+            return
+        
+        # Ask once for all shards rather than once per element type
+        replace_existing = None
+        shard_names = [shard_collection_name(collection_name, element_type) for element_type in documents_by_type]
+        if any(name in existing for name in shard_names):
+            replace_existing = self._ask_replace_existing(f"{shard_prefix}*")
+        
+        rebuilt = False
+        for element_type, documents in documents_by_type.items():
+            shard_name = shard_collection_name(collection_name, element_type)
+            rebuilt |= self.create_collection(shard_name, documents, replace_existing=replace_existing)
+        
+        if rebuilt:
+            # Queries address the shards through the base collection name
+            bump_collection_version(self.persist_directory, collection_name)
+            
+            # Drop the monolithic collection and shards of element types no longer exported
+            stale = [name for name in old_shards if name not in shard_names]
+            if collection_name in existing:
+                stale.append(collection_name)
+            self._delete_collections(stale)
 
 
 class BIMQueryEngine:
     """A query engine for answering questions about BIM data"""
     
-    def __init__(self, collection_name: str = "ifc_elements", persist_directory: str = "./chroma_db"):
-        """Initialize the query engine with a ChromaDB collection"""
+    def __init__(self, collection_name: str = "ifc_elements", persist_directory: str = "./chroma_db", max_workers: int = 6,
+                 reranker: Optional[CrossEncoderReranker] = None, rerank_candidates: int = 20, backend: str = "chroma",
+                 rescore_candidates: int = 0):
+        """Initialize the query engine with a collection of the given vector backend
+        
+        If the data was converted into per-element-type shards, the engine connects
+        to all of them and routes each query to the shards it mentions. With a
+        reranker, rerank_candidates documents are fetched and reranked per query.
+        With a quantized numpy index, rescore_candidates documents are found on the
+        quantized vectors and re-scored with their float32 vectors.
+        """
         # Set up ChromaDB
         self.persist_directory = persist_directory
         self.collection_name = collection_name
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        self.max_workers = max_workers
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
+        
+        # Initialize the vector backend (ChromaDB client or NumPy matrices)
+        self.backend = open_backend(backend, persist_directory, rescore_candidates=rescore_candidates)
         
-        # Initialize ChromaDB client
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        # Single collection, or shards keyed by element type
+        self.collection = None
+        self.shards = {}
+        
+        # Query embedding LRU and persisted result/answer cache
+        self.embedding_cache = EmbeddingCache()
+        self.result_cache = ResultCache(os.path.join(persist_directory, "query_cache.json"))
         
         # Try to get the collection
         try:
+            existing = self.backend.list_collections()
+            shard_prefix = shard_collection_name(collection_name, "")
+            shard_names = [name for name in existing if name.startswith(shard_prefix)]
+            
             # Check if collection exists
-            if collection_name in [col.name for col in self.client.list_collections()]:
-                self.collection = self.client.get_collection(
-                    name=collection_name,
-                    embedding_function=self.embedding_function
-                )
+            if collection_name in existing:
+                self.collection = self.backend.get_collection(collection_name, self.embedding_function)
                 console.print(f"[green]Connected to existing collection: {collection_name}[/green]")
+            elif shard_names:
+                for name in shard_names:
+                    self.shards[name[len(shard_prefix):]] = self.backend.get_collection(name, self.embedding_function)
+                console.print(f"[green]Connected to {len(self.shards)} element type shards: {', '.join(sorted(self.shards))}[/green]")
             else:
                 console.print(f"[yellow]Collection '{collection_name}' does not exist.[/yellow]")
                 console.print(f"[yellow]Please run with --convert first to create and populate it.[/yellow]")
@@ -181,63 +355,297 @@ class BIMQueryEngine:
             console.print(f"[red]Error connecting to collection {collection_name}: {e}[/red]")
             raise e
     
-    def query(self, query_text: str, n_results: int = 5) -> Dict[str, Any]:
+    @property
+    def embedding_function(self):
+        """Shared embedding function (the model is loaded when first needed)"""
+        return get_embedding_function()
+    
+    @staticmethod
+    def _distance_to_score(distance: float) -> float:
+        """Convert a vector distance into a relevance score between 0 and 1"""
+        # Normalize the distance to ensure a positive score between 0 and 1
+        # This handles any distance metric (cosine, euclidean, etc.)
+        if distance > 1:
+            # For distances > 1 (like euclidean), use an exponential decay formula
+            relevance = 1 / (1 + distance)
+        else:
+            # For distances <= 1 (like cosine), use linear conversion
+            relevance = 1 - distance
+            
+        # Ensure the score is always positive
+        return max(0, min(1, relevance))
+    
+    def collection_version(self) -> int:
+        """Current version of the collection, bumped by the converter on every write"""
+        return get_collection_version(self.persist_directory, self.collection_name)
+    
+    def _retrieval_variant(self) -> str:
+        """Describe retrieval settings that change results, so they get separate cache entries"""
+        if self.reranker is None:
+            return ""
+        return f"rerank:{self.reranker.model_name}:{self.rerank_candidates}"
+    
+    def cache_key(self, query_text: str, n_results: int) -> Tuple[str, int]:
+        """Return the result cache key for a query and the collection version it is bound to"""
+        version = self.collection_version()
+        return ResultCache.make_key(query_text, n_results, version, self._retrieval_variant()), version
+    
+    def embed_query(self, query_text: str) -> List[float]:
+        """Embed a query, reusing the embedding of a previously seen normalized query"""
+        return self.embed_queries([query_text])[0]
+    
+    def embed_queries(self, query_texts: List[str]) -> List[List[float]]:
+        """Embed several queries, encoding all cache misses in a single encoder call"""
+        embeddings = [self.embedding_cache.get(text) for text in query_texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        
+        if missing:
+            encoded = self.embedding_function([query_texts[i] for i in missing])
+            for i, vector in zip(missing, encoded):
+                embeddings[i] = [float(x) for x in vector]
+                self.embedding_cache.put(query_texts[i], embeddings[i])
+        
+        return embeddings
+    
+    def route(self, query_text: str) -> List[str]:
+        """Select the shards relevant to a query (all shards if the element type is ambiguous)"""
+        element_types = [t for t in detect_element_types(query_text) if t in self.shards]
+        return element_types or sorted(self.shards)
+    
+    @property
+    def spatial_index(self):
+        """Bounding-box index of the converted elements, or None if the exports had no geometry"""
+        return load_spatial_index(os.path.join(self.persist_directory, SPATIAL_INDEX_FILE))
+    
+    def spatial_filter(self, spatial: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+        """Metadata filter and element types of the elements matching a spatial query
+        
+        spatial holds "near" ([x, y, z]) and "radius", "box" ([[x, y, z], [x, y, z]],
+        None for an unbounded axis) or "elevation" (z), and optionally
+        "element_types". The filter is None if no element matches.
+        """
+        index = self.spatial_index
+        if index is None:
+            raise ValueError("No spatial index found. Run --convert on exports with Geometry.Global X/Y/Z columns.")
+        elements = index.search(**spatial)
+        if not len(elements):
+            return None, []
+        element_types = sorted({index.element_types[code] for code in index.type_codes[elements]})
+        return index.where(elements), element_types
+    
+    def _query_collection(self, collection: VectorStore, query_embeddings: List[List[float]], n_results: int,
+                          where: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
+        """Run a batched vector search on one collection and format the results per query
+        
+        where is an optional Chroma-style metadata filter, e.g. {"ElementType": "door"}.
+        """
+        n_results = min(n_results, collection.count())
+        if n_results == 0:
+            return [[] for _ in query_embeddings]
+        
+        results = collection.query(query_embeddings, n_results, where=where)
+        
+        all_results = []
+        for q in range(len(query_embeddings)):
+            formatted_results = []
+            for i in range(len(results["documents"][q])):
+                result = {
+                    "id": results["ids"][q][i],
+                    "content": results["documents"][q][i],
+                    "metadata": results["metadatas"][q][i],
+                    "score": self._distance_to_score(results["distances"][q][i])  # Properly normalized relevance score
+                }
+                formatted_results.append(result)
+            all_results.append(formatted_results)
+        
+        return all_results
+    
+    def _search(self, query_texts: List[str], query_embeddings: List[List[float]], n_results: int,
+                where: Optional[Dict[str, Any]] = None, element_types: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+        """Search the collection, or the routed shards, for a batch of embedded queries
+        
+        where filters the documents by metadata; element_types limits the shards searched.
+        """
+        if self.collection is not None:
+            return self._query_collection(self.collection, query_embeddings, n_results, where)
+        
+        # Group the queries by shard so each shard is searched once for the whole batch
+        positions_by_shard = {}
+        for position, query_text in enumerate(query_texts):
+            routed = self.route(query_text)
+            if element_types is not None:
+                # Only shards holding matching elements; all of them if the question names none
+                routed = [t for t in routed if t in element_types] or [t for t in element_types if t in self.shards]
+            for element_type in routed:
+                positions_by_shard.setdefault(element_type, []).append(position)
+        if not positions_by_shard:
+            return [[] for _ in query_texts]
+        
+        def search_shard(element_type):
+            positions = positions_by_shard[element_type]
+            shard_embeddings = [query_embeddings[p] for p in positions]
+            return positions, self._query_collection(self.shards[element_type], shard_embeddings, n_results, where)
+        
+        # Fan out to the shards concurrently and merge by score
+        merged = [[] for _ in query_texts]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(positions_by_shard))) as executor:
+            for positions, shard_results in executor.map(search_shard, list(positions_by_shard)):
+                for position, results in zip(positions, shard_results):
+                    merged[position].extend(results)
+        
+        return [sorted(results, key=lambda r: r["score"], reverse=True)[:n_results] for results in merged]
+    
+    def query(self, query_text: str, n_results: int = 5, spatial: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Query the collection with a natural language query"""
-        results = self.collection.query(
-            query_texts=[query_text],
-            n_results=n_results
-        )
+        return self.query_batch([query_text], n_results, spatial)[0]
+    
+    def query_batch(self, query_texts: List[str], n_results: int = 5,
+                    spatial: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Query the collection with several natural language queries at once
+        
+        Cached queries are answered from the result cache; the rest are embedded
+        in one encoder call and searched with one batched query per collection,
+        then reranked if a reranker is configured. With a spatial query (see
+        spatial_filter), only documents of the elements it matches are searched.
+        """
+        version = self.collection_version()
+        variant = self._retrieval_variant()
+        where, element_types = None, None
+        if spatial:
+            where, element_types = self.spatial_filter(spatial)
+            if where is None:
+                return [{"query": query_text, "results": []} for query_text in query_texts]
+            variant += f"|spatial:{json.dumps(spatial, sort_keys=True)}"
+        keys = [ResultCache.make_key(query_text, n_results, version, variant) for query_text in query_texts]
+        all_results = [self.result_cache.get_results(key) for key in keys]
+        pending = [i for i, results in enumerate(all_results) if results is None]
         
-        formatted_results = []
-        for i in range(len(results["documents"][0])):
-            # Properly handle distance to ensure positive relevance scores
-            distance = results["distances"][0][i]
+        if pending:
+            pending_texts = [query_texts[i] for i in pending]
+            # Embed once and reuse the vectors for every shard searched
+            query_embeddings = self.embed_queries(pending_texts)
             
-            # Normalize the distance to ensure a positive score between 0 and 1
-            # This handles any distance metric (cosine, euclidean, etc.)
-            if distance > 1:
-                # For distances > 1 (like euclidean), use an exponential decay formula
-                relevance = 1 / (1 + distance)
+            if self.reranker is None:
+                found = self._search(pending_texts, query_embeddings, n_results, where, element_types)
+                cacheable = pending
             else:
-                # For distances <= 1 (like cosine), use linear conversion
-                relevance = 1 - distance
-                
-            # Ensure the score is always positive
-            relevance = max(0, min(1, relevance))
+                # Over-fetch candidates and let the cross-encoder pick the best n_results
+                candidates = self._search(pending_texts, query_embeddings, max(n_results, self.rerank_candidates),
+                                          where, element_types)
+                reranked = [
+                    self.reranker.rerank(query_text, documents, n_results)
+                    for query_text, documents in zip(pending_texts, candidates)
+                ]
+                found = [results for results, _ in reranked]
+                # Results in vector order (budget ran out) are not cached, so the next ask reranks them
+                cacheable = [i for i, (_, complete) in zip(pending, reranked) if complete]
             
-            result = {
-                "content": results["documents"][0][i],
-                "metadata": results["metadatas"][0][i],
-                "score": relevance  # Properly normalized relevance score
+            for i, results in zip(pending, found):
+                all_results[i] = results
+            if cacheable:
+                self.result_cache.put_many_results([(keys[i], all_results[i]) for i in cacheable], version)
+        
+        return [
+            {
+                "query": query_text,
+                "results": results
             }
-            formatted_results.append(result)
-            
-        return {
-            "query": query_text,
-            "results": formatted_results
-        }
+            for query_text, results in zip(query_texts, all_results)
+        ]
+    
+    def collection_for(self, element_type: str) -> VectorStore:
+        """Collection holding documents of an element type (a new shard is created if needed)"""
+        if self.collection is not None:
+            return self.collection
+        if element_type not in self.shards:
+            shard = self.backend.create_collection(
+                shard_collection_name(self.collection_name, element_type), self.embedding_function
+            )
+            # Replace rather than mutate the dict, so concurrent queries never see it change
+            self.shards = {**self.shards, element_type: shard}
+        return self.shards[element_type]
+    
+    def apply_changes(self, element_type: str, upserts: List[Dict[str, Any]], delete_ids: List[str]) -> None:
+        """Add and delete documents of one element type while queries keep running
+        
+        Bumps the collection version, so cached results and answers are invalidated.
+        """
+        if not upserts and not delete_ids:
+            return
+        collection = self.collection_for(element_type)
+        if delete_ids:
+            collection.delete(delete_ids)
+        for i in range(0, len(upserts), 100):
+            batch = upserts[i:i+100]
+            collection.add(
+                ids=[doc["id"] for doc in batch],
+                documents=[doc["content"] for doc in batch],
+                metadatas=[doc["metadata"] for doc in batch]
+            )
+        collection.save()
+        
+        bump_collection_version(self.persist_directory, collection.name)
+        if collection.name != self.collection_name:
+            bump_collection_version(self.persist_directory, self.collection_name)
 
 
 class GeminiRAGSystem:
-    """RAG system using ChromaDB embeddings and Gemini Flash LLM"""
+    """RAG system using ChromaDB embeddings and Gemini Flash LLM
     
-    def __init__(self, collection_name: str = "ifc_elements", persist_directory: str = "./chroma_db"):
-        """Initialize the RAG system with a ChromaDB collection and Gemini API"""
-        # Set up the query engine
-        self.query_engine = BIMQueryEngine(collection_name, persist_directory)
+    One instance can serve several users at once: the embedding model, collection
+    handles, LLM client and caches are shared and thread-safe, analysis results
+    live in a reader/writer-locked store, and per-user state is kept in RAGSession
+    objects (see create_session).
+    """
+    
+    def __init__(self, collection_name: str = "ifc_elements", persist_directory: str = "./chroma_db",
+                 semantic_threshold: float = 0.9, semantic_ttl: float = 24 * 3600, semantic_max_entries: int = 512,
+                 llm: Optional[LLMClient] = None, reranker: Optional[CrossEncoderReranker] = None, rerank_candidates: int = 20,
+                 context_tokens: int = 1500, backend: str = "chroma", rescore_candidates: int = 0):
+        """Initialize the RAG system with a ChromaDB collection and Gemini API
         
-        # Store for analysis results
-        self.analysis_results = None
-        self.analysis_results_path = "analysis_results.json"
+        Pass llm to use another LLMClient (e.g. StubLLMClient) instead of Gemini,
+        and reranker to rerank the top rerank_candidates retrieved documents.
+        context_tokens bounds the size of the retrieved context in the prompt,
+        backend selects the vector store ("chroma" or "numpy") and rescore_candidates
+        the number of candidates re-scored in full precision on a quantized index.
+        """
+        self.context_tokens = context_tokens
         
-        # Load previous analysis results if they exist
-        if os.path.exists(self.analysis_results_path):
-            try:
-                with open(self.analysis_results_path, 'r') as f:
-                    self.analysis_results = json.load(f)
-                console.print(f"[green]Loaded previous analysis results from {self.analysis_results_path}[/green]")
-            except Exception as e:
-                console.print(f"[yellow]Could not load previous analysis results: {e}[/yellow]")
+        # The query engine (ChromaDB and the embedding model) is set up on first use,
+        # so commands that only read analysis results start quickly
+        self._query_engine = None
+        self._query_engine_lock = threading.Lock()
+        self._engine_options = {
+            "collection_name": collection_name,
+            "persist_directory": persist_directory,
+            "reranker": reranker,
+            "rerank_candidates": rerank_candidates,
+            "backend": backend,
+            "rescore_candidates": rescore_candidates
+        }
+        
+        # Reuse answers to semantically equivalent questions over the same sources
+        self.semantic_cache = SemanticAnswerCache(semantic_threshold, semantic_ttl, semantic_max_entries)
+        
+        # Store for analysis results (loads previous analysis results if they exist)
+        self.analysis_results_path = "analysis_results.db"
+        self.analysis_store = AnalysisResultStore(self.analysis_results_path)
+        self.violation_index_path = "violation_index.npz"
+        self.quantity_cube_path = os.path.join(persist_directory, QUANTITY_CUBE_FILE)
+        self.spatial_index_path = os.path.join(persist_directory, SPATIAL_INDEX_FILE)
+        self._analysis_run_lock = threading.Lock()
+        
+        # Per-user sessions sharing this system's resources (oldest dropped beyond max_sessions)
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self.max_sessions = 1000
+        
+        if llm is not None:
+            self.llm = llm
+            self.llm_enabled = True
+            console.print(f"[green]Using {llm.name} for responses[/green]")
+            return
         
         # Set up Gemini API
         api_key = os.getenv("GOOGLE_API_KEY")
@@ -248,34 +656,75 @@ class GeminiRAGSystem:
             self.llm_enabled = False
         else:
             try:
-                genai.configure(api_key=api_key)
-                self.model = genai.GenerativeModel('gemini-2.0-flash')
+                self.llm = GeminiClient(api_key, 'gemini-2.0-flash')
                 self.llm_enabled = True
-                console.print("[green]Gemini Flash model initialized successfully[/green]")
+                console.print("[green]Gemini Flash model configured successfully[/green]")
             except Exception as e:
                 console.print(f"[red]Error initializing Gemini model: {e}[/red]")
                 console.print("[yellow]Falling back to non-LLM mode[/yellow]")
                 self.llm_enabled = False
     
-    def generate_response(self, query: str, context: List[Dict[str, Any]]) -> str:
-        """Generate a response using Gemini model with retrieved context"""
-        if not self.llm_enabled:
-            # Provide a fallback response with the retrieved context
-            formatted_context = "\n\n".join([
-                f"Document {i+1} (Relevance: {doc['score']:.2f}):\n{doc['content']}"
-                for i, doc in enumerate(context)
-            ])
-            return f"LLM integration is disabled. Here are the most relevant results:\n\n{formatted_context}"
-            
-        try:
-            # Format the context for the prompt
-            formatted_context = "\n\n".join([
-                f"Document {i+1} (Relevance: {doc['score']:.2f}):\n{doc['content']}"
-                for i, doc in enumerate(context)
-            ])
-            
-            # Prepare the prompt
-            prompt = f"""
+    @property
+    def analysis_results(self) -> Optional[Dict[str, Any]]:
+        """Current analysis results (a read-only snapshot; reads everything, prefer analysis_store's accessors)"""
+        return self.analysis_store.get()
+    
+    def create_session(self, session_id: Optional[str] = None) -> "RAGSession":
+        """Create a session with its own state on top of the shared resources"""
+        session = RAGSession(self, session_id)
+        with self._sessions_lock:
+            self._sessions[session.session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.pop(next(iter(self._sessions)))
+        return session
+    
+    def get_session(self, session_id: Optional[str] = None) -> "RAGSession":
+        """Return an existing session, or create it if unknown"""
+        with self._sessions_lock:
+            session = self._sessions.get(session_id) if session_id else None
+        return session or self.create_session(session_id)
+    
+    def close_session(self, session_id: str) -> None:
+        """Forget a session and its state"""
+        with self._sessions_lock:
+            self._sessions.pop(session_id, None)
+    
+    @property
+    def query_engine(self) -> BIMQueryEngine:
+        """Query engine, connected to ChromaDB on first access"""
+        with self._query_engine_lock:
+            if self._query_engine is None:
+                self._query_engine = BIMQueryEngine(**self._engine_options)
+        return self._query_engine
+    
+    @staticmethod
+    def _format_context(context: List[Dict[str, Any]]) -> str:
+        """Format retrieved documents for the prompt"""
+        return "\n\n".join([
+            f"Document {i+1} (Relevance: {doc['score']:.2f}):\n{doc['content']}"
+            for i, doc in enumerate(context)
+        ])
+    
+    def _prepare_prompt(self, query: str, context: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        """Pack the retrieved context into the token budget and build the prompt"""
+        packed = build_context(query, context, self.context_tokens)
+        prompt = self._build_prompt(query, packed["text"])
+        packed["prompt_tokens"] = estimate_tokens(prompt)
+        return prompt, packed
+    
+    @staticmethod
+    def _log_generation(packed: Dict[str, Any], elapsed: float) -> None:
+        """Log prompt size and generation latency"""
+        console.print(
+            f"[dim]Prompt: ~{packed['prompt_tokens']} tokens "
+            f"({packed['elements']}/{packed['total_elements']} elements, {packed['rows']}/{packed['total_rows']} rows), "
+            f"generated in {elapsed:.2f}s[/dim]"
+        )
+    
+    @staticmethod
+    def _build_prompt(query: str, formatted_context: str) -> str:
+        """Build the LLM prompt for a question and its formatted context"""
+        return f"""
             You are an expert Building Information Modeling (BIM) assistant that helps users understand building models.
             Answer the question based ONLY on the provided context about the building model.
             If you cannot answer based on the context, say so clearly.
@@ -288,16 +737,232 @@ class GeminiRAGSystem:
             
             ANSWER:
             """
+    
+    def _find_similar_answer(self, query: str, context: List[Dict[str, Any]]) -> Tuple[Optional[str], Tuple]:
+        """Look up the semantic answer cache; also returns the key to store a new answer under"""
+        query_embedding = self.query_engine.embed_query(query)
+        source_ids = [doc["id"] for doc in context]
+        version = self.query_engine.collection_version()
+        semantic_key = (query_embedding, source_ids, version)
+        
+        cached_answer = self.semantic_cache.get(*semantic_key)
+        if cached_answer is not None:
+            console.print("[bold blue]Reusing answer to a similar question[/bold blue]")
+        return cached_answer, semantic_key
+    
+    def _store_answer(self, answer: str, semantic_key: Tuple, cache_key: Optional[Tuple[str, int]]) -> None:
+        """Store a successfully generated answer in the semantic and result caches"""
+        self.semantic_cache.put(*semantic_key, answer)
+        if cache_key is not None:
+            key, version = cache_key
+            self.query_engine.result_cache.put_answer(key, version, answer)
+    
+    def generate_response(self, query: str, context: List[Dict[str, Any]], cache_key: Optional[Tuple[str, int]] = None) -> str:
+        """Generate a response using Gemini model with retrieved context
+        
+        A previous answer is reused if a semantically similar question retrieved the
+        same sources. If cache_key (as returned by BIMQueryEngine.cache_key) is given,
+        a successful answer is also stored in the result cache under it.
+        """
+        if not self.llm_enabled:
+            # Provide a fallback response with the retrieved context
+            return f"LLM integration is disabled. Here are the most relevant results:\n\n{self._format_context(context)}"
+        
+        cached_answer, semantic_key = self._find_similar_answer(query, context)
+        if cached_answer is not None:
+            return cached_answer
+            
+        try:
+            # Generate response from a compact, token-budgeted prompt
+            prompt, packed = self._prepare_prompt(query, context)
+            start = time.perf_counter()
+            answer = self.llm.generate(prompt)
+            self._log_generation(packed, time.perf_counter() - start)
             
-            # Generate response
-            response = self.model.generate_content(prompt)
-            return response.text
+            self._store_answer(answer, semantic_key, cache_key)
+            return answer
         except Exception as e:
-            console.print(f"[red]Error generating response with Gemini: {e}[/red]")
-            return f"Error generating response with Gemini: {e}\n\nHere are the most relevant results:\n\n{formatted_context}"
+            console.print(f"[red]Error generating response with {self.llm.name}: {e}[/red]")
+            return f"Error generating response with {self.llm.name}: {e}\n\nHere are the most relevant results:\n\n{self._format_context(context)}"
     
-    def answer_question(self, query: str, n_results: int = 5) -> Dict[str, Any]:
-        """Answer a question about the building model"""
+    async def generate_response_async(self, query: str, context: List[Dict[str, Any]],
+                                      cache_key: Optional[Tuple[str, int]] = None,
+                                      on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Streaming counterpart of generate_response; on_token receives each chunk as it arrives"""
+        on_token = on_token or (lambda text: None)
+        
+        if not self.llm_enabled:
+            answer = f"LLM integration is disabled. Here are the most relevant results:\n\n{self._format_context(context)}"
+            on_token(answer)
+            return answer
+        
+        cached_answer, semantic_key = await asyncio.to_thread(self._find_similar_answer, query, context)
+        if cached_answer is not None:
+            on_token(cached_answer)
+            return cached_answer
+        
+        chunks = []
+        try:
+            prompt, packed = self._prepare_prompt(query, context)
+            start = time.perf_counter()
+            async for chunk in self.llm.stream(prompt):
+                chunks.append(chunk)
+                on_token(chunk)
+            
+            answer = "".join(chunks)
+            self._log_generation(packed, time.perf_counter() - start)
+            self._store_answer(answer, semantic_key, cache_key)
+            return answer
+        except Exception as e:
+            console.print(f"[red]Error generating response with {self.llm.name}: {e}[/red]")
+            error = f"Error generating response with {self.llm.name}: {e}\n\nHere are the most relevant results:\n\n{self._format_context(context)}"
+            on_token(("\n\n" if chunks else "") + error)
+            return "".join(chunks) + error
+    
+    @property
+    def violation_index(self):
+        """Per-element violation index of the last schema comparison, or None"""
+        from violation_index import load_violation_index
+        return load_violation_index(self.violation_index_path)
+    
+    def answer_element_violations(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer which elements miss required parameters from the violation index, if applicable
+        
+        Handles questions naming a required parameter ("which doors lack FireRating?")
+        and questions about a number of missing parameters ("elements missing at
+        least 2 required parameters"). Returns None for other questions.
+        """
+        query_lower = query.lower()
+        if not VIOLATION_PATTERN.search(query_lower):
+            return None
+        index = self.violation_index
+        if index is None:
+            return None
+        
+        mentioned = detect_element_types(query)
+        element_types = [t for t in mentioned if t in index.element_types] if mentioned else index.element_types
+        
+        at_least = re.search(r"(?:>=|≥|at least)\s*(\d+)|(\d+)\s*(?:or more|\+)", query_lower)
+        if at_least:
+            count = int(at_least.group(1) or at_least.group(2))
+            violations = {}
+            for element_type in element_types:
+                violations.update(index.missing_at_least(count, element_type))
+            elements = {
+                element_type: [f"{element_id} (missing {', '.join(params)})" for element_id, params in rows]
+                for element_type, rows in violations.items()
+            }
+            title = f"Elements missing at least {count} required parameters"
+        else:
+            elements = {}
+            for element_type in element_types:
+                for param in index.parameters(element_type):
+                    if re.search(rf"\b{re.escape(param.lower())}\b", query_lower):
+                        elements[f"{element_type} without {param}"] = index.missing(element_type, param)
+            if not elements:
+                return None
+            title = "Elements missing required parameters"
+        
+        if not any(elements.values()):
+            response = f"{title}: none found in the analysis."
+        else:
+            response = f"{title}:\n\n"
+            for group, ids in elements.items():
+                if not ids:
+                    continue
+                response += f"{group} ({len(ids)} elements):\n"
+                for element_id in ids[:MAX_LISTED_ELEMENTS]:
+                    response += f"- {element_id}\n"
+                if len(ids) > MAX_LISTED_ELEMENTS:
+                    response += f"- ... and {len(ids) - MAX_LISTED_ELEMENTS} more\n"
+                response += "\n"
+        
+        return {
+            "query": query,
+            "response": response,
+            "sources": [],
+            "elements": elements
+        }
+    
+    @property
+    def quantity_cube(self):
+        """Quantity takeoff cube of the last conversion, or None"""
+        return load_quantity_cube(self.quantity_cube_path)
+    
+    def answer_quantity_takeoff(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer aggregation questions over quantities from the quantity cube, if applicable
+        
+        Handles questions such as "total slab area per storey" or "sum of wall
+        NetVolume by material": the element types and quantities named in the
+        question are looked up, optionally broken down per storey or material and
+        restricted to a storey or material named in the question. Returns None
+        for other questions.
+        """
+        query_lower = query.lower()
+        if not AGGREGATION_PATTERN.search(query_lower):
+            return None
+        cube = self.quantity_cube
+        if cube is None:
+            return None
+        
+        mentioned = detect_element_types(query)
+        element_types = [t for t in mentioned if t in cube.element_types] if mentioned else cube.element_types
+        breakdown = BREAKDOWN_PATTERN.search(query_lower)
+        by = BREAKDOWN_DIMENSIONS[breakdown.group(1)] if breakdown else None
+        
+        def named(key, dimension):
+            # A storey or material the question restricts the totals to
+            return next((value for value in cube.values(key, dimension)
+                         if len(value) > 1 and re.search(rf"(?<!\w){re.escape(value.lower())}(?!\w)", query_lower)), ALL)
+        
+        quantities = {}
+        response = ""
+        for element_type in element_types:
+            for key in cube.find_quantities(element_type, query):
+                storey, material = named(key, "storey"), named(key, "material")
+                total = cube.lookup(key, storey, material)
+                if total is None:
+                    continue
+                _, set_name, attribute, unit = key
+                label = f"{element_type} {attribute} ({set_name})" if set_name else f"{element_type} {attribute}"
+                scope = " and ".join(value for value in [storey, material] if value != ALL)
+                if scope:
+                    label += f" on {scope}"
+                quantities[label] = {"total": total}
+                response += f"{label}: {self._format_measures(total)}\n"
+                if by is not None:
+                    quantities[label][by] = cube.breakdown(key, by, storey, material)
+                    for value, measures in quantities[label][by].items():
+                        response += f"- {value or '(none)'}: {self._format_measures(measures)}\n"
+                response += "\n"
+        
+        if not quantities:
+            return None
+        return {
+            "query": query,
+            "response": "Quantity takeoff from the converted exports:\n\n" + response,
+            "sources": [],
+            "quantities": quantities
+        }
+    
+    @staticmethod
+    def _format_measures(measures: Dict[str, Any]) -> str:
+        unit = f" {measures['unit']}" if measures["unit"] else ""
+        return (f"{measures['sum']:,.2f}{unit} ({measures['count']} values, "
+                f"min {measures['min']:,.2f}, max {measures['max']:,.2f})")
+    
+    def _answer_from_analysis(self, query: str) -> Optional[Dict[str, Any]]:
+        """Answer questions about missing parameters from the analysis results, if applicable"""
+        # Questions about individual elements are answered from the violation index
+        violations = self.answer_element_violations(query)
+        if violations is not None:
+            return violations
+        
+        # Aggregations over quantities are answered from the quantity cube
+        takeoff = self.answer_quantity_takeoff(query)
+        if takeoff is not None:
+            return takeoff
+        
         # Check if this is a question about analysis results for specific element types
         if "missing" in query.lower() and "parameters" in query.lower():
             # Wall parameters
@@ -312,6 +977,27 @@ class GeminiRAGSystem:
             # Slab parameters
             elif "slab" in query.lower():
                 return self.answer_missing_element_parameters("slab")
+        return None
+    
+    def _respond(self, query: str, retrieved_docs: List[Dict[str, Any]], n_results: int) -> str:
+        """Produce the answer text for retrieved documents, using the answer cache when possible"""
+        if not self.llm_enabled:
+            return "LLM integration is disabled. Here are the most relevant results from your building model data."
+        
+        cache_key = self.query_engine.cache_key(query, n_results)
+        response = self.query_engine.result_cache.get_answer(cache_key[0])
+        if response is not None:
+            console.print("[bold blue]Using cached answer[/bold blue]")
+            return response
+        
+        console.print(f"[bold blue]Generating response with {self.llm.name}...[/bold blue]")
+        return self.generate_response(query, retrieved_docs, cache_key)
+    
+    def answer_question(self, query: str, n_results: int = 5) -> Dict[str, Any]:
+        """Answer a question about the building model"""
+        analysis_answer = self._answer_from_analysis(query)
+        if analysis_answer is not None:
+            return analysis_answer
         
         # Regular RAG flow
         # Step 1: Retrieve relevant documents
@@ -320,11 +1006,7 @@ class GeminiRAGSystem:
         retrieved_docs = query_results["results"]
         
         # Step 2: Generate response with LLM if available
-        if self.llm_enabled:
-            console.print("[bold blue]Generating response with Gemini Flash...[/bold blue]")
-            response = self.generate_response(query, retrieved_docs)
-        else:
-            response = "LLM integration is disabled. Here are the most relevant results from your building model data."
+        response = self._respond(query, retrieved_docs, n_results)
         
         # Return the full result
         return {
@@ -333,9 +1015,128 @@ class GeminiRAGSystem:
             "sources": retrieved_docs
         }
     
+    async def answer_question_async(self, query: str, n_results: int = 5,
+                                    on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+        """Answer a question, streaming the answer to on_token as it is generated
+        
+        Retrieval runs in a worker thread while the answer cache is checked, and
+        the answer is streamed from the LLM. The result includes the
+        time to first token and total time in seconds.
+        """
+        start = time.perf_counter()
+        first_token_time = None
+        
+        def handle_token(text: str) -> None:
+            nonlocal first_token_time
+            if first_token_time is None:
+                first_token_time = time.perf_counter() - start
+            if on_token is not None:
+                on_token(text)
+        
+        analysis_answer = self._answer_from_analysis(query)
+        if analysis_answer is not None:
+            handle_token(analysis_answer["response"])
+            response, retrieved_docs = analysis_answer["response"], analysis_answer["sources"]
+        else:
+            console.print(f"\n[bold blue]Retrieving information for: [/bold blue][yellow]{query}[/yellow]")
+            retrieval = asyncio.create_task(asyncio.to_thread(self.query_engine.query, query, n_results))
+            
+            # Overlap retrieval with the answer cache lookup
+            cache_key, response = None, None
+            if self.llm_enabled:
+                cache_key = await asyncio.to_thread(self.query_engine.cache_key, query, n_results)
+                response = self.query_engine.result_cache.get_answer(cache_key[0])
+            
+            retrieved_docs = (await retrieval)["results"]
+            
+            if response is not None:
+                console.print("[bold blue]Using cached answer[/bold blue]")
+                handle_token(response)
+            else:
+                if self.llm_enabled:
+                    console.print(f"[bold blue]Generating response with {self.llm.name}...[/bold blue]")
+                response = await self.generate_response_async(query, retrieved_docs, cache_key, handle_token)
+        
+        return {
+            "query": query,
+            "response": response,
+            "sources": retrieved_docs,
+            "timings": {
+                "first_token": first_token_time,
+                "total": time.perf_counter() - start
+            }
+        }
+    
+    def answer_question_streaming(self, query: str, n_results: int = 5) -> Dict[str, Any]:
+        """Answer a question, rendering the answer panel incrementally as tokens arrive"""
+        streamed = ""
+        
+        def render(text: str) -> Panel:
+            return Panel(text, title="[bold green]Answer[/bold green]", expand=False)
+        
+        with Live(render(""), console=console, refresh_per_second=12, transient=False) as live:
+            def on_token(text: str) -> None:
+                nonlocal streamed
+                streamed += text
+                live.update(render(streamed))
+            
+            return asyncio.run(self.answer_question_async(query, n_results, on_token))
+    
+    def answer_questions(self, queries: List[str], n_results: int = 5, max_concurrency: int = 4) -> List[Dict[str, Any]]:
+        """Answer a batch of questions
+        
+        All questions are retrieved with one batched search; the LLM calls then run
+        with at most max_concurrency requests in flight. Each result carries
+        per-question timings in seconds (retrieval time is the batch share).
+        """
+        results = [None] * len(queries)
+        rag_positions = []
+        
+        for i, query in enumerate(queries):
+            start = time.perf_counter()
+            analysis_answer = self._answer_from_analysis(query)
+            if analysis_answer is not None:
+                elapsed = time.perf_counter() - start
+                results[i] = dict(analysis_answer, query=query,
+                                  timings={"retrieval": 0.0, "generation": elapsed, "total": elapsed})
+            else:
+                rag_positions.append(i)
+        
+        if not rag_positions:
+            return results
+        
+        # Step 1: Retrieve relevant documents for all questions at once
+        console.print(f"[bold blue]Retrieving information for {len(rag_positions)} questions...[/bold blue]")
+        start = time.perf_counter()
+        query_results = self.query_engine.query_batch([queries[i] for i in rag_positions], n_results)
+        retrieval_time = (time.perf_counter() - start) / len(rag_positions)
+        
+        # Step 2: Generate responses with bounded concurrency
+        def respond(position_and_results):
+            i, query_result = position_and_results
+            start = time.perf_counter()
+            response = self._respond(queries[i], query_result["results"], n_results)
+            generation_time = time.perf_counter() - start
+            return i, {
+                "query": queries[i],
+                "response": response,
+                "sources": query_result["results"],
+                "timings": {
+                    "retrieval": retrieval_time,
+                    "generation": generation_time,
+                    "total": retrieval_time + generation_time
+                }
+            }
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            for i, result in executor.map(respond, zip(rag_positions, query_results)):
+                results[i] = result
+        
+        return results
+    
     def answer_missing_element_parameters(self, element_type: str) -> Dict[str, Any]:
         """Generalized function to answer questions about missing parameters for any element type"""
-        if not self.analysis_results or 'comparison' not in self.analysis_results:
+        if not self.analysis_store.has_comparison():
             return {
                 "query": f"What are the missing {element_type} parameters?",
                 "response": f"No analysis results available. Please run the analysis first using the 'analyze' command.",
@@ -343,7 +1144,7 @@ class GeminiRAGSystem:
             }
         
         # Extract parameters from analysis results
-        missing_params = self.analysis_results['comparison'].get('missing_parameters', {})
+        missing_params = self.analysis_store.missing_parameters() or {}
         element_params = {}
         
         # Look for element-related parameters
@@ -380,8 +1181,15 @@ class GeminiRAGSystem:
         """Run IFC data analysis from within the RAG system"""
         console.print(Panel.fit("[bold cyan]Running IFC Data Analysis[/bold cyan]"))
         
+        # One analysis at a time; queries keep reading the previous results meanwhile
+        with self._analysis_run_lock:
+            return self._run_ifc_analysis(data_folder, expected_schema_file, output_file)
+    
+    def _run_ifc_analysis(self, data_folder: str, expected_schema_file: Optional[str], output_file: str) -> Dict:
         try:
             # Run the analysis using the imported module
+            import ifc_analyzer
+            
             results = ifc_analyzer.analyze_ifc_data(
                 data_folder=data_folder,
                 expected_schema_file=expected_schema_file,
@@ -393,12 +1201,8 @@ class GeminiRAGSystem:
                 console.print("[green]Analysis completed successfully![/green]")
                 console.print(f"Report saved to: {results['report_path']}")
                 
-                # Store results for querying
-                self.analysis_results = results
-                
-                # Save results to a file
-                with open(self.analysis_results_path, 'w') as f:
-                    json.dump(results, f, indent=2)
+                # Store results for querying and save them to a file (atomically)
+                self.analysis_store.save(results)
                 console.print(f"[green]Analysis results saved to {self.analysis_results_path} for querying[/green]")
                 
                 # Print a summary of parameters
@@ -413,11 +1217,11 @@ class GeminiRAGSystem:
     
     def display_element_parameter_summary(self, element_type: str):
         """Display a summary of parameters for specific element types from the analysis results"""
-        if not self.analysis_results or 'comparison' not in self.analysis_results:
+        if not self.analysis_store.has_comparison():
             console.print(f"[yellow]No analysis results available for {element_type} parameters.[/yellow]")
             return
         
-        missing_params = self.analysis_results['comparison'].get('missing_parameters', {})
+        missing_params = self.analysis_store.missing_parameters() or {}
         element_types = [elem_type for elem_type in missing_params.keys() if element_type in elem_type.lower()]
         
         if not element_types:
@@ -437,6 +1241,91 @@ class GeminiRAGSystem:
         
         console.print(table)
     
+    def display_element_violations(self, parameter: Optional[str] = None, element_type: Optional[str] = None,
+                                   at_least: Optional[int] = None):
+        """Display the elements missing a required parameter, or at least a number of them"""
+        index = self.violation_index
+        if index is None:
+            console.print("[yellow]No violation index available. Run the analysis with --compare and a schema that lists required_parameters.[/yellow]")
+            return
+        
+        element_types = [t for t in index.element_types if element_type is None or element_type.lower() in t.lower()]
+        table = Table(title="Elements Missing Required Parameters")
+        table.add_column("Element Type", style="cyan")
+        table.add_column("Element", style="green")
+        table.add_column("Missing Parameters", style="yellow")
+        
+        rows = 0
+        for elem_type in element_types:
+            if at_least is not None:
+                for element_id, params in index.missing_at_least(at_least, elem_type).get(elem_type, []):
+                    table.add_row(elem_type, element_id, ", ".join(params))
+                    rows += 1
+            elif parameter in index.parameters(elem_type):
+                for element_id in index.missing(elem_type, parameter):
+                    table.add_row(elem_type, element_id, parameter)
+                    rows += 1
+        
+        if rows:
+            console.print(table)
+        console.print(f"[bold]{rows} elements found[/bold]")
+    
+    def display_quantity_takeoff(self, quantity: str, element_type: Optional[str] = None, by: Optional[str] = None):
+        """Display the totals of the quantities named quantity, optionally per storey or material"""
+        cube = self.quantity_cube
+        if cube is None:
+            console.print("[yellow]No quantity cube available. Run the conversion first with --convert.[/yellow]")
+            return
+        
+        table = Table(title=f"Quantity Takeoff: {quantity}")
+        table.add_column("Element Type", style="cyan")
+        table.add_column("Quantity", style="green")
+        if by is not None:
+            table.add_column(by.capitalize(), style="blue")
+        for column in ["Sum", "Count", "Min", "Max", "Unit"]:
+            table.add_column(column, style="yellow")
+        
+        rows = 0
+        for elem_type in cube.element_types:
+            if element_type is not None and element_type.lower() not in elem_type.lower():
+                continue
+            for key in cube.find_quantities(elem_type, quantity):
+                name = f"{key[1]}.{key[2]}" if key[1] else key[2]
+                groups = cube.breakdown(key, by) if by is not None else {None: cube.lookup(key)}
+                for value, measures in groups.items():
+                    cells = [elem_type, name] + ([value or "(none)"] if by is not None else [])
+                    table.add_row(*cells, f"{measures['sum']:,.3f}", str(measures["count"]),
+                                  f"{measures['min']:,.3f}", f"{measures['max']:,.3f}", measures["unit"])
+                    rows += 1
+        
+        if rows:
+            console.print(table)
+        else:
+            console.print(f"[yellow]No quantity named '{quantity}' found.[/yellow]")
+    
+    def display_spatial_matches(self, spatial: Dict[str, Any]):
+        """Display the elements matching a spatial query (see BIMQueryEngine.spatial_filter)"""
+        index = load_spatial_index(self.spatial_index_path)
+        if index is None:
+            console.print("[yellow]No spatial index available. Run --convert on exports with Geometry.Global X/Y/Z columns.[/yellow]")
+            return
+        
+        elements = index.search(**spatial)
+        table = Table(title="Elements Found by Location")
+        table.add_column("Element Type", style="cyan")
+        table.add_column("Element", style="green")
+        table.add_column("Box Min (x, y, z)", style="yellow")
+        table.add_column("Box Max (x, y, z)", style="yellow")
+        for element in index.describe(elements[:MAX_LISTED_ELEMENTS]):
+            table.add_row(element["element_type"], element["id"],
+                          ", ".join(f"{v:g}" for v in element["lower"]), ", ".join(f"{v:g}" for v in element["upper"]))
+        
+        if len(elements):
+            console.print(table)
+        if len(elements) > MAX_LISTED_ELEMENTS:
+            console.print(f"[blue]... and {len(elements) - MAX_LISTED_ELEMENTS} more[/blue]")
+        console.print(f"[bold]{len(elements)} elements found[/bold]")
+    
     def display_wall_parameter_summary(self):
         """Display a summary of wall parameters from the analysis results"""
         self.display_element_parameter_summary("wall")
@@ -455,11 +1344,11 @@ class GeminiRAGSystem:
     
     def display_analysis_summary(self):
         """Display a summary of all parameters from the analysis results"""
-        if not self.analysis_results or 'comparison' not in self.analysis_results:
+        if not self.analysis_store.has_comparison():
             console.print("[yellow]No analysis results available.[/yellow]")
             return
         
-        missing_params = self.analysis_results['comparison'].get('missing_parameters', {})
+        missing_params = self.analysis_store.missing_parameters() or {}
         
         if not missing_params:
             console.print("[green]No missing parameters found in the analysis.[/green]")
@@ -488,6 +1377,31 @@ class GeminiRAGSystem:
         # Ask if the user wants to see details for specific element types
         console.print("\n[bold cyan]Type 'wall parameters', 'door parameters', 'window parameters', or 'slab parameters' for detailed view[/bold cyan]")
     
+    def display_cache_stats(self):
+        """Display hit ratios of the query caches"""
+        engine = self.query_engine
+        table = Table(title="Query Cache Statistics")
+        table.add_column("Cache", style="cyan")
+        table.add_column("Hits", style="green")
+        table.add_column("Misses", style="yellow")
+        table.add_column("Hit Ratio", style="blue")
+        
+        for name, stats in [
+            ("Query embeddings", engine.embedding_cache.stats),
+            ("Retrieval results", engine.result_cache.result_stats),
+            ("Answers", engine.result_cache.answer_stats),
+            ("Similar answers", self.semantic_cache.stats),
+        ]:
+            table.add_row(name, str(stats.hits), str(stats.misses), f"{stats.hit_ratio * 100:.1f}%")
+        
+        console.print(table)
+        
+        reranker = engine.reranker
+        if reranker is not None:
+            console.print(f"Reranked queries: {reranker.queries}, "
+                          f"fell back to vector order: {reranker.fallbacks}, "
+                          f"average rerank time: {reranker.average_latency * 1000:.1f} ms")
+    
     def interactive_mode(self):
         """Run an interactive session where the user can ask questions"""
         console.print(Panel.fit(
@@ -501,9 +1415,13 @@ class GeminiRAGSystem:
             "- 'door parameters': Show missing door parameters\n"
             "- 'window parameters': Show missing window parameters\n"
             "- 'slab parameters': Show missing slab parameters\n"
-            "- 'analysis summary': Show overall analysis summary"
+            "- 'analysis summary': Show overall analysis summary\n"
+            "- 'cache stats': Show query cache hit ratios"
         ))
         
+        # Connect to the collection before the first question so problems show up early
+        self.query_engine
+        
         while True:
             query = console.input("\n[bold yellow]Ask a question:[/bold yellow] ")
             
@@ -545,16 +1463,14 @@ class GeminiRAGSystem:
             if query.lower() in ["analysis summary", "summary"]:
                 self.display_analysis_summary()
                 continue
+            
+            if query.lower() in ["cache stats", "cache"]:
+                self.display_cache_stats()
+                continue
                 
             try:
-                result = self.answer_question(query)
-                
-                # Print the response
-                console.print(Panel(
-                    result["response"],
-                    title="[bold green]Answer[/bold green]",
-                    expand=False
-                ))
+                # Stream the response into the answer panel
+                result = self.answer_question_streaming(query)
                 
                 # Ask if user wants to see sources (if there are any)
                 if result["sources"]:
@@ -572,10 +1488,90 @@ class GeminiRAGSystem:
                 console.print(f"[bold red]Error:[/bold red] {str(e)}")
 
 
+class RAGSession:
+    """Per-user state on top of a shared GeminiRAGSystem
+    
+    Holds the user's retrieval settings and question history; everything else
+    (models, collections, caches, analysis results) is shared.
+    """
+    
+    def __init__(self, rag: GeminiRAGSystem, session_id: Optional[str] = None, n_results: int = 5, max_history: int = 50):
+        """Initialize an empty session"""
+        self.rag = rag
+        self.session_id = session_id or uuid.uuid4().hex
+        self.n_results = n_results
+        self.max_history = max_history
+        self.history = []
+        self._lock = threading.Lock()
+    
+    def ask(self, query: str, n_results: Optional[int] = None) -> Dict[str, Any]:
+        """Answer a question and record it in the session history"""
+        result = self.rag.answer_question(query, n_results or self.n_results)
+        with self._lock:
+            self.history.append({"query": query, "response": result["response"], "time": time.time()})
+            del self.history[:-self.max_history]
+        return result
+
+
+def load_questions(questions_file: str) -> List[str]:
+    """Load questions from a JSONL file (one object or string per line) or a text file (one per line)"""
+    questions = []
+    with open(questions_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if not questions_file.endswith(".jsonl"):
+                questions.append(line)
+                continue
+            
+            record = json.loads(line)
+            if isinstance(record, str):
+                questions.append(record)
+            else:
+                question = record.get("question") or record.get("query") or record.get("text")
+                if question:
+                    questions.append(question)
+                else:
+                    console.print(f"[yellow]Skipping line without a question: {line[:80]}[/yellow]")
+    return questions
+
+
+def run_batch(rag: "GeminiRAGSystem", questions_file: str, output_file: str, max_concurrency: int = 4) -> None:
+    """Answer every question in a file and write the results as JSONL"""
+    questions = load_questions(questions_file)
+    console.print(Panel.fit(f"[bold cyan]Answering {len(questions)} questions from {questions_file}[/bold cyan]"))
+    
+    start = time.perf_counter()
+    results = rag.answer_questions(questions, max_concurrency=max_concurrency)
+    elapsed = time.perf_counter() - start
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for result in results:
+            record = {
+                "question": result["query"],
+                "response": result["response"],
+                "sources": [{"id": doc["id"], "score": doc["score"]} for doc in result["sources"]],
+                "timings": result["timings"]
+            }
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    
+    console.print(f"[green]Wrote {len(results)} answers to {output_file} in {elapsed:.1f}s[/green]")
+
+
+def parse_coordinates(text: str, count: int) -> List[Optional[float]]:
+    """Parse "x,y,z" style coordinates (an empty value leaves that axis unbounded)"""
+    values = [float(v) if v.strip() else None for v in text.split(",")]
+    if len(values) != count:
+        raise argparse.ArgumentTypeError(f"expected {count} comma-separated values, got '{text}'")
+    return values
+
+
 def main():
     """Main function to run the Excel to ChromaDB conversion and RAG system"""
     parser = argparse.ArgumentParser(description="Convert Excel files to ChromaDB and query the data")
     parser.add_argument("--convert", action="store_true", help="Convert Excel files to ChromaDB")
+    parser.add_argument("--shard-by-type", action="store_true", help="With --convert, create one collection per element type")
     parser.add_argument("--query", action="store_true", help="Query the ChromaDB collection")
     parser.add_argument("--analyze", action="store_true", help="Run IFC data analysis")
     parser.add_argument("--compare", type=str, help="Compare IFC data with expected schema file")
@@ -583,13 +1579,59 @@ def main():
     parser.add_argument("--door-params", action="store_true", help="Display missing door parameters")
     parser.add_argument("--window-params", action="store_true", help="Display missing window parameters")
     parser.add_argument("--slab-params", action="store_true", help="Display missing slab parameters")
+    parser.add_argument("--missing-param", type=str, metavar="PARAM",
+                        help="List the elements without a value for a required parameter (from the last --compare)")
+    parser.add_argument("--missing-at-least", type=int, metavar="N",
+                        help="List the elements missing at least N required parameters (from the last --compare)")
+    parser.add_argument("--element-type", type=str,
+                        help="Restrict --missing-param, --missing-at-least, --takeoff and --near/--box/--elevation to one element type")
+    parser.add_argument("--takeoff", type=str, metavar="QUANTITY",
+                        help="Display precomputed totals of a quantity (e.g. 'Area', 'NetVolume') from the converted exports")
+    parser.add_argument("--by", choices=["storey", "material"], help="Break --takeoff totals down per storey or material")
+    parser.add_argument("--near", type=lambda text: parse_coordinates(text, 3), metavar="X,Y,Z",
+                        help="List elements within --radius of a point (model units)")
+    parser.add_argument("--radius", type=float, default=0.0, help="Distance for --near (default: 0)")
+    parser.add_argument("--box", type=lambda text: parse_coordinates(text, 6), metavar="X0,Y0,Z0,X1,Y1,Z1",
+                        help="List elements intersecting a region (leave a value empty for an unbounded side)")
+    parser.add_argument("--elevation", type=float, metavar="Z", help="List elements spanning an elevation")
     parser.add_argument("--data-folder", type=str, default="data", help="Folder containing Excel files (default: data)")
     parser.add_argument("--output", type=str, default="ifc_analysis_report.html", help="Output file for analysis report")
+    parser.add_argument("--batch", type=str, help="Answer all questions in a JSONL (or text) file")
+    parser.add_argument("--batch-output", type=str, default="batch_results.jsonl", help="Output JSONL file for --batch (default: batch_results.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum concurrent LLM calls for --batch (default: 4)")
+    parser.add_argument("--rerank", action="store_true", help="Rerank retrieved documents with a local cross-encoder")
+    parser.add_argument("--rerank-candidates", type=int, default=20, help="Documents fetched for reranking (default: 20)")
+    parser.add_argument("--rerank-budget", type=float, default=0.5,
+                        help="Maximum rerank time per query in seconds before falling back to vector order (default: 0.5)")
+    parser.add_argument("--context-tokens", type=int, default=1500, help="Token budget for retrieved context in the prompt (default: 1500)")
+    parser.add_argument("--serve", action="store_true", help="Keep the RAG system loaded and serve queries over a local HTTP JSON API")
+    parser.add_argument("--host", type=str, default=rag_server.DEFAULT_HOST, help=f"Host for --serve (default: {rag_server.DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=rag_server.DEFAULT_PORT, help=f"Port for --serve (default: {rag_server.DEFAULT_PORT})")
+    parser.add_argument("--stub-llm", action="store_true", help="Use a local stub instead of Gemini (for testing and benchmarks)")
+    parser.add_argument("--backend", choices=BACKENDS, default="chroma",
+                        help="Vector store: ChromaDB, or in-process exact search over a memory-mapped NumPy matrix (default: chroma)")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32",
+                        help="With --convert --backend numpy, store embeddings as float32, float16 or int8 (default: float32)")
+    parser.add_argument("--rescore-candidates", type=int, default=0,
+                        help="On a quantized index, re-score this many candidates with float32 vectors (default: 0, off)")
+    parser.add_argument("--export-index", type=str, metavar="FILE",
+                        help="Write the converted collection to a portable, checksummed snapshot file")
+    parser.add_argument("--import-index", type=str, metavar="FILE",
+                        help="Load a snapshot written by --export-index instead of running --convert")
+    parser.add_argument("--watch", action="store_true",
+                        help="Reindex changed rows whenever export files in the data folder change; without "
+                             "--query or --serve, keeps watching in the foreground until Ctrl+C")
+    parser.add_argument("--watch-interval", type=float, default=2.0,
+                        help="Seconds between checks of the data folder, and quiet time before a changed file is read (default: 2)")
+    parser.add_argument("--semantic-threshold", type=float, default=0.9,
+                        help="Cosine similarity above which a cached answer to a similar question is reused (default: 0.9, >1 disables)")
     args = parser.parse_args()
     
     # Default to query mode if no arguments specified
     if not (args.convert or args.query or args.analyze or args.compare or args.wall_params or 
-            args.door_params or args.window_params or args.slab_params):
+            args.door_params or args.window_params or args.slab_params or args.batch or args.serve or
+            args.export_index or args.import_index or args.missing_param or args.missing_at_least is not None or
+            args.takeoff or args.near or args.box or args.elevation is not None):
         args.query = True
     
     # Excel files to process - stored in the data folder
@@ -620,22 +1662,48 @@ def main():
                 return
         
         console.print(Panel.fit("[bold cyan]Step 1: Converting Excel files to ChromaDB[/bold cyan]"))
-        converter = ExcelToChromaConverter(persist_directory)
+        converter = ExcelToChromaConverter(persist_directory, backend=args.backend, precision=args.precision)
         
         # Only process files that exist
         existing_files = [f for f in excel_files if os.path.exists(f)]
         if existing_files:
-            converter.process_excel_files(existing_files, collection_name)
+            converter.process_excel_files(existing_files, collection_name, shard_by_type=args.shard_by_type)
         else:
             console.print("[red]No valid Excel files to process.[/red]")
             return
     
+    if args.import_index or args.export_index:
+        try:
+            backend = open_backend(args.backend, persist_directory, precision=args.precision)
+            fingerprint = model_fingerprint(get_embedding_function(), EMBEDDING_MODEL)
+            if args.import_index:
+                console.print(Panel.fit(f"[bold cyan]Importing index snapshot {args.import_index}[/bold cyan]"))
+                import_snapshot(backend, persist_directory, args.import_index, fingerprint)
+            if args.export_index:
+                console.print(Panel.fit(f"[bold cyan]Exporting index snapshot to {args.export_index}[/bold cyan]"))
+                export_snapshot(backend, persist_directory, collection_name, args.export_index, fingerprint)
+        except Exception as e:
+            console.print(f"[red]Error: {e}[/red]")
+            return
+    
     # Create RAG instance for analyze, parameter checks or query operations
     if (args.analyze or args.compare or args.wall_params or args.door_params or 
-            args.window_params or args.slab_params or args.query):
+            args.window_params or args.slab_params or args.query or args.batch or args.serve or
+            args.missing_param or args.missing_at_least is not None or args.takeoff or
+            args.near or args.box or args.elevation is not None or args.watch):
         try:
             # Initialize the RAG system
-            rag = GeminiRAGSystem(collection_name, persist_directory)
+            rag = GeminiRAGSystem(
+                collection_name,
+                persist_directory,
+                semantic_threshold=args.semantic_threshold,
+                llm=StubLLMClient() if args.stub_llm else None,
+                reranker=CrossEncoderReranker(time_budget=args.rerank_budget) if args.rerank else None,
+                rerank_candidates=args.rerank_candidates,
+                context_tokens=args.context_tokens,
+                backend=args.backend,
+                rescore_candidates=args.rescore_candidates
+            )
             
             if args.analyze:
                 rag.run_ifc_analysis(data_folder=args.data_folder, output_file=args.output)
@@ -658,9 +1726,57 @@ def main():
                 
             if args.slab_params:
                 rag.display_slab_parameter_summary()
+            
+            if args.missing_param or args.missing_at_least is not None:
+                rag.display_element_violations(args.missing_param, args.element_type, args.missing_at_least)
+            
+            if args.takeoff:
+                rag.display_quantity_takeoff(args.takeoff, args.element_type, args.by)
+            
+            if args.near or args.box or args.elevation is not None:
+                element_types = [t for t in ELEMENT_TYPE_KEYWORDS if args.element_type.lower() in t] if args.element_type else None
+                rag.display_spatial_matches({
+                    "near": args.near, "radius": args.radius,
+                    "box": [args.box[:3], args.box[3:]] if args.box else None,
+                    "elevation": args.elevation, "element_types": element_types
+                })
+            
+            watcher = None
+            if args.watch:
+                def refresh_analysis():
+                    from excel_loader import load_excel_files
+                    frames = load_excel_files([f for f in excel_files if os.path.exists(f)])
+                    write_quantity_cube(frames, rag.quantity_cube_path)
+                    write_spatial_index(frames, rag.spatial_index_path)
+                    # Only keep analysis results fresh if there are any to refresh
+                    if rag.analysis_store.has_results():
+                        rag.run_ifc_analysis(data_folder=args.data_folder, expected_schema_file=args.compare,
+                                             output_file=args.output)
+                
+                watcher = IndexWatcher(
+                    rag.query_engine,
+                    # A file that cannot be read must not look like an empty one
+                    lambda excel_file: ExcelToChromaConverter.prepare_documents_from_excel(excel_file, raise_errors=True),
+                    excel_files,
+                    interval=args.watch_interval,
+                    debounce=args.watch_interval,
+                    on_change=refresh_analysis
+                )
+                watcher.start()
+            
+            if args.batch:
+                run_batch(rag, args.batch, args.batch_output, args.concurrency)
+            
+            if args.serve:
+                rag_server.serve(rag, args.host, args.port)
                 
             if args.query:
                 rag.interactive_mode()
+            
+            if watcher is not None and not (args.serve or args.query):
+                # No foreground loop keeps the process alive: watch until Ctrl+C
+                console.print("[blue]Press Ctrl+C to stop watching[/blue]")
+                watcher.wait()
                 
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
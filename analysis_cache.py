@@ -0,0 +1,91 @@
+import os
+import json
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+# Folder (inside the data folder) holding the per-element-type analysis results
+CACHE_FOLDER = ".analysis_cache"
+
+# Version of the cached results; bump when the analysis output changes
+CACHE_FORMAT = 1
+
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """Identify a version of a file by its path, size and modification time"""
+    stat = os.stat(path)
+    return {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def cache_key(*parts: Any) -> str:
+    """Key of a cached result from everything it depends on (JSON-serializable parts)"""
+    return hashlib.sha1(json.dumps([CACHE_FORMAT, *parts], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Analysis results per element type, reused while their inputs are unchanged
+
+    Each element type has a schema entry (column statistics and completeness,
+    keyed by the fingerprint of its export file and the analysis options) and a
+    presence entry (which elements have which required parameters, keyed by
+    the file fingerprint and that type's part of the expected schema). An entry
+    whose key differs is treated as missing and overwritten on the next put.
+    """
+
+    def __init__(self, folder: str):
+        """Initialize the cache in folder (created on first write)"""
+        self.folder = folder
+
+    def _path(self, element_type: str, suffix: str) -> str:
+        return os.path.join(self.folder, f"{element_type}.{suffix}")
+
+    def _replace(self, path: str, write) -> None:
+        os.makedirs(self.folder, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            console.print(f"[yellow]Could not cache analysis results in {path}: {e}[/yellow]")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_schema(self, element_type: str, key: str) -> Optional[Dict[str, Any]]:
+        """Cached schema of an element type, or None if missing or stale"""
+        try:
+            with open(self._path(element_type, "schema.json"), 'r') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry["schema"] if entry.get("key") == key else None
+
+    def put_schema(self, element_type: str, key: str, schema: Dict[str, Any]) -> None:
+        data = json.dumps({"key": key, "schema": schema}).encode("utf-8")
+        self._replace(self._path(element_type, "schema.json"), lambda f: f.write(data))
+
+    def get_presence(self, element_type: str, key: str) -> Optional[Tuple[np.ndarray, np.ndarray, List[str]]]:
+        """Cached (element ids, presence matrix, required parameters), or None if missing or stale"""
+        try:
+            with np.load(self._path(element_type, "presence.npz"), allow_pickle=False) as entry:
+                if str(entry["key"]) != key:
+                    return None
+                parameters = entry["parameters"].tolist()
+                matrix = np.unpackbits(entry["bits"], axis=1, count=len(parameters)).astype(bool)
+                return entry["ids"], matrix, parameters
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def put_presence(self, element_type: str, key: str, ids: np.ndarray, matrix: np.ndarray, parameters: List[str]) -> None:
+        arrays = {
+            "key": np.array(key),
+            "ids": np.asarray(ids, dtype=str),
+            "parameters": np.asarray(parameters, dtype=str),
+            "bits": np.packbits(matrix, axis=1)
+        }
+        self._replace(self._path(element_type, "presence.npz"), lambda f: np.savez(f, **arrays))
@@ -0,0 +1,182 @@
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+# Tables of the analysis results database
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS schemas (element_type TEXT PRIMARY KEY, position INTEGER NOT NULL, data BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS comparison (
+    section TEXT NOT NULL, element_type TEXT NOT NULL, position INTEGER NOT NULL, data TEXT NOT NULL,
+    PRIMARY KEY (section, element_type)
+);
+"""
+
+# Meta entry listing the top-level keys of the saved results (in order)
+RESULT_KEYS = "__keys__"
+
+# element_type of a comparison section that is not split by element type
+WHOLE_SECTION = ""
+
+
+class AnalysisResultStore:
+    """Thread- and process-safe store for the analysis results shared by all sessions
+
+    Results live in an SQLite database instead of one JSON document, so nothing
+    is parsed up front: every element type's schema is a separate compressed
+    row, read only when asked for, and each comparison section (e.g. missing
+    parameters) has one row per element type, found by primary key. save()
+    replaces everything in a single transaction and readers use snapshot
+    transactions, so neither other threads nor other processes ever see a
+    half-written result. Results of the previous JSON format (at the same path
+    with a .json extension) are imported on first use.
+    """
+
+    def __init__(self, path: str = "analysis_results.db"):
+        """Initialize the store, using previous results at path if present"""
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+        self.load()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection to the database"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _snapshot(self):
+        """Read transaction: all queries inside see the same saved results"""
+        connection = self._connection()
+        connection.execute("BEGIN")
+        try:
+            yield connection
+        finally:
+            connection.execute("COMMIT")
+
+    def load(self) -> bool:
+        """Import results of the previous JSON format if there are no results yet; return whether there are any"""
+        legacy_path = os.path.splitext(self.path)[0] + ".json"
+        if not self.has_results() and legacy_path != self.path and os.path.exists(legacy_path):
+            try:
+                with open(legacy_path, 'r') as f:
+                    self.save(json.load(f))
+                console.print(f"[green]Imported previous analysis results from {legacy_path}[/green]")
+            except Exception as e:
+                console.print(f"[yellow]Could not load previous analysis results: {e}[/yellow]")
+                return False
+
+        if not self.has_results():
+            return False
+        console.print(f"[green]Loaded previous analysis results from {self.path}[/green]")
+        return True
+
+    def _keys(self, connection: sqlite3.Connection) -> Optional[List[str]]:
+        row = connection.execute("SELECT value FROM meta WHERE key = ?", (RESULT_KEYS,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has_results(self) -> bool:
+        """Whether any results have been saved"""
+        return self._keys(self._connection()) is not None
+
+    def has_comparison(self) -> bool:
+        """Whether the saved results include a schema comparison"""
+        return "comparison" in (self._keys(self._connection()) or [])
+
+    def element_types(self) -> List[str]:
+        """Element types with a stored schema"""
+        return [row[0] for row in self._connection().execute("SELECT element_type FROM schemas ORDER BY position")]
+
+    def schema(self, element_type: str) -> Optional[Dict[str, Any]]:
+        """Schema of one element type (column statistics and completeness), or None"""
+        row = self._connection().execute("SELECT data FROM schemas WHERE element_type = ?", (element_type,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def comparison(self, section: str, element_type: Optional[str] = None) -> Any:
+        """A section of the schema comparison (e.g. "missing_parameters"): for one element type, or all"""
+        connection = self._connection()
+        if element_type is not None:
+            row = connection.execute(
+                "SELECT data FROM comparison WHERE section = ? AND element_type = ?", (section, element_type)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        rows = connection.execute(
+            "SELECT element_type, data FROM comparison WHERE section = ? ORDER BY position", (section,)
+        ).fetchall()
+        if len(rows) == 1 and rows[0][0] == WHOLE_SECTION:
+            return json.loads(rows[0][1])
+        return {elem_type: json.loads(data) for elem_type, data in rows}
+
+    def missing_parameters(self, element_type: Optional[str] = None) -> Any:
+        """Missing parameters of one element type (a list, None if unknown), or of all ({type: list})"""
+        return self.comparison("missing_parameters", element_type)
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Return all current results as one dictionary (reads everything; prefer the accessors)"""
+        with self._snapshot() as connection:
+            keys = self._keys(connection)
+            if keys is None:
+                return None
+            results = {key: json.loads(value) for key, value in connection.execute(
+                "SELECT key, value FROM meta WHERE key != ?", (RESULT_KEYS,))}
+            if "schemas" in keys:
+                results["schemas"] = {
+                    element_type: json.loads(zlib.decompress(data))
+                    for element_type, data in connection.execute("SELECT element_type, data FROM schemas ORDER BY position")
+                }
+            if "comparison" in keys:
+                comparison = {}
+                for section, element_type, data in connection.execute(
+                        "SELECT section, element_type, data FROM comparison ORDER BY position"):
+                    if element_type == WHOLE_SECTION:
+                        comparison[section] = json.loads(data)
+                    else:
+                        comparison.setdefault(section, {})[element_type] = json.loads(data)
+                results["comparison"] = comparison
+            return {key: results[key] for key in keys if key in results}
+
+    def save(self, results: Dict[str, Any]) -> None:
+        """Replace the results (in one transaction)"""
+        schema_rows = [
+            (element_type, position, zlib.compress(json.dumps(schema, separators=(",", ":")).encode("utf-8")))
+            for position, (element_type, schema) in enumerate((results.get("schemas") or {}).items())
+        ]
+        comparison_rows = []
+        for section, value in (results.get("comparison") or {}).items():
+            # Empty or non-dictionary sections are kept whole
+            items = value.items() if isinstance(value, dict) and value else [(WHOLE_SECTION, value)]
+            for element_type, data in items:
+                comparison_rows.append((section, element_type, len(comparison_rows), json.dumps(data, separators=(",", ":"))))
+        meta_rows = [(RESULT_KEYS, json.dumps(list(results)))] + [
+            (key, json.dumps(value)) for key, value in results.items() if key not in ("schemas", "comparison")
+        ]
+
+        with self._write_lock:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table in ["meta", "schemas", "comparison"]:
+                    connection.execute(f"DELETE FROM {table}")
+                connection.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", meta_rows)
+                connection.executemany("INSERT INTO schemas (element_type, position, data) VALUES (?, ?, ?)", schema_rows)
+                connection.executemany(
+                    "INSERT INTO comparison (section, element_type, position, data) VALUES (?, ?, ?, ?)", comparison_rows
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
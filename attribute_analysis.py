@@ -0,0 +1,186 @@
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+
+from context_builder import ID_COLUMNS
+from column_stats import distinct_counter, hash_values
+
+# Columns of a long-format export describing one property/quantity row
+LONG_FORMAT_COLUMNS = ["Data Type", "Set Name", "Attribute Name", "Value", "Unit"]
+
+# Strings treated like missing values
+EMPTY_VALUES = ["", " "]
+
+
+def filled_mask(series: pd.Series) -> pd.Series:
+    """True where a cell holds a value (not NaN and not an empty string)"""
+    mask = series.notna()
+    if series.dtype == object:
+        mask &= ~series.isin(EMPTY_VALUES)
+    return mask
+
+
+def element_ids(df: pd.DataFrame) -> pd.Series:
+    """Identifier of the element each row belongs to (GlobalId, GUID or Tag)
+
+    Rows without an identifier count as elements of their own.
+    """
+    id_column = next((column for column in ID_COLUMNS if column in df.columns), None)
+    if id_column is None:
+        return pd.Series("row:" + df.index.astype(str), index=df.index)
+    ids = df[id_column]
+    missing = ~filled_mask(ids)
+    if missing.any():
+        ids = ids.astype(object).copy()
+        ids[missing] = "row:" + df.index[missing].astype(str)
+    return ids
+
+
+def attribute_completeness(df: pd.DataFrame, ids: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Per-parameter completeness over the elements of one export
+
+    Parameters are the base columns (e.g. OverallHeight) and the values of the
+    Attribute Name column (e.g. FireRating). An element fills a parameter if any
+    of its rows holds a value for it.
+
+    Element ids and attribute names are factorized to integer codes once, so
+    attribute rows reduce to unique (attribute, element) pairs counted with
+    bincount, and base columns to one groupby over the element code; no step
+    loops over rows or attributes in Python.
+
+    Returns a frame indexed by parameter with the columns present (elements
+    having the parameter at all), filled (elements having a value) and
+    fill_rate (filled / all elements, in percent).
+    """
+    if ids is None:
+        ids = element_ids(df)
+    id_codes, id_values = pd.factorize(ids)
+    elements = len(id_values)
+    parts = []
+
+    base_columns = [column for column in df.columns if column not in LONG_FORMAT_COLUMNS]
+    if base_columns and len(df):
+        filled = pd.DataFrame({column: filled_mask(df[column]).values for column in base_columns}).groupby(id_codes).any()
+        parts.append(pd.DataFrame({"present": elements, "filled": filled.sum()}))
+
+    if "Attribute Name" in df.columns and len(df):
+        has_name = filled_mask(df["Attribute Name"]).values
+        attribute_codes, attributes = pd.factorize(df["Attribute Name"].values[has_name])
+        # One integer per (attribute, element) pair
+        pairs = attribute_codes.astype(np.int64) * elements + id_codes[has_name]
+        has_value = filled_mask(df["Value"]).values[has_name] if "Value" in df.columns else np.zeros(len(pairs), dtype=bool)
+
+        present = np.bincount(pd.unique(pairs) // elements, minlength=len(attributes))
+        filled = np.bincount(pd.unique(pairs[has_value]) // elements, minlength=len(attributes))
+        names = pd.Index(attributes).astype(str).str.strip()
+        parts.append(pd.DataFrame({"present": present, "filled": filled}, index=names))
+
+    if not parts:
+        return pd.DataFrame(columns=["present", "filled", "fill_rate"])
+
+    # A name that is both a column and an attribute (or differs only by spaces) counts the better-filled one
+    result = pd.concat(parts).groupby(level=0).max().astype(int)
+    result["fill_rate"] = result["filled"] / elements * 100 if elements else 0.0
+    return result.sort_index()
+
+
+class CompletenessAccumulator:
+    """attribute_completeness() over a table read in chunks
+
+    Elements of an export may span chunks, so each parameter keeps the set of
+    element ids having it (and having a value for it) as 64-bit hashes;
+    chunks and accumulators merge by set union. With approximate the sets are
+    HyperLogLog sketches, which keeps memory constant (two sketches per
+    parameter) at the cost of about 1% error in the counts. Row numbers used as
+    ids of rows without one must be those of the whole table, not the chunk.
+    """
+
+    def __init__(self, approximate: bool = False, precision: int = 14):
+        """Initialize empty counts"""
+        self.approximate = approximate
+        self.precision = precision
+        self.elements = distinct_counter(approximate, precision)
+        self.base_filled = {}
+        self.attribute_present = {}
+        self.attribute_filled = {}
+
+    def _counter(self, counters: Dict[str, Any], name: str):
+        if name not in counters:
+            counters[name] = distinct_counter(self.approximate, self.precision)
+        return counters[name]
+
+    def update(self, df: pd.DataFrame) -> None:
+        """Add a chunk of rows"""
+        if not len(df):
+            return
+        hashes = hash_values(element_ids(df).astype(str))
+        self.elements.add_hashes(hashes)
+
+        for column in df.columns:
+            if column not in LONG_FORMAT_COLUMNS:
+                self._counter(self.base_filled, column).add_hashes(hashes[filled_mask(df[column]).values])
+
+        if "Attribute Name" in df.columns:
+            has_name = filled_mask(df["Attribute Name"]).values
+            attribute_codes, attributes = pd.factorize(df["Attribute Name"].values[has_name])
+            named_hashes = hashes[has_name]
+            has_value = filled_mask(df["Value"]).values[has_name] if "Value" in df.columns else np.zeros(len(named_hashes), dtype=bool)
+
+            # Group the rows by attribute with one sort instead of a mask per attribute
+            order = np.argsort(attribute_codes, kind="stable")
+            bounds = np.searchsorted(attribute_codes[order], np.arange(len(attributes) + 1))
+            for code, attribute in enumerate(attributes):
+                rows = order[bounds[code]:bounds[code + 1]]
+                name = str(attribute)
+                self._counter(self.attribute_present, name).add_hashes(named_hashes[rows])
+                self._counter(self.attribute_filled, name).add_hashes(named_hashes[rows[has_value[rows]]])
+
+    def merge(self, other: "CompletenessAccumulator") -> None:
+        """Add the counts of another part of the same table"""
+        if other.approximate != self.approximate:
+            raise ValueError("Cannot merge exact and approximate completeness")
+        self.elements.merge(other.elements)
+        for mine, theirs in [(self.base_filled, other.base_filled), (self.attribute_present, other.attribute_present),
+                             (self.attribute_filled, other.attribute_filled)]:
+            for name, counter in theirs.items():
+                self._counter(mine, name).merge(counter)
+
+    def element_count(self) -> int:
+        """Number of distinct elements seen"""
+        return self.elements.count()
+
+    def result(self) -> pd.DataFrame:
+        """Completeness in the layout of attribute_completeness()"""
+        elements = self.element_count()
+        parts = []
+        if self.base_filled:
+            filled = {column: counter.count() for column, counter in self.base_filled.items()}
+            parts.append(pd.DataFrame({"present": elements, "filled": pd.Series(filled, dtype=np.int64)}))
+        if self.attribute_present:
+            names = list(self.attribute_present)
+            parts.append(pd.DataFrame({
+                "present": [self.attribute_present[name].count() for name in names],
+                "filled": [self.attribute_filled[name].count() for name in names]
+            }, index=pd.Index(names).str.strip()))
+
+        if not parts:
+            return pd.DataFrame(columns=["present", "filled", "fill_rate"])
+
+        result = pd.concat(parts).groupby(level=0).max().astype(int)
+        if self.approximate:
+            # Estimates of a subset can come out slightly above those of the whole
+            result["present"] = result["present"].clip(upper=elements)
+            result["filled"] = result[["filled", "present"]].min(axis=1)
+        result["fill_rate"] = result["filled"] / elements * 100 if elements else 0.0
+        return result.sort_index()
+
+
+def completeness_to_dict(completeness: pd.DataFrame, elements: int) -> Dict[str, Any]:
+    """JSON-friendly form of attribute_completeness() for the analysis results"""
+    return {
+        "elements": elements,
+        "parameters": {
+            name: {"present": int(row["present"]), "filled": int(row["filled"]), "fill_rate": float(row["fill_rate"])}
+            for name, row in completeness.iterrows()
+        }
+    }
@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional
+import rich
+from rich.console import Console
+from rich.progress import Progress
+from rich.table import Table
+
+# Configure console for pretty printing
+console = Console()
+
+# Output formats by file extension
+OUTPUT_FORMATS = {".json": "json", ".parquet": "parquet"}
+
+
+def load_schema(schema_file: str) -> Dict[str, Any]:
+    """Read an expected schema file, checking that every element type lists its parameters"""
+    with open(schema_file, 'r') as f:
+        schema = json.load(f)
+    if not isinstance(schema, dict) or not all(isinstance(expected, dict) and "parameters" in expected for expected in schema.values()):
+        raise ValueError(f"{schema_file} is not an expected schema (element type -> {{'parameters': [...]}})")
+    return schema
+
+
+def _quiet_consoles() -> None:
+    """Silence the analyzer's console output and progress bars (in worker processes)"""
+    rich.get_console().quiet = True
+    for module in list(sys.modules.values()):
+        module_console = getattr(module, "console", None)
+        if isinstance(module_console, Console):
+            module_console.quiet = True
+
+
+def validate_model(data_folder: str, schema_files: List[str], approximate_distinct: Optional[bool] = None,
+                   chunk_rows: Optional[int] = None, use_cache: bool = True, quiet: bool = True) -> Dict[str, Any]:
+    """Analyze one model's export folder once and validate it against every schema file
+
+    Never prompts. Returns a JSON-friendly record with the model's element
+    types and, per schema file, the missing parameters, required parameters
+    with a low fill rate, the number of elements missing each required
+    parameter and whether the model passed. Failures are reported in the
+    record's "error" instead of being raised.
+    """
+    import ifc_analyzer
+
+    if quiet:
+        _quiet_consoles()
+    start = time.perf_counter()
+    record = {"model": data_folder, "error": None, "element_types": {}, "validations": {}}
+    try:
+        if not os.path.isdir(data_folder):
+            raise FileNotFoundError(f"Model folder not found: {data_folder}")
+        analyzer = ifc_analyzer.IFCDataAnalyzer(
+            data_folder, approximate_distinct=approximate_distinct, chunk_rows=chunk_rows,
+            use_cache=use_cache, interactive=False
+        )
+        # Models are already validated in parallel; parse each model's files in its own process
+        analyzer.load_workers = 1
+        schemas = analyzer.analyze()
+        if not schemas:
+            raise FileNotFoundError(f"No export files found in {data_folder}")
+        record["element_types"] = {
+            element_type: {"records": schema["record_count"], "elements": schema["element_count"]}
+            for element_type, schema in schemas.items()
+        }
+
+        for schema_file in schema_files:
+            expected_schema = load_schema(schema_file)
+            comparison = analyzer.compare_with_expected_schema(schema_file)
+            missing_types = sorted(set(expected_schema) - set(schemas))
+            missing_parameters = {t: sorted(params) for t, params in comparison["missing_parameters"].items() if params}
+            low_fill_required = {
+                t: {param: round(rate, 2) for param, rate in params}
+                for t, params in comparison["low_fill_required"].items()
+            }
+            record["validations"][schema_file] = {
+                "passed": not (missing_types or missing_parameters or low_fill_required),
+                "missing_element_types": missing_types,
+                "missing_parameters": missing_parameters,
+                "low_fill_required": low_fill_required,
+                "elements_missing_required": {
+                    t: {param: count for param, count in counts.items() if count}
+                    for t, counts in comparison.get("elements_missing_required", {}).items()
+                }
+            }
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def validate_models(data_folders: List[str], schema_files: List[str], max_workers: Optional[int] = None,
+                    **options) -> List[Dict[str, Any]]:
+    """Validate many model folders in a process pool; returns one record per folder, in the given order"""
+    workers = min(len(data_folders), max_workers or os.cpu_count() or 1)
+    records = {}
+    with Progress(console=console) as progress:
+        task = progress.add_task("[cyan]Validating models...", total=len(data_folders))
+        if workers <= 1:
+            for data_folder in data_folders:
+                records[data_folder] = validate_model(data_folder, schema_files, **options)
+                progress.update(task, advance=1)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(validate_model, data_folder, schema_files, **options): data_folder
+                    for data_folder in data_folders
+                }
+                for future in as_completed(futures):
+                    data_folder = futures[future]
+                    try:
+                        records[data_folder] = future.result()
+                    except Exception as e:
+                        # The worker process itself died (e.g. out of memory)
+                        records[data_folder] = {"model": data_folder, "error": f"{type(e).__name__}: {e}",
+                                                "element_types": {}, "validations": {}, "seconds": None}
+                    progress.update(task, advance=1)
+    return [records[data_folder] for data_folder in data_folders]
+
+
+def flatten_records(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One row per finding (model, schema, element type, check, parameter, value) for tabular output"""
+    rows = []
+    for record in records:
+        if record["error"]:
+            rows.append({"model": record["model"], "schema": None, "element_type": None,
+                         "check": "error", "parameter": None, "value": record["error"]})
+        for schema_file, validation in record["validations"].items():
+            def add(check, element_type=None, parameter=None, value=None):
+                rows.append({"model": record["model"], "schema": schema_file, "element_type": element_type,
+                             "check": check, "parameter": parameter, "value": None if value is None else str(value)})
+
+            add("passed", value=validation["passed"])
+            for element_type in validation["missing_element_types"]:
+                add("missing_element_type", element_type)
+            for element_type, params in validation["missing_parameters"].items():
+                for param in params:
+                    add("missing_parameter", element_type, param)
+            for element_type, rates in validation["low_fill_required"].items():
+                for param, rate in rates.items():
+                    add("low_fill_required", element_type, param, rate)
+            for element_type, counts in validation["elements_missing_required"].items():
+                for param, count in counts.items():
+                    add("elements_missing_required", element_type, param, count)
+    return rows
+
+
+def write_results(records: List[Dict[str, Any]], schema_files: List[str], output_file: str) -> Dict[str, Any]:
+    """Write the consolidated results as JSON (nested records) or Parquet (one row per finding)"""
+    validations = [v for record in records for v in record["validations"].values()]
+    summary = {
+        "models": len(records),
+        "errors": sum(1 for record in records if record["error"]),
+        "validations": len(validations),
+        "passed": sum(1 for v in validations if v["passed"]),
+        "failed": sum(1 for v in validations if not v["passed"])
+    }
+    output_format = OUTPUT_FORMATS[os.path.splitext(output_file)[1].lower()]
+    if output_format == "json":
+        with open(output_file, 'w') as f:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "schemas": schema_files,
+                "summary": summary,
+                "models": records
+            }, f, indent=2)
+    else:
+        import pandas as pd
+        columns = ["model", "schema", "element_type", "check", "parameter", "value"]
+        pd.DataFrame(flatten_records(records), columns=columns).to_parquet(output_file, index=False)
+    return summary
+
+
+def main():
+    """Validate many model export folders against one or more expected schemas"""
+    parser = argparse.ArgumentParser(description="Validate many IFC model exports against expected schemas, without prompts")
+    parser.add_argument("folders", nargs="*", help="Model export folders (each holding ifc_<type>_export.xlsx files)")
+    parser.add_argument("--folders-from", type=str, help="Text file listing model folders, one per line")
+    parser.add_argument("--schema", action="append", required=True, help="Expected schema JSON file (repeatable)")
+    parser.add_argument("--output", type=str, default="validation_results.json",
+                        help="Consolidated results, .json or .parquet (default: validation_results.json)")
+    parser.add_argument("--workers", type=int, help="Models validated in parallel (default: one per CPU)")
+    parser.add_argument("--chunk-rows", type=int, help="Analyze files in chunks of this many rows instead of loading them whole")
+    parser.add_argument("--approximate-distinct", action="store_true",
+                        help="Estimate distinct values with HyperLogLog sketches (default: only for tables over 1M rows)")
+    parser.add_argument("--no-cache", action="store_true", help="Analyze every file again instead of reusing cached results")
+    args = parser.parse_args()
+
+    folders = list(args.folders)
+    if args.folders_from:
+        with open(args.folders_from, 'r') as f:
+            folders += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    folders = list(dict.fromkeys(folders))
+    if not folders:
+        parser.error("no model folders given")
+
+    extension = os.path.splitext(args.output)[1].lower()
+    if extension not in OUTPUT_FORMATS:
+        parser.error(f"--output must end in {' or '.join(OUTPUT_FORMATS)}")
+    if OUTPUT_FORMATS[extension] == "parquet" and not (importlib.util.find_spec("pyarrow") or importlib.util.find_spec("fastparquet")):
+        parser.error("Parquet output needs pyarrow (pip install pyarrow)")
+
+    # Refuse broken schema files before spending hours on the models
+    for schema_file in args.schema:
+        try:
+            load_schema(schema_file)
+        except Exception as e:
+            parser.error(f"cannot use schema {schema_file}: {e}")
+
+    start = time.perf_counter()
+    records = validate_models(
+        folders, args.schema, args.workers,
+        approximate_distinct=args.approximate_distinct or None,
+        chunk_rows=args.chunk_rows,
+        use_cache=not args.no_cache
+    )
+    summary = write_results(records, args.schema, args.output)
+
+    table = Table(title="Schema Validation")
+    table.add_column("Model", style="cyan")
+    for schema_file in args.schema:
+        table.add_column(os.path.basename(schema_file), style="green")
+    for record in records:
+        if record["error"]:
+            table.add_row(record["model"], *[f"[red]{record['error']}[/red]"] * len(args.schema))
+        else:
+            table.add_row(record["model"], *[
+                "[green]passed[/green]" if record["validations"][schema_file]["passed"] else "[red]failed[/red]"
+                for schema_file in args.schema
+            ])
+    console.print(table)
+    console.print(
+        f"[bold]{summary['models']} models, {summary['passed']} passed / {summary['failed']} failed validations, "
+        f"{summary['errors']} errors in {time.perf_counter() - start:.1f}s; results written to {args.output}[/bold]"
+    )
+    sys.exit(1 if summary["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
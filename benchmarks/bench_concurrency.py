@@ -0,0 +1,142 @@
+"""Concurrent load test for the shared analysis-result store and multi-session querying
+
+Store test: reader threads (sharing the writer's store, or with a store of their
+own on the same database, as another process would) check that they only ever see
+complete, consistent results while a writer keeps replacing them.
+Session test (--sessions): threads with their own RAGSession ask questions through
+one shared GeminiRAGSystem (stub LLM) while analysis results are being replaced.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+
+from analysis_store import AnalysisResultStore
+
+console = Console()
+
+
+def make_results(version: int, size: int):
+    """Results whose every entry carries the same version, so torn reads are detectable"""
+    return {"version": version, "comparison": {"missing_parameters": {f"type{i}": [version] for i in range(size)}}}
+
+
+def is_consistent(results) -> bool:
+    version = results["version"]
+    return all(params == [version] for params in results["comparison"]["missing_parameters"].values())
+
+
+def run_store_test(store: AnalysisResultStore, threads: int, writes: int, size: int):
+    stop = threading.Event()
+    counts = {"shared_reads": 0, "separate_reads": 0, "errors": 0}
+    counts_lock = threading.Lock()
+
+    def reader(reader_store: AnalysisResultStore, count: str):
+        reads = errors = 0
+        while not stop.is_set():
+            reads += 1
+            if not is_consistent(reader_store.get()):
+                errors += 1
+        with counts_lock:
+            counts[count] += reads
+            counts["errors"] += errors
+
+    workers = [threading.Thread(target=reader, args=(store, "shared_reads")) for _ in range(threads)]
+    workers += [threading.Thread(target=reader, args=(AnalysisResultStore(store.path), "separate_reads"))
+                for _ in range(max(1, threads // 2))]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for version in range(1, writes + 1):
+        store.save(make_results(version, size))
+    stop.set()
+    for worker in workers:
+        worker.join()
+    counts["elapsed"] = time.perf_counter() - start
+    counts["writes"] = writes
+    return counts
+
+
+def run_session_test(store_path: str, threads: int, questions: int):
+    from RAG import GeminiRAGSystem
+    from llm_clients import StubLLMClient
+
+    rag = GeminiRAGSystem(llm=StubLLMClient(latency=0.05), semantic_threshold=1.1)
+    rag.analysis_store = AnalysisResultStore(store_path)
+    rag.query_engine  # Connect before timing
+    errors = []
+    sessions = [rag.create_session(f"user{i}") for i in range(threads)]
+
+    def user(session):
+        for q in range(questions):
+            try:
+                if q % 5 == 0:
+                    result = session.ask("What are the missing door parameters?")
+                else:
+                    result = session.ask(f"What is the fire rating of SD-0{q % 9}? ({session.session_id} {q})")
+                if not result["response"]:
+                    errors.append("empty response")
+            except Exception as e:
+                errors.append(str(e))
+
+    def writer():
+        for version in range(1, 21):
+            rag.analysis_store.save(make_results(version, 50))
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=user, args=(session,)) for session in sessions]
+    workers.append(threading.Thread(target=writer))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    history_ok = all(len(session.history) == questions for session in sessions)
+    return {"questions": threads * questions, "elapsed": elapsed, "errors": len(errors), "history_ok": history_ok}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for GeminiRAGSystem shared state")
+    parser.add_argument("--threads", type=int, default=8, help="Concurrent reader/user threads")
+    parser.add_argument("--writes", type=int, default=200, help="Analysis result replacements in the store test")
+    parser.add_argument("--size", type=int, default=200, help="Element types per analysis result")
+    parser.add_argument("--sessions", action="store_true", help="Also run the multi-session query test (needs a collection)")
+    parser.add_argument("--questions", type=int, default=10, help="Questions per session")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AnalysisResultStore(os.path.join(tmp, "analysis_results.db"))
+        store.save(make_results(0, args.size))
+        counts = run_store_test(store, args.threads, args.writes, args.size)
+
+        table = Table(title="Analysis result store under concurrent load")
+        table.add_column("Metric", style="cyan")
+        table.add_column("Value", style="green")
+        table.add_row("Writes", str(counts["writes"]))
+        table.add_row("Shared-store reads", str(counts["shared_reads"]))
+        table.add_row("Separate-store reads", str(counts["separate_reads"]))
+        table.add_row("Inconsistent reads", str(counts["errors"]))
+        table.add_row("Elapsed", f"{counts['elapsed']:.2f}s")
+        console.print(table)
+
+        if args.sessions:
+            result = run_session_test(os.path.join(tmp, "analysis_results.db"), args.threads, args.questions)
+            console.print(f"Sessions: {result['questions']} questions in {result['elapsed']:.2f}s "
+                          f"({result['questions'] / result['elapsed']:.1f}/s), errors: {result['errors']}, "
+                          f"histories complete: {result['history_ok']}")
+
+    if counts["errors"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
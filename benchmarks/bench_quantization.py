@@ -0,0 +1,105 @@
+"""Measure memory, recall@10 and latency of float16/int8 embeddings against float32
+
+The vectors come from an existing numpy-backend collection (--collection) or are
+synthetic clustered 384-dimensional vectors (--synthetic). Each precision is
+written to a temporary NumpyVectorStore and searched with the same queries;
+recall@k is the overlap with the exact float32 top k.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+
+from vector_store import NumpyVectorStore, PRECISIONS
+
+console = Console()
+
+
+def synthetic_vectors(count: int, dimension: int = 384, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Clustered random vectors, roughly as dense as sentence embeddings of similar rows"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, count)
+    return centers[labels] + 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+
+
+def evaluate(store: NumpyVectorStore, queries: np.ndarray, truth: np.ndarray, k: int) -> Dict[str, float]:
+    """Return recall@k against the float32 top k and mean latency per query in milliseconds"""
+    start = time.perf_counter()
+    results = store.query(queries.tolist(), k)
+    elapsed = time.perf_counter() - start
+    hits = sum(len(set(ids) & set(expected)) for ids, expected in zip(results["ids"], truth))
+    return {"recall": hits / truth.size, "latency_ms": elapsed / len(queries) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized embedding storage")
+    parser.add_argument("--collection", type=str, help="Directory of a numpy-backend collection (e.g. chroma_db/numpy/ifc_elements)")
+    parser.add_argument("--synthetic", type=int, default=100000, help="Number of synthetic vectors if --collection is not given")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Results per query (k in recall@k)")
+    parser.add_argument("--rescore-candidates", type=int, default=50, help="Candidates re-scored with float32 vectors")
+    args = parser.parse_args()
+
+    if args.collection:
+        vectors = NumpyVectorStore(args.collection).vectors()
+    else:
+        vectors = synthetic_vectors(args.synthetic)
+    console.print(f"[blue]{len(vectors)} vectors of dimension {vectors.shape[1]}[/blue]")
+
+    # Queries are perturbed documents, so every query has close neighbours
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)]
+    queries = queries + 0.3 * rng.standard_normal(queries.shape).astype(np.float32) * np.abs(queries).mean()
+    records = [{"id": str(i), "document": "", "metadata": {}} for i in range(len(vectors))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        stores = {}
+        for precision in PRECISIONS:
+            stores[precision] = NumpyVectorStore(os.path.join(directory, precision), precision=precision)
+            stores[precision].write(records, vectors)
+
+        truth = np.array(stores["float32"].query(queries.tolist(), args.k)["ids"])
+        baseline_bytes = stores["float32"].index_bytes()
+
+        table = Table(title=f"Quantized embeddings: recall@{args.k} against float32")
+        table.add_column("Precision", style="cyan")
+        table.add_column("Index size", style="magenta")
+        table.add_column("Saving", style="magenta")
+        table.add_column(f"Recall@{args.k}", style="green")
+        table.add_column("Latency (ms/query)", style="yellow")
+
+        for precision in PRECISIONS:
+            store = stores[precision]
+            configurations = [(precision, 0)]
+            if precision != "float32":
+                configurations.append((f"{precision} + rescore {args.rescore_candidates}", args.rescore_candidates))
+            for label, rescore_candidates in configurations:
+                store.rescore_candidates = rescore_candidates
+                result = evaluate(store, queries, truth, args.k)
+                size = store.index_bytes()
+                table.add_row(
+                    label,
+                    f"{size / 2**20:.1f} MiB",
+                    f"{1 - size / baseline_bytes:.0%}",
+                    f"{result['recall']:.3f}",
+                    f"{result['latency_ms']:.2f}"
+                )
+
+        for store in stores.values():
+            store.close()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Measure HTML report generation time and output size for large synthetic models
+
+Builds analysis results with many parameters per element type (as federated
+models with thousands of property sets produce) and times
+IFCDataAnalyzer.export_analysis_report. Pass --baseline-dir with another
+checkout (e.g. `git worktree add ../baseline <commit>`) to compare against it.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fills an analyzer with synthetic results, writes the report and prints time, peak memory and file sizes
+RUNNER = """
+import os, sys, time, json, tracemalloc
+import numpy as np, pandas as pd
+sys.path.insert(0, os.getcwd())
+import ifc_analyzer
+ifc_analyzer.console.quiet = True
+types, params, output = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3]
+rng = np.random.default_rng(0)
+analyzer = ifc_analyzer.IFCDataAnalyzer("data")
+for t in range(types):
+    names = [f"Pset_Common_{i:06d}.Parameter" for i in range(params)]
+    nulls = rng.integers(0, 10000, params)
+    analyzer.schemas[f"type{t}"] = {
+        "record_count": 10000, "columns": names, "element_count": 1000,
+        "data_types": dict.fromkeys(names, "object"),
+        "null_counts": dict(zip(names, nulls.tolist())),
+        "null_percentages": dict(zip(names, (nulls / 100).tolist())),
+        "unique_values": dict(zip(names, rng.integers(0, 1000, params).tolist())),
+    }
+    filled = rng.integers(0, 1000, params)
+    analyzer.completeness[f"type{t}"] = pd.DataFrame(
+        {"present": 1000, "filled": filled, "fill_rate": filled / 10}, index=names)
+start = time.perf_counter()
+analyzer.export_analysis_report(output)
+elapsed = time.perf_counter() - start
+# Peak memory from a second, traced run (tracing slows the run down)
+tracemalloc.start()
+analyzer.export_analysis_report(output)
+peak = tracemalloc.get_traced_memory()[1]
+files = [output]
+folder = os.path.splitext(output)[0] + "_files"
+if os.path.isdir(folder):
+    files += [os.path.join(folder, name) for name in os.listdir(folder)]
+sizes = [os.path.getsize(f) for f in files]
+print("@@" + json.dumps({"elapsed": elapsed, "peak": peak, "files": len(files), "total": sum(sizes),
+                        "index": sizes[0], "largest": max(sizes)}))
+"""
+
+
+def measure(repo_dir: str, types: int, params: int, output: str):
+    """Run the report generation of a checkout in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER, str(types), str(params), os.path.abspath(output)],
+        cwd=repo_dir, capture_output=True, text=True
+    )
+    if "@@" not in result.stdout:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.rsplit("@@", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTML analysis report generation")
+    parser.add_argument("--types", type=int, default=6, help="Element types (default: 6)")
+    parser.add_argument("--params", type=str, default="100,2000,20000",
+                        help="Comma-separated parameters per element type to measure (default: 100,2000,20000)")
+    parser.add_argument("--output-dir", type=str, default="bench_reports", help="Folder for the generated reports")
+    parser.add_argument("--baseline-dir", type=str, help="Another checkout of the repository to compare against")
+    args = parser.parse_args()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    table = Table(title=f"Analysis report generation ({args.types} element types)")
+    table.add_column("Version", style="cyan")
+    table.add_column("Parameters / type", style="cyan")
+    table.add_column("Time (s)", style="green")
+    table.add_column("Peak memory (MB)", style="yellow")
+    table.add_column("Files", style="blue")
+    table.add_column("Total (MB)", style="blue")
+    table.add_column("Index page (MB)", style="blue")
+    table.add_column("Largest page (MB)", style="blue")
+
+    versions = [("current", REPO_ROOT)] + ([("baseline", args.baseline_dir)] if args.baseline_dir else [])
+    for params in [int(p) for p in args.params.split(",")]:
+        for name, repo_dir in versions:
+            output = os.path.join(args.output_dir, f"{name}_{params}.html")
+            r = measure(repo_dir, args.types, params, output)
+            table.add_row(name, str(params), f"{r['elapsed']:.2f}", f"{r['peak'] / 1e6:.1f}", str(r["files"]),
+                          f"{r['total'] / 1e6:.2f}", f"{r['index'] / 1e6:.2f}", f"{r['largest'] / 1e6:.2f}")
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
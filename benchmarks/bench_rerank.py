@@ -0,0 +1,103 @@
+"""Measure recall@N and latency of vector search with and without cross-encoder reranking
+
+Questions are either read from a labelled JSONL file ({"question": ..., "relevant_ids": [...]})
+or generated from the collection itself as "What is <Attribute Name> of <Name>?", where
+every document with that element name and attribute counts as relevant.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from typing import List, Dict, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+
+from RAG import BIMQueryEngine
+from reranker import CrossEncoderReranker
+
+console = Console()
+
+
+def sample_questions(engine: BIMQueryEngine, sample_size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate labelled attribute questions from the documents in the collection"""
+    collections = [engine.collection] if engine.collection is not None else list(engine.shards.values())
+    relevant = {}
+    for collection in collections:
+        data = collection.get(include=["metadatas"])
+        for doc_id, metadata in zip(data["ids"], data["metadatas"]):
+            name, attribute = metadata.get("Name"), metadata.get("Attribute Name")
+            if name and attribute:
+                relevant.setdefault((name, attribute), []).append(doc_id)
+
+    keys = sorted(relevant)
+    random.Random(seed).shuffle(keys)
+    return [
+        {"question": f"What is {attribute} of {name}?", "relevant_ids": relevant[(name, attribute)]}
+        for name, attribute in keys[:sample_size]
+    ]
+
+
+def evaluate(engine: BIMQueryEngine, questions: List[Dict[str, Any]], n_results: int) -> Dict[str, float]:
+    """Return recall@n_results and mean latency per query in milliseconds"""
+    hits = 0
+    total_time = 0.0
+    for item in questions:
+        # Bypass the result cache so every configuration is really searched
+        engine.result_cache.clear()
+        start = time.perf_counter()
+        results = engine.query(item["question"], n_results)["results"]
+        total_time += time.perf_counter() - start
+        if any(result["id"] in item["relevant_ids"] for result in results):
+            hits += 1
+    return {
+        "recall": hits / len(questions) if questions else 0.0,
+        "latency_ms": total_time / len(questions) * 1000 if questions else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking")
+    parser.add_argument("--labels", type=str, help="JSONL file with question and relevant_ids per line")
+    parser.add_argument("--sample", type=int, default=100, help="Number of generated questions if --labels is not given")
+    parser.add_argument("--n-results", type=int, default=5, help="Results per query (N in recall@N)")
+    parser.add_argument("--candidates", type=int, default=20, help="Documents fetched for reranking")
+    parser.add_argument("--budget", type=float, default=0.5, help="Rerank time budget per query in seconds")
+    parser.add_argument("--persist-directory", type=str, default="./chroma_db")
+    args = parser.parse_args()
+
+    engine = BIMQueryEngine(persist_directory=args.persist_directory)
+    if args.labels:
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            questions = [json.loads(line) for line in f if line.strip()]
+    else:
+        questions = sample_questions(engine, args.sample)
+    console.print(f"[blue]Evaluating {len(questions)} questions[/blue]")
+
+    # Warm up the embedding model so the first query does not skew latency
+    engine.embed_query("warm up")
+    baseline = evaluate(engine, questions, args.n_results)
+
+    engine.reranker = CrossEncoderReranker(time_budget=args.budget)
+    engine.rerank_candidates = args.candidates
+    engine.reranker.model.predict([("warm up", "warm up")])
+    reranked = evaluate(engine, questions, args.n_results)
+
+    table = Table(title=f"Recall@{args.n_results} with and without reranking")
+    table.add_column("Configuration", style="cyan")
+    table.add_column(f"Recall@{args.n_results}", style="green")
+    table.add_column("Latency (ms/query)", style="yellow")
+    table.add_row("Vector search", f"{baseline['recall']:.3f}", f"{baseline['latency_ms']:.1f}")
+    table.add_row(f"Rerank top {args.candidates}", f"{reranked['recall']:.3f}", f"{reranked['latency_ms']:.1f}")
+    console.print(table)
+    console.print(f"Recall gain: {reranked['recall'] - baseline['recall']:+.3f}, "
+                  f"added latency: {reranked['latency_ms'] - baseline['latency_ms']:+.1f} ms, "
+                  f"budget fallbacks: {engine.reranker.fallbacks}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Compare cold per-process query latency with warm queries against a running RAG server
+
+Cold: every question runs `python RAG.py --batch` in a fresh process, paying for the
+imports, the embedding model load and the ChromaDB connection each time.
+Warm: the same number of questions go through rag_client to `python RAG.py --serve`.
+Both use --stub-llm so only the local pipeline is measured.
+"""
+import os
+import sys
+import time
+import tempfile
+import argparse
+import subprocess
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rich.console import Console
+from rich.table import Table
+
+from rag_client import RAGClient
+
+console = Console()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUESTIONS = [
+    "What is the fire rating of SD-05?",
+    "What is W/D Opening Nominal Surface Area of V-02d EI60 window?",
+    "What is Surface Area of the Slab Edges (Gross)?",
+]
+
+
+def cold_latencies(runs: int):
+    latencies = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(runs):
+            # Unique suffix so the persisted query cache cannot answer the question
+            questions_file = os.path.join(tmp, "question.txt")
+            with open(questions_file, 'w') as f:
+                f.write(f"{QUESTIONS[i % len(QUESTIONS)]} cold-{i}-{time.time()}\n")
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "RAG.py", "--batch", questions_file, "--batch-output", os.path.join(tmp, "out.jsonl"),
+                 "--stub-llm", "--semantic-threshold", "1.1"],
+                cwd=REPO_ROOT, check=True, stdout=subprocess.DEVNULL
+            )
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def warm_latencies(runs: int, port: int):
+    server = subprocess.Popen(
+        [sys.executable, "RAG.py", "--serve", "--port", str(port), "--stub-llm", "--semantic-threshold", "1.1"],
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL
+    )
+    try:
+        client = RAGClient(f"http://127.0.0.1:{port}")
+        start = time.perf_counter()
+        while not client.health():
+            if server.poll() is not None:
+                raise RuntimeError("Server exited during startup")
+            time.sleep(0.1)
+        console.print(f"[blue]Server ready after {time.perf_counter() - start:.1f}s[/blue]")
+
+        latencies = []
+        for i in range(runs):
+            start = time.perf_counter()
+            client.ask(f"{QUESTIONS[i % len(QUESTIONS)]} warm-{i}-{time.time()}")
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold CLI queries against a warm RAG server")
+    parser.add_argument("--runs", type=int, default=5, help="Questions per mode")
+    parser.add_argument("--port", type=int, default=8799, help="Port for the temporary server")
+    args = parser.parse_args()
+
+    cold = cold_latencies(args.runs)
+    warm = warm_latencies(args.runs, args.port)
+
+    table = Table(title="Cold vs warm query latency (seconds)")
+    table.add_column("Mode", style="cyan")
+    table.add_column("Median", style="green")
+    table.add_column("Min", style="yellow")
+    table.add_column("Max", style="yellow")
+    for name, latencies in [("Cold (new process)", cold), ("Warm (server)", warm)]:
+        table.add_row(name, f"{statistics.median(latencies):.3f}", f"{min(latencies):.3f}", f"{max(latencies):.3f}")
+    console.print(table)
+    console.print(f"Speed-up: {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measure CLI startup time per flag and which heavy libraries each flag imports
+
+Each flag runs RAG.py's main() in a fresh interpreter. Pass --baseline-dir with another
+checkout (e.g. `git worktree add ../baseline <commit>`) to compare against it.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+from rich.console import Console
+from rich.table import Table
+
+console = Console()
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ["torch", "sentence_transformers", "chromadb", "google.generativeai", "pandas"]
+DEFAULT_FLAGS = ["--help", "--wall-params", "--door-params", "--window-params", "--slab-params"]
+
+# Runs main() with the given flag, then reports elapsed time and loaded heavy modules
+RUNNER = """
+import sys, time, json, runpy
+start = time.perf_counter()
+sys.argv = ["RAG.py"] + sys.argv[1:]
+try:
+    runpy.run_path("RAG.py", run_name="__main__")
+except SystemExit:
+    pass
+elapsed = time.perf_counter() - start
+sys.__stdout__.write("\\n@@" + json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure(repo_dir: str, flag: str, runs: int):
+    """Return median startup time and the heavy modules imported for a flag"""
+    times, loaded = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", RUNNER % HEAVY_MODULES] + flag.split(),
+            cwd=repo_dir, capture_output=True, text=True
+        ).stdout
+        result = json.loads(output.rsplit("@@", 1)[1])
+        times.append(result["elapsed"])
+        loaded = result["loaded"]
+    return statistics.median(times), loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RAG.py startup time per CLI flag")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per flag (median is reported)")
+    parser.add_argument("--flags", type=str, default=",".join(DEFAULT_FLAGS),
+                        help="Comma-separated flags to measure, e.g. --flags=--help,--wall-params")
+    parser.add_argument("--baseline-dir", type=str, help="Another checkout of the repository to compare against")
+    args = parser.parse_args()
+
+    table = Table(title="RAG.py startup time per flag (seconds, median)")
+    table.add_column("Flag", style="cyan")
+    table.add_column("Startup", style="green")
+    table.add_column("Heavy modules imported", style="yellow")
+    if args.baseline_dir:
+        table.add_column("Baseline", style="red")
+        table.add_column("Speed-up", style="blue")
+
+    for flag in args.flags.split(","):
+        elapsed, loaded = measure(REPO_ROOT, flag, args.runs)
+        row = [flag, f"{elapsed:.2f}", ", ".join(loaded) or "none"]
+        if args.baseline_dir:
+            baseline, _ = measure(args.baseline_dir, flag, args.runs)
+            row += [f"{baseline:.2f}", f"{baseline / elapsed:.1f}x"]
+        table.add_row(*row)
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import re
+from typing import List, Dict, Any, Set
+
+# Columns identifying an element, in order of preference
+ID_COLUMNS = ["GlobalId", "GUID", "Tag"]
+
+# Columns always kept in the element header
+HEADER_COLUMNS = ["ElementType", "Name"]
+
+# Columns describing one property/quantity row of a long-format export
+ATTRIBUTE_COLUMNS = ["Attribute Name", "Value", "Unit"]
+
+# Row columns only kept when the question mentions them
+OPTIONAL_ATTRIBUTE_COLUMNS = ["Set Name", "Data Type"]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting (about four characters per token)"""
+    return len(text) // 4 + 1
+
+
+def _words(text: str) -> Set[str]:
+    """Lowercase words of a text, splitting camelCase and punctuation"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(text))
+    return {word for word in re.split(r"[^a-z0-9]+", text.lower()) if len(word) > 2}
+
+
+def _is_relevant(column: str, query_words: Set[str]) -> bool:
+    return bool(_words(column) & query_words)
+
+
+def _element_id(metadata: Dict[str, Any]) -> str:
+    for column in ID_COLUMNS:
+        if metadata.get(column):
+            return f"{column} {metadata[column]}"
+    return ""
+
+
+def _format_value(value: Any) -> str:
+    return str(value).replace("|", "/").replace("\n", " ").strip()
+
+
+def build_context(query: str, documents: List[Dict[str, Any]], token_budget: int = 1500) -> Dict[str, Any]:
+    """Pack retrieved documents into a compact, token-budgeted context
+
+    Rows are grouped by element (GlobalId), so the repeated base columns are
+    rendered once per element, and columns the question does not mention are
+    dropped. Elements are added in retrieval order until the budget is used up.
+    Returns the context text with the estimated token count and how many
+    elements and rows were included or left out.
+    """
+    query_words = _words(query)
+
+    # Group rows by element, keeping retrieval order
+    elements = {}
+    for doc in documents:
+        metadata = doc.get("metadata") or {}
+        element_id = _element_id(metadata) or doc.get("id", "")
+        element = elements.setdefault(element_id, {"metadata": metadata, "rows": []})
+        row = tuple(_format_value(metadata.get(column, "")) for column in ATTRIBUTE_COLUMNS + OPTIONAL_ATTRIBUTE_COLUMNS)
+        if any(row) and row not in element["rows"]:
+            element["rows"].append(row)
+
+    row_columns = ATTRIBUTE_COLUMNS + [c for c in OPTIONAL_ATTRIBUTE_COLUMNS if _is_relevant(c, query_words)]
+    row_indexes = [(ATTRIBUTE_COLUMNS + OPTIONAL_ATTRIBUTE_COLUMNS).index(c) for c in row_columns]
+    skip_columns = set(ID_COLUMNS + HEADER_COLUMNS + ATTRIBUTE_COLUMNS + OPTIONAL_ATTRIBUTE_COLUMNS)
+
+    sections = []
+    used_tokens = 0
+    included_rows = 0
+    total_rows = sum(max(1, len(element["rows"])) for element in elements.values())
+
+    for element_id, element in elements.items():
+        metadata = element["metadata"]
+
+        # Element header: type, name, id and any base column the question mentions
+        header = [_format_value(metadata.get(column, "")) for column in HEADER_COLUMNS]
+        header = [value for value in header if value]
+        if element_id:
+            header.append(element_id)
+        header.extend(
+            f"{column}={_format_value(value)}"
+            for column, value in metadata.items()
+            if column not in skip_columns and _format_value(value)
+            # Wide-format rows carry their data in the base columns, so keep them all
+            and (not element["rows"] or _is_relevant(column, query_words))
+        )
+        lines = ["# " + " | ".join(header)]
+        if element["rows"]:
+            lines.append(" | ".join(row_columns))
+
+        section_tokens = estimate_tokens("\n".join(lines))
+        if used_tokens + section_tokens > token_budget:
+            break
+
+        rows_added = 0
+        for row in element["rows"]:
+            line = " | ".join(row[i] for i in row_indexes)
+            line_tokens = estimate_tokens(line)
+            if used_tokens + section_tokens + line_tokens > token_budget:
+                break
+            lines.append(line)
+            section_tokens += line_tokens
+            rows_added += 1
+
+        sections.append("\n".join(lines))
+        used_tokens += section_tokens
+        included_rows += rows_added if element["rows"] else 1
+
+    return {
+        "text": "\n\n".join(sections),
+        "tokens": used_tokens,
+        "elements": len(sections),
+        "total_elements": len(elements),
+        "rows": included_rows,
+        "total_rows": total_rows
+    }
@@ -0,0 +1,234 @@
+import os
+import io
+import glob
+import json
+import hashlib
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+# Folder (inside the data folder) holding the parsed copies of the Excel files
+CACHE_FOLDER = ".excel_cache"
+
+# Feather is the fastest format to load; it needs pyarrow, otherwise frames are stored as JSON.
+# Sidecars live in data folders others may write to, so formats that can run code (pickle) are not used.
+CACHE_FORMAT = "feather" if importlib.util.find_spec("pyarrow") else "json"
+
+# Rows per chunk when reading Excel files in chunks
+CHUNK_ROWS = 50_000
+
+
+def _cache_prefix(excel_file: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(excel_file)), CACHE_FOLDER, os.path.basename(excel_file))
+
+
+def cache_path(excel_file: str, cache_format: str = CACHE_FORMAT) -> str:
+    """Sidecar path of an Excel file, keyed by its path, size and modification time"""
+    stat = os.stat(excel_file)
+    key = hashlib.sha1(f"{os.path.abspath(excel_file)}|{stat.st_size}|{stat.st_mtime_ns}".encode("utf-8")).hexdigest()[:16]
+    return f"{_cache_prefix(excel_file)}.{key}.{cache_format}"
+
+
+def _write_json(df: pd.DataFrame, path: str) -> None:
+    """Write a frame as JSON: a line with the column dtypes, then the frame"""
+    with open(path, 'w', encoding="utf-8") as f:
+        f.write(json.dumps([str(dtype) for dtype in df.dtypes]) + "\n")
+        df.to_json(f, orient="split", date_format="iso", date_unit="ns", double_precision=15)
+
+
+def _read_json(path: str) -> pd.DataFrame:
+    with open(path, 'r', encoding="utf-8") as f:
+        dtypes = json.loads(f.readline())
+        df = pd.read_json(io.StringIO(f.read()), orient="split", dtype=False, convert_dates=False,
+                          keep_default_dates=False, precise_float=True)
+    # JSON keeps the values but not all column types (e.g. an empty float column),
+    # and empty cells of mixed columns come back as None rather than NaN
+    for i, dtype in enumerate(dtypes):
+        column = df.iloc[:, i]
+        if str(column.dtype) != dtype:
+            df.isetitem(i, column.astype(dtype))
+        elif dtype == "object":
+            df.isetitem(i, column.where(column.notna(), np.nan))
+    return df
+
+
+def _read_cache(path: str) -> Optional[pd.DataFrame]:
+    try:
+        if path.endswith(".feather"):
+            return pd.read_feather(path)
+        return _read_json(path)
+    except Exception:
+        # Unreadable or half-written sidecar: parse the Excel file again
+        return None
+
+
+def _write_cache(df: pd.DataFrame, excel_file: str) -> None:
+    """Store the parsed frame next to the Excel file and drop sidecars of older versions"""
+    os.makedirs(os.path.dirname(_cache_prefix(excel_file)), exist_ok=True)
+    path = cache_path(excel_file)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if CACHE_FORMAT == "feather":
+            try:
+                df.to_feather(tmp_path)
+            except Exception:
+                # Columns with mixed value types (e.g. Value) cannot be stored as Arrow; use JSON instead
+                path = cache_path(excel_file, "json")
+                _write_json(df, tmp_path)
+        else:
+            _write_json(df, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        console.print(f"[yellow]Could not cache {excel_file}: {e}[/yellow]")
+        return
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    for old_path in glob.glob(f"{glob.escape(_cache_prefix(excel_file))}.*"):
+        if old_path != path and not old_path.endswith(".tmp"):
+            os.remove(old_path)
+
+
+def cached_frame(excel_file: str) -> Optional[pd.DataFrame]:
+    """Return the cached frame of an unchanged Excel file, or None"""
+    for cache_format in dict.fromkeys([CACHE_FORMAT, "json"]):
+        path = cache_path(excel_file, cache_format)
+        if os.path.exists(path):
+            df = _read_cache(path)
+            if df is not None:
+                return df
+    return None
+
+
+def read_excel_cached(excel_file: str) -> pd.DataFrame:
+    """Read an Excel file, using (and refreshing) its sidecar cache"""
+    df = cached_frame(excel_file)
+    if df is None:
+        df = pd.read_excel(excel_file)
+        _write_cache(df, excel_file)
+    return df
+
+
+def load_excel_files(excel_files: List[str], max_workers: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Read several Excel files, parsing the uncached ones in parallel processes
+
+    Returns a frame per file, keyed by path; missing and unreadable files are left out.
+    """
+    frames = {}
+    to_parse = []
+    for excel_file in excel_files:
+        if not os.path.exists(excel_file):
+            continue
+        df = cached_frame(excel_file)
+        if df is None:
+            to_parse.append(excel_file)
+        else:
+            frames[excel_file] = df
+
+    if len(to_parse) == 1:
+        try:
+            frames[to_parse[0]] = read_excel_cached(to_parse[0])
+        except Exception as e:
+            console.print(f"[red]Error loading {to_parse[0]}: {e}[/red]")
+    elif to_parse:
+        workers = min(len(to_parse), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {excel_file: executor.submit(read_excel_cached, excel_file) for excel_file in to_parse}
+            for excel_file, future in futures.items():
+                try:
+                    frames[excel_file] = future.result()
+                except Exception as e:
+                    console.print(f"[red]Error loading {excel_file}: {e}[/red]")
+
+    # Keep the order of the requested files
+    return {excel_file: frames[excel_file] for excel_file in excel_files if excel_file in frames}
+
+
+def _open_feather(path: str):
+    """Record batch reader over a memory-mapped Feather file, or None if it cannot be read"""
+    import pyarrow as pa
+
+    try:
+        return pa.ipc.open_file(pa.memory_map(path))
+    except Exception:
+        return None
+
+
+def _feather_chunks(reader, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Chunks of a Feather file, converted record batch by record batch"""
+    offset = 0
+    for i in range(reader.num_record_batches):
+        batch = reader.get_batch(i)
+        for start in range(0, batch.num_rows, chunk_rows):
+            df = batch.slice(start, chunk_rows).to_pandas()
+            df.index = pd.RangeIndex(offset, offset + len(df))
+            offset += len(df)
+            yield df
+
+
+def _chunk_frame(rows: List[tuple], columns: List[str], offset: int) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    df.index = pd.RangeIndex(offset, offset + len(df))
+    for column in df.columns[df.isna().all().values]:
+        # An empty stretch of a column reads as float NaN, as in pd.read_excel
+        df[column] = np.nan
+    return df
+
+
+def _worksheet_chunks(excel_file: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Chunks of the first worksheet, streamed with openpyxl's read-only mode"""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = list(header)
+        while header and header[-1] is None:
+            header.pop()
+        columns = [str(name) if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        width = len(columns)
+
+        chunk, blank_rows, offset = [], 0, 0
+        for row in rows:
+            if all(value is None or value == "" for value in row):
+                # Blank rows count only if data follows them (pd.read_excel drops trailing ones)
+                blank_rows += 1
+                continue
+            chunk.extend([(None,) * width] * blank_rows)
+            blank_rows = 0
+            chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+            if len(chunk) >= chunk_rows:
+                yield _chunk_frame(chunk, columns, offset)
+                offset += len(chunk)
+                chunk = []
+        if chunk:
+            yield _chunk_frame(chunk, columns, offset)
+    finally:
+        workbook.close()
+
+
+def iter_excel_chunks(excel_file: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Read an Excel file as a sequence of frames of at most chunk_rows rows
+
+    Only one chunk is in memory at a time. The record batches of a current
+    Feather sidecar are used when there is one; otherwise the worksheet is
+    streamed row by row (JSON sidecars cannot be read partially). Chunks are
+    indexed by their row numbers in the whole file.
+    """
+    if CACHE_FORMAT == "feather":
+        path = cache_path(excel_file, "feather")
+        reader = _open_feather(path) if os.path.exists(path) else None
+        if reader is not None:
+            yield from _feather_chunks(reader, chunk_rows)
+            return
+    yield from _worksheet_chunks(excel_file, chunk_rows)
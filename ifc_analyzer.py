@@ -1,54 +1,94 @@
 import os
+import glob
 import pandas as pd
 import json
 from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.progress import Progress
-from typing import Dict, List, Any, Set, Optional
+from typing import Dict, List, Any, Optional
+
+from excel_loader import load_excel_files, iter_excel_chunks, CHUNK_ROWS
+from attribute_analysis import attribute_completeness, completeness_to_dict, element_ids, CompletenessAccumulator
+from column_stats import column_statistics, ColumnStatistics
+from violation_index import ViolationIndex, required_presence, VIOLATION_INDEX_FILE
+from analysis_cache import AnalysisCache, CACHE_FOLDER, cache_key, file_fingerprint
+from report_writer import HTMLReportWriter, link, remove_stale_pages
 
 # Configure console for pretty printing
 console = Console()
 
+# Export files expected in a data folder (other ifc_<type>_export.xlsx files are picked up too)
+DEFAULT_EXPORT_FILES = [
+    "ifc_door_export.xlsx",
+    "ifc_proxy_export.xlsx",
+    "ifc_slab_export.xlsx",
+    "ifc_wall_export.xlsx",
+    "ifc_wallstandardcase_export.xlsx",
+    "ifc_windows_export.xlsx"
+]
+
+
+# Reports with more parameter table rows than this get one page per element type
+SPLIT_REPORT_ROWS = 2000
+
+
+def find_export_files(data_folder: str) -> List[str]:
+    """Export files of a data folder: the default element types plus any other ifc_<type>_export.xlsx"""
+    found = [os.path.basename(f) for f in glob.glob(os.path.join(glob.escape(data_folder), "ifc_*_export.xlsx"))]
+    return [os.path.join(data_folder, name) for name in sorted(set(DEFAULT_EXPORT_FILES) | set(found))]
+
 class IFCDataAnalyzer:
     """Analyze IFC data extracted to Excel files and compare with expected schema"""
     
-    def __init__(self, data_folder: str = "data"):
-        """Initialize with the data folder containing Excel files"""
+    def __init__(self, data_folder: str = "data", approximate_distinct: Optional[bool] = None,
+                 chunk_rows: Optional[int] = None, use_cache: bool = True, interactive: bool = True,
+                 excel_files: Optional[List[str]] = None):
+        """Initialize with the data folder containing Excel files
+        
+        approximate_distinct selects HyperLogLog distinct counts (None: only for very large tables).
+        chunk_rows analyzes the files in chunks of that many rows instead of loading them whole.
+        use_cache reuses the results of element types whose export file is unchanged since the last run.
+        interactive=False never prompts (a missing expected schema skips the comparison).
+        excel_files overrides the export files found in data_folder.
+        """
         self.data_folder = data_folder
-        self.excel_files = [
-            os.path.join(data_folder, "ifc_door_export.xlsx"),
-            os.path.join(data_folder, "ifc_proxy_export.xlsx"),
-            os.path.join(data_folder, "ifc_slab_export.xlsx"),
-            os.path.join(data_folder, "ifc_wall_export.xlsx"),
-            os.path.join(data_folder, "ifc_wallstandardcase_export.xlsx"),
-            os.path.join(data_folder, "ifc_windows_export.xlsx")
-        ]
+        self.approximate_distinct = approximate_distinct
+        self.chunk_rows = chunk_rows
+        self.interactive = interactive
+        self.analysis_cache = AnalysisCache(os.path.join(data_folder, CACHE_FOLDER)) if use_cache else None
+        self.excel_files = list(excel_files) if excel_files is not None else find_export_files(data_folder)
+        # Processes used to parse uncached Excel files (None: one per CPU)
+        self.load_workers = None
         # Dictionary to store dataframes
         self.dataframes = {}
         # Dictionary to store schema information by element type
         self.schemas = {}
         # Dictionary to store parameter frequency by element type
         self.param_frequencies = {}
+        # Dictionary to store per-parameter completeness over elements by element type
+        self.completeness = {}
+        # Which elements miss which required parameters (built by the schema comparison)
+        self.violation_index = None
+        # Cache keys of the element types analyzed in this run
+        self._schema_keys = {}
         
-    def load_excel_files(self) -> None:
-        """Load all Excel files into dataframes"""
+    def load_excel_files(self, excel_files: Optional[List[str]] = None) -> None:
+        """Load all (or the given) Excel files into dataframes (in parallel, or from their cache)"""
+        excel_files = self.excel_files if excel_files is None else excel_files
         with Progress() as progress:
-            task = progress.add_task("[cyan]Loading Excel files...", total=len(self.excel_files))
+            task = progress.add_task("[cyan]Loading Excel files...", total=len(excel_files))
+            frames = load_excel_files(excel_files, self.load_workers)
             
-            for excel_file in self.excel_files:
-                if os.path.exists(excel_file):
+            for excel_file in excel_files:
+                if excel_file in frames:
                     # Get element type from filename
                     element_type = os.path.basename(excel_file).split('_')[1].split('.')[0]
-                    try:
-                        # Load Excel file
-                        df = pd.read_excel(excel_file)
-                        # Store dataframe
-                        self.dataframes[element_type] = df
-                        console.print(f"[green]Loaded {element_type} data: {len(df)} records[/green]")
-                    except Exception as e:
-                        console.print(f"[red]Error loading {excel_file}: {e}[/red]")
-                else:
+                    # Store dataframe
+                    df = frames[excel_file]
+                    self.dataframes[element_type] = df
+                    console.print(f"[green]Loaded {element_type} data: {len(df)} records[/green]")
+                elif not os.path.exists(excel_file):
                     console.print(f"[yellow]File not found: {excel_file}[/yellow]")
                     
                 progress.update(task, advance=1)
@@ -56,59 +96,164 @@ class IFCDataAnalyzer:
     def analyze_schema(self) -> None:
         """Analyze the schema of each element type"""
         for element_type, df in self.dataframes.items():
-            # Create schema information
-            schema = {
-                "record_count": len(df),
-                "columns": list(df.columns),
-                "data_types": {col: str(df[col].dtype) for col in df.columns},
-                "null_counts": {col: int(df[col].isna().sum()) for col in df.columns},
-                "null_percentages": {col: float(df[col].isna().mean() * 100) for col in df.columns},
-                "unique_values": {col: int(df[col].nunique()) for col in df.columns},
-            }
+            # Create schema information (all column statistics in one pass)
+            schema = column_statistics(df, self.approximate_distinct)
             
-            # Calculate parameter frequency
-            total_records = len(df)
-            self.param_frequencies[element_type] = {}
+            # Calculate parameter frequency over elements: long-format exports hold one
+            # row per property, so parameters are base columns and Attribute Name values
+            ids = element_ids(df)
+            self._store_schema(element_type, schema, attribute_completeness(df, ids), int(ids.nunique()))
             
-            for col in df.columns:
-                # Count non-null values
-                non_null_count = total_records - df[col].isna().sum()
-                # Calculate frequency
-                frequency = non_null_count / total_records if total_records > 0 else 0
-                self.param_frequencies[element_type][col] = frequency
-            
-            # Store schema
-            self.schemas[element_type] = schema
+        return self.schemas
+    
+    def _schema_key(self, excel_file: str) -> str:
+        """Cache key of an element type's schema: its file version and the analysis options"""
+        return cache_key(file_fingerprint(excel_file), self.approximate_distinct, bool(self.chunk_rows))
+    
+    def load_cached_schemas(self) -> List[str]:
+        """Take the results of unchanged element types from the analysis cache
+        
+        Returns the Excel files that still have to be analyzed.
+        """
+        if self.analysis_cache is None:
+            return list(self.excel_files)
+        
+        to_analyze = []
+        for excel_file in self.excel_files:
+            if not os.path.exists(excel_file):
+                to_analyze.append(excel_file)
+                continue
+            element_type = os.path.basename(excel_file).split('_')[1].split('.')[0]
+            key = self._schema_key(excel_file)
+            schema = self.analysis_cache.get_schema(element_type, key)
+            if schema is None:
+                self._schema_keys[element_type] = key
+                to_analyze.append(excel_file)
+                continue
             
-            # Print summary
-            console.print(f"\n[bold blue]Schema analysis for {element_type}:[/bold blue]")
-            console.print(f"Records: {schema['record_count']}")
-            console.print(f"Parameters: {len(schema['columns'])}")
+            completeness = pd.DataFrame.from_dict(
+                schema["completeness"]["parameters"], orient="index", columns=["present", "filled", "fill_rate"]
+            )
+            self._store_schema(element_type, schema, completeness, schema["element_count"], print_summary=False)
+            console.print(f"[green]Using cached analysis of {element_type} (file unchanged)[/green]")
+        return to_analyze
+    
+    def save_cached_schemas(self) -> None:
+        """Store the results of the element types analyzed in this run"""
+        if self.analysis_cache is None:
+            return
+        for element_type, key in self._schema_keys.items():
+            if element_type in self.schemas:
+                self.analysis_cache.put_schema(element_type, key, self.schemas[element_type])
+    
+    def analyze_schema_chunked(self, excel_files: Optional[List[str]] = None) -> None:
+        """Analyze the schema of each element type without loading whole files
+        
+        Each file is read in chunks of chunk_rows rows that update mergeable
+        statistics, so memory use depends on the chunk size and not on the file
+        size. Distinct counts and completeness are HyperLogLog estimates unless
+        approximate_distinct is False; exact counting keeps the distinct values
+        and element ids of every parameter in memory.
+        """
+        approximate = self.approximate_distinct is not False
+        for excel_file in self.excel_files if excel_files is None else excel_files:
+            if not os.path.exists(excel_file):
+                console.print(f"[yellow]File not found: {excel_file}[/yellow]")
+                continue
+            element_type = os.path.basename(excel_file).split('_')[1].split('.')[0]
             
-            # Create table for parameter details
-            table = Table(title=f"{element_type} Parameters")
-            table.add_column("Parameter", style="cyan")
-            table.add_column("Data Type", style="green")
-            table.add_column("Null Count", style="yellow")
-            table.add_column("Null %", style="yellow")
-            table.add_column("Unique Values", style="blue")
-            table.add_column("Fill Rate %", style="green")
+            statistics = ColumnStatistics(approximate)
+            completeness = CompletenessAccumulator(approximate)
+            try:
+                with Progress() as progress:
+                    task = progress.add_task(f"[cyan]Analyzing {element_type} in chunks...", total=None)
+                    for chunk in iter_excel_chunks(excel_file, self.chunk_rows):
+                        statistics.update(chunk)
+                        completeness.update(chunk)
+                        progress.update(task, advance=len(chunk))
+            except Exception as e:
+                console.print(f"[red]Error analyzing {excel_file}: {e}[/red]")
+                continue
             
-            for col in schema['columns']:
-                fill_rate = 100 - schema['null_percentages'][col]
-                table.add_row(
-                    col,
-                    schema['data_types'][col],
-                    str(schema['null_counts'][col]),
-                    f"{schema['null_percentages'][col]:.1f}%",
-                    str(schema['unique_values'][col]),
-                    f"{fill_rate:.1f}%"
-                )
-                
-            console.print(table)
+            self._store_schema(element_type, statistics.result(), completeness.result(), completeness.element_count())
             
         return self.schemas
     
+    def _excel_file(self, element_type: str) -> str:
+        return next(f for f in self.excel_files if os.path.basename(f).split('_')[1].split('.')[0] == element_type)
+    
+    def _frames(self, element_type: str):
+        """Rows of an element type: the loaded frame, or chunks streamed from its file"""
+        if element_type in self.dataframes:
+            return [self.dataframes[element_type]]
+        return iter_excel_chunks(self._excel_file(element_type), self.chunk_rows or CHUNK_ROWS)
+    
+    def _required_presence(self, element_type: str, required: List[str]):
+        """required_presence() of an element type, from the analysis cache if its file and required parameters are unchanged"""
+        if self.analysis_cache is None:
+            return required_presence(self._frames(element_type), required)
+        
+        key = cache_key(file_fingerprint(self._excel_file(element_type)), required)
+        cached = self.analysis_cache.get_presence(element_type, key)
+        if cached is not None:
+            return cached[0], cached[1]
+        ids, matrix = required_presence(self._frames(element_type), required)
+        self.analysis_cache.put_presence(element_type, key, ids, matrix, required)
+        return ids, matrix
+    
+    def _store_schema(self, element_type: str, schema: Dict[str, Any], completeness: pd.DataFrame, element_count: int,
+                      print_summary: bool = True) -> None:
+        """Record the schema and completeness of an element type and print their summary"""
+        self.completeness[element_type] = completeness
+        self.param_frequencies[element_type] = (completeness["fill_rate"] / 100).to_dict()
+        schema["element_count"] = element_count
+        schema["completeness"] = completeness_to_dict(completeness, element_count)
+        
+        # Store schema
+        self.schemas[element_type] = schema
+        if not print_summary:
+            return
+        
+        # Print summary
+        console.print(f"\n[bold blue]Schema analysis for {element_type}:[/bold blue]")
+        console.print(f"Records: {schema['record_count']}")
+        console.print(f"Elements: {schema['element_count']}")
+        console.print(f"Parameters: {len(completeness)}")
+        
+        # Create table for parameter details
+        table = Table(title=f"{element_type} Parameters")
+        table.add_column("Parameter", style="cyan")
+        table.add_column("Data Type", style="green")
+        table.add_column("Null Count", style="yellow")
+        table.add_column("Null %", style="yellow")
+        table.add_column("Unique Values", style="blue")
+        table.add_column("Fill Rate %", style="green")
+        
+        for col in schema['columns']:
+            fill_rate = 100 - schema['null_percentages'][col]
+            table.add_row(
+                col,
+                schema['data_types'][col],
+                str(schema['null_counts'][col]),
+                f"{schema['null_percentages'][col]:.1f}%",
+                str(schema['unique_values'][col]),
+                f"{fill_rate:.1f}%"
+            )
+            
+        console.print(table)
+        
+        # Create table for parameter completeness over elements
+        table = Table(title=f"{element_type} Parameter Completeness ({schema['element_count']} elements)")
+        table.add_column("Parameter", style="cyan")
+        table.add_column("Elements With Parameter", style="blue")
+        table.add_column("Elements With Value", style="yellow")
+        table.add_column("Fill Rate %", style="green")
+        
+        for param, row in completeness.iterrows():
+            table.add_row(param, str(row["present"]), str(row["filled"]), f"{row['fill_rate']:.1f}%")
+            
+        console.print(table)
+    
     def compare_with_expected_schema(self, expected_schema_file: Optional[str] = None) -> Dict[str, Any]:
         """Compare actual schema with expected schema"""
         result = {
@@ -129,6 +274,9 @@ class IFCDataAnalyzer:
                 console.print(f"[red]Error loading expected schema: {e}[/red]")
         
         # If no expected schema file or loading failed, ask if user wants to define one
+        if not expected_schema and not self.interactive:
+            console.print("[yellow]No expected schema available, skipping schema comparison.[/yellow]")
+            return result
         if not expected_schema:
             choice = console.input("[yellow]No expected schema provided. Would you like to define one based on the current data? (y/n)[/yellow] ")
             if choice.lower() in ['y', 'yes']:
@@ -139,19 +287,18 @@ class IFCDataAnalyzer:
         
         # Perform comparison
         console.print("\n[bold blue]Comparing with expected schema:[/bold blue]")
+        presence = {}
         
         for element_type, expected in expected_schema.items():
             if element_type not in self.schemas:
                 console.print(f"[red]Element type {element_type} not found in actual data[/red]")
                 continue
                 
-            actual = self.schemas[element_type]
-            
             console.print(f"\n[bold]Element Type: {element_type}[/bold]")
             
-            # Compare parameters
+            # Compare parameters (columns and attributes present on any element)
             expected_params = set(expected['parameters'])
-            actual_params = set(actual['columns'])
+            actual_params = set(self.param_frequencies[element_type])
             
             missing_params = expected_params - actual_params
             extra_params = actual_params - expected_params
@@ -189,6 +336,11 @@ class IFCDataAnalyzer:
             
             # Check for required parameters with low fill rate
             if 'required_parameters' in expected:
+                # Record which elements lack which required parameters
+                required = list(dict.fromkeys(expected['required_parameters']))
+                ids, matrix = self._required_presence(element_type, required)
+                presence[element_type] = (ids, matrix, required)
+                
                 low_fill_required = []
                 
                 for param in expected['required_parameters']:
@@ -204,6 +356,10 @@ class IFCDataAnalyzer:
                     for param, rate in sorted(low_fill_required, key=lambda x: x[1]):
                         console.print(f"  - {param}: {rate:.1f}%")
         
+        self.violation_index = ViolationIndex.build(presence) if presence else None
+        if presence:
+            result["elements_missing_required"] = self.violation_index.summary()
+        
         return result
     
     def _create_expected_schema(self) -> Dict[str, Any]:
@@ -216,13 +372,13 @@ class IFCDataAnalyzer:
             
             # Create expected schema for this element type
             expected_schema[element_type] = {
-                "parameters": schema['columns'],
+                "parameters": list(self.param_frequencies[element_type]),
                 "required_parameters": high_fill_params,
                 "description": f"Expected schema for {element_type} elements"
             }
         
         # Ask user if they want to save this schema
-        choice = console.input("[yellow]Do you want to save this expected schema for future use? (y/n)[/yellow] ")
+        choice = console.input("[yellow]Do you want to save this expected schema for future use? (y/n)[/yellow] ") if self.interactive else "n"
         if choice.lower() in ['y', 'yes']:
             filename = console.input("[yellow]Enter filename to save schema (e.g., expected_schema.json):[/yellow] ")
             try:
@@ -234,101 +390,123 @@ class IFCDataAnalyzer:
         
         return expected_schema
     
-    def export_analysis_report(self, output_file: str = "ifc_analysis_report.html") -> str:
-        """Export the analysis results to an HTML report"""
+    def _write_element_type_section(self, writer: HTMLReportWriter, element_type: str, schema: Dict[str, Any]) -> None:
+        """Write the parameter tables of one element type"""
+        writer.heading(2, f"Element Type: {element_type}")
+        
+        # Parameter details
+        writer.heading(3, "Parameter Details")
+        fill_rates = {col: 100 - schema['null_percentages'][col] for col in schema['columns']}
+        writer.table(
+            ["Parameter", "Data Type", "Null Count", "Null %", "Unique Values", "Fill Rate %"],
+            ([col, schema['data_types'][col], schema['null_counts'][col], f"{schema['null_percentages'][col]:.1f}%",
+              schema['unique_values'][col], f"{fill_rates[col]:.1f}%"] for col in schema['columns']),
+            len(schema['columns']),
+            ("low-fill" if fill_rates[col] < 90 else "" for col in schema['columns'])
+        )
+        
+        # Parameter completeness over elements
+        completeness = self.completeness.get(element_type)
+        if completeness is not None:
+            writer.heading(3, f"Parameter Completeness ({schema['element_count']} elements)")
+            writer.table(
+                ["Parameter", "Elements With Parameter", "Elements With Value", "Fill Rate %"],
+                ([param, present, filled, f"{fill_rate:.1f}%"] for param, present, filled, fill_rate in zip(
+                    completeness.index, completeness["present"], completeness["filled"], completeness["fill_rate"])),
+                len(completeness),
+                ("low-fill" if fill_rate < 90 else "" for fill_rate in completeness["fill_rate"])
+            )
+    
+    def export_analysis_report(self, output_file: str = "ifc_analysis_report.html", split: Optional[bool] = None) -> str:
+        """Export the analysis results to an HTML report
+        
+        The report is written to the file as it is generated. With split, each
+        element type gets its own page in a <report>_files folder, linked from
+        the summary on the index page; None splits reports with more than
+        SPLIT_REPORT_ROWS table rows.
+        """
         try:
-            # Create report HTML
-            html = """
-            <!DOCTYPE html>
-            <html>
-            <head>
-                <title>IFC Data Analysis Report</title>
-                <style>
-                    body { font-family: Arial, sans-serif; margin: 20px; }
-                    h1, h2, h3 { color: #333; }
-                    table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }
-                    th, td { padding: 8px; text-align: left; border: 1px solid #ddd; }
-                    th { background-color: #f2f2f2; }
-                    .missing { color: red; }
-                    .extra { color: orange; }
-                    .low-fill { background-color: #ffe6e6; }
-                    .summary { background-color: #f9f9f9; padding: 10px; margin-bottom: 20px; }
-                </style>
-            </head>
-            <body>
-                <h1>IFC Data Analysis Report</h1>
-            """
-            
-            # Add summary section
-            html += "<div class='summary'>"
-            html += "<h2>Summary</h2>"
-            html += f"<p>Analyzed {len(self.dataframes)} element types from {self.data_folder} folder.</p>"
-            
-            total_records = sum(len(df) for df in self.dataframes.values())
-            html += f"<p>Total records: {total_records}</p>"
+            table_rows = sum(len(schema['columns']) + len(self.completeness.get(t, ())) for t, schema in self.schemas.items())
+            if split is None:
+                split = table_rows > SPLIT_REPORT_ROWS
+            pages_folder = os.path.splitext(output_file)[0] + "_files"
+            pages = {t: os.path.join(pages_folder, f"{t}.html") for t in self.schemas} if split else {}
             
-            html += "<table>"
-            html += "<tr><th>Element Type</th><th>Record Count</th><th>Parameter Count</th></tr>"
-            
-            for element_type, schema in self.schemas.items():
-                html += f"<tr><td>{element_type}</td><td>{schema['record_count']}</td><td>{len(schema['columns'])}</td></tr>"
+            with HTMLReportWriter(output_file, "IFC Data Analysis Report") as writer:
+                # Add summary section
+                writer.write("<div class='summary'>\n")
+                writer.heading(2, "Summary")
+                writer.paragraph(f"Analyzed {len(self.schemas)} element types from {self.data_folder} folder.")
                 
-            html += "</table>"
-            html += "</div>"
-            
-            # Add detailed sections for each element type
-            for element_type, schema in self.schemas.items():
-                html += f"<h2>Element Type: {element_type}</h2>"
+                total_records = sum(schema['record_count'] for schema in self.schemas.values())
+                writer.paragraph(f"Total records: {total_records}")
                 
-                # Parameter details
-                html += "<h3>Parameter Details</h3>"
-                html += "<table>"
-                html += "<tr><th>Parameter</th><th>Data Type</th><th>Null Count</th><th>Null %</th><th>Unique Values</th><th>Fill Rate %</th></tr>"
+                writer.table(
+                    ["Element Type", "Record Count", "Parameter Count"],
+                    ([link(t, os.path.relpath(pages[t], os.path.dirname(os.path.abspath(output_file)))) if split else t,
+                      schema['record_count'], len(schema['columns'])] for t, schema in self.schemas.items()),
+                    len(self.schemas)
+                )
+                writer.write("</div>\n")
                 
-                for col in schema['columns']:
-                    fill_rate = 100 - schema['null_percentages'][col]
-                    row_class = " class='low-fill'" if fill_rate < 90 else ""
-                    
-                    html += f"<tr{row_class}>"
-                    html += f"<td>{col}</td>"
-                    html += f"<td>{schema['data_types'][col]}</td>"
-                    html += f"<td>{schema['null_counts'][col]}</td>"
-                    html += f"<td>{schema['null_percentages'][col]:.1f}%</td>"
-                    html += f"<td>{schema['unique_values'][col]}</td>"
-                    html += f"<td>{fill_rate:.1f}%</td>"
-                    html += "</tr>"
-                    
-                html += "</table>"
+                # Add detailed sections for each element type (on their own pages if split)
+                for element_type, schema in self.schemas.items():
+                    if not split:
+                        self._write_element_type_section(writer, element_type, schema)
+                        continue
+                    os.makedirs(pages_folder, exist_ok=True)
+                    with HTMLReportWriter(pages[element_type], f"IFC Data Analysis Report: {element_type}") as page:
+                        page.write(f"<p>{link('Back to summary', os.path.relpath(output_file, pages_folder))}</p>\n")
+                        self._write_element_type_section(page, element_type, schema)
             
-            html += """
-            </body>
-            </html>
-            """
+            remove_stale_pages(pages_folder, list(pages.values()))
             
-            # Write to file
-            with open(output_file, 'w') as f:
-                f.write(html)
-                
             console.print(f"[green]Exported analysis report to {output_file}[/green]")
+            if split:
+                console.print(f"[green]Element type pages written to {pages_folder}[/green]")
             return output_file
             
         except Exception as e:
             console.print(f"[red]Error exporting report: {e}[/red]")
             return ""
 
-    def run_analysis(self, expected_schema_file: Optional[str] = None, output_file: str = "ifc_analysis_report.html") -> Dict:
+    def analyze(self) -> Dict[str, Any]:
+        """Analyze every export file (reusing cached results) and return the schemas by element type"""
+        # Reuse the results of unchanged files, then load and analyze the others (or stream them in chunks)
+        to_analyze = self.load_cached_schemas()
+        if to_analyze:
+            if self.chunk_rows:
+                self.analyze_schema_chunked(to_analyze)
+            else:
+                self.load_excel_files(to_analyze)
+                self.analyze_schema()
+            self.save_cached_schemas()
+        
+        # Keep the element types in file order, whether cached or not
+        order = [os.path.basename(f).split('_')[1].split('.')[0] for f in self.excel_files]
+        self.schemas = {t: self.schemas[t] for t in order if t in self.schemas}
+        return self.schemas
+    
+    def run_analysis(self, expected_schema_file: Optional[str] = None, output_file: str = "ifc_analysis_report.html",
+                     violation_index_file: str = VIOLATION_INDEX_FILE) -> Dict:
         """Run the full analysis and return results"""
         console.print(Panel.fit("[bold cyan]IFC Data Analyzer[/bold cyan]"))
         
-        # Load and analyze data
-        self.load_excel_files()
-        schemas = self.analyze_schema()
+        schemas = self.analyze()
         
         # Compare with expected schema if provided
         comparison_results = {}
         if expected_schema_file:
             comparison_results = self.compare_with_expected_schema(expected_schema_file)
         
+        # Persist the per-element violations for queries
+        if self.violation_index is not None:
+            self.violation_index.save(violation_index_file)
+            console.print(f"[green]Saved per-element violation index to {violation_index_file}[/green]")
+        elif os.path.exists(violation_index_file):
+            # No required parameters were checked: an older index would no longer match the data
+            os.remove(violation_index_file)
+        
         # Export report
         report_path = self.export_analysis_report(output_file)
         
@@ -344,9 +522,13 @@ class IFCDataAnalyzer:
 # Standalone function to be imported in RAG
 def analyze_ifc_data(data_folder: str = "data", 
                      expected_schema_file: Optional[str] = None,
-                     output_file: str = "ifc_analysis_report.html") -> Dict:
+                     output_file: str = "ifc_analysis_report.html",
+                     approximate_distinct: Optional[bool] = None,
+                     chunk_rows: Optional[int] = None,
+                     use_cache: bool = True) -> Dict:
     """Analyze IFC data and return results"""
-    analyzer = IFCDataAnalyzer(data_folder=data_folder)
+    analyzer = IFCDataAnalyzer(data_folder=data_folder, approximate_distinct=approximate_distinct, chunk_rows=chunk_rows,
+                               use_cache=use_cache)
     return analyzer.run_analysis(expected_schema_file, output_file)
 
 
@@ -358,10 +540,21 @@ def main():
     parser.add_argument("--data-folder", type=str, default="data", help="Folder containing Excel files (default: data)")
     parser.add_argument("--expected-schema", type=str, help="JSON file containing expected schema")
     parser.add_argument("--output", type=str, default="ifc_analysis_report.html", help="Output file for analysis report")
+    parser.add_argument("--approximate-distinct", action="store_true",
+                        help="Estimate distinct values with HyperLogLog sketches (default: only for tables over 1M rows)")
+    parser.add_argument("--exact-distinct", action="store_true",
+                        help="Count distinct values and elements exactly, also in chunked mode")
+    parser.add_argument("--chunk-rows", type=int, nargs="?", const=CHUNK_ROWS,
+                        help=f"Analyze files in chunks of this many rows instead of loading them whole (default: {CHUNK_ROWS})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Analyze every file again instead of reusing the results of unchanged files")
     args = parser.parse_args()
     
+    approximate_distinct = True if args.approximate_distinct else False if args.exact_distinct else None
+    
     # Run analysis
-    analyze_ifc_data(args.data_folder, args.expected_schema, args.output)
+    analyze_ifc_data(args.data_folder, args.expected_schema, args.output, approximate_distinct, args.chunk_rows,
+                     use_cache=not args.no_cache)
 
 
 if __name__ == "__main__":
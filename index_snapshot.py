@@ -0,0 +1,228 @@
+import os
+import io
+import json
+import time
+import hashlib
+import zipfile
+from typing import List, Dict, Any
+import numpy as np
+from rich.console import Console
+from rich.progress import Progress
+
+from query_cache import bump_collection_version
+from vector_store import VectorBackend
+from quantity_cube import QUANTITY_CUBE_FILE
+from spatial_index import SPATIAL_INDEX_FILE
+
+# Configure console for pretty printing
+console = Console()
+
+# Version of the snapshot layout; snapshots with another version are refused
+SNAPSHOT_FORMAT = 1
+
+# Sentence embedded to fingerprint the embedding model
+FINGERPRINT_PROBE = "IfcWall Pset_WallCommon FireRating REI 90"
+
+# Files in the persistence directory that are derived from the collection and
+# travel with a snapshot
+SIDE_INDEX_FILES: List[str] = [QUANTITY_CUBE_FILE, SPATIAL_INDEX_FILE]
+
+
+# Minimum cosine similarity of the probe embeddings for two models to be considered equal
+FINGERPRINT_MIN_SIMILARITY = 0.999
+
+
+def model_fingerprint(embedding_function, model_name: str) -> Dict[str, Any]:
+    """Identify the embedding model by name, dimension and the embedding of a probe sentence"""
+    probe = np.asarray(embedding_function([FINGERPRINT_PROBE])[0], dtype=np.float32)
+    return {
+        "model": model_name,
+        "dimension": int(probe.shape[0]),
+        "probe": [round(float(x), 6) for x in probe]
+    }
+
+
+def fingerprints_match(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """True if two fingerprints describe the same model
+
+    The probe embeddings are compared by cosine similarity rather than exactly,
+    since the same model gives slightly different floats on other hardware.
+    """
+    if a.get("model") != b.get("model") or a.get("dimension") != b.get("dimension"):
+        return False
+    probe_a, probe_b = np.asarray(a["probe"]), np.asarray(b["probe"])
+    norms = np.linalg.norm(probe_a) * np.linalg.norm(probe_b)
+    return bool(norms > 0 and probe_a @ probe_b / norms >= FINGERPRINT_MIN_SIMILARITY)
+
+
+def _slim_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty metadata values (readers treat missing and empty alike)"""
+    return {key: value for key, value in metadata.items() if value not in (None, "")}
+
+
+class _HashingWriter:
+    """File wrapper computing the SHA-256 of everything written through it"""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self.f.write(data)
+
+
+def _write_member(archive: zipfile.ZipFile, name: str, write) -> str:
+    """Write one archive member with write(file) and return its SHA-256"""
+    with archive.open(name, 'w', force_zip64=True) as f:
+        writer = _HashingWriter(f)
+        write(writer)
+    return writer.sha256.hexdigest()
+
+
+def _verify_member(archive: zipfile.ZipFile, name: str, expected: str) -> None:
+    sha256 = hashlib.sha256()
+    with archive.open(name) as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha256.update(chunk)
+    if sha256.hexdigest() != expected:
+        raise ValueError(f"Checksum mismatch for {name} in snapshot; the file is corrupt")
+
+
+def export_snapshot(backend: VectorBackend, persist_directory: str, collection_name: str,
+                    output_path: str, fingerprint: Dict[str, Any]) -> Dict[str, Any]:
+    """Package a collection (or its element type shards) into one checksummed snapshot file
+
+    The snapshot is an uncompressed zip holding, per collection, the embeddings
+    as .npy and the documents with slim metadata as JSONL, plus the side index
+    files and a manifest with the format version, the embedding model
+    fingerprint and a SHA-256 of every member. Returns the manifest.
+    """
+    existing = backend.list_collections()
+    shard_prefix = f"{collection_name}_"
+    names = [collection_name] if collection_name in existing else [
+        name for name in existing if name.startswith(shard_prefix)
+    ]
+    if not names:
+        raise ValueError(f"Collection '{collection_name}' does not exist")
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "created": time.time(),
+        "collection_name": collection_name,
+        "embedding_model": fingerprint,
+        "collections": {},
+        "files": {}
+    }
+
+    tmp_path = output_path + ".tmp"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for name in names:
+            console.print(f"[blue]Exporting collection {name}...[/blue]")
+            data = backend.get_collection(name, None).get(include=["documents", "metadatas", "embeddings"])
+            embeddings = np.asarray(data["embeddings"], dtype=np.float32)
+            if len(data["ids"]) and embeddings.shape[1] != fingerprint["dimension"]:
+                raise ValueError(f"Collection {name} has {embeddings.shape[1]}-dimensional embeddings, "
+                                 f"but the embedding model produces {fingerprint['dimension']}")
+
+            def write_records(f, data=data):
+                for doc_id, document, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+                    record = {"id": doc_id, "document": document, "metadata": _slim_metadata(metadata or {})}
+                    f.write(json.dumps(record, ensure_ascii=False, default=str).encode("utf-8") + b"\n")
+
+            manifest["collections"][name] = {
+                "count": len(data["ids"]),
+                "embeddings": _write_member(archive, f"{name}/embeddings.npy", lambda f: np.save(f, embeddings)),
+                "records": _write_member(archive, f"{name}/records.jsonl", write_records)
+            }
+
+        for filename in SIDE_INDEX_FILES:
+            path = os.path.join(persist_directory, filename)
+            if os.path.exists(path):
+                with open(path, 'rb') as source:
+                    manifest["files"][filename] = _write_member(
+                        archive, f"files/{filename}", lambda f: f.write(source.read())
+                    )
+
+        archive.writestr("manifest.json", json.dumps(manifest, indent=2))
+    os.replace(tmp_path, output_path)
+
+    total = sum(info["count"] for info in manifest["collections"].values())
+    console.print(f"[green]Exported {total} documents in {len(names)} collection(s) to {output_path}[/green]")
+    return manifest
+
+
+def read_manifest(snapshot_path: str) -> Dict[str, Any]:
+    """Read the manifest of a snapshot file"""
+    with zipfile.ZipFile(snapshot_path) as archive:
+        return json.loads(archive.read("manifest.json"))
+
+
+def import_snapshot(backend: VectorBackend, persist_directory: str, snapshot_path: str,
+                    fingerprint: Dict[str, Any], batch_size: int = 1000) -> Dict[str, Any]:
+    """Bulk-load a snapshot into the backend without re-embedding any document
+
+    The snapshot is refused if its format version or embedding model fingerprint
+    differs from the current ones, or if any member fails its checksum. Existing
+    collections of the same name, and shards or monolith of another layout, are
+    replaced. Returns the manifest.
+    """
+    with zipfile.ZipFile(snapshot_path) as archive:
+        manifest = json.loads(archive.read("manifest.json"))
+        if manifest.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {manifest.get('format')} (expected {SNAPSHOT_FORMAT})")
+        if not fingerprints_match(manifest["embedding_model"], fingerprint):
+            snapshot_model = manifest["embedding_model"]
+            raise ValueError(
+                f"Snapshot was built with embedding model {snapshot_model.get('model')} "
+                f"({snapshot_model.get('dimension')} dimensions), which embeds differently from this node's "
+                f"{fingerprint['model']} ({fingerprint['dimension']} dimensions); re-run --convert instead"
+            )
+
+        # Verify everything before touching the existing index
+        for name, info in manifest["collections"].items():
+            _verify_member(archive, f"{name}/embeddings.npy", info["embeddings"])
+            _verify_member(archive, f"{name}/records.jsonl", info["records"])
+        for filename, checksum in manifest["files"].items():
+            _verify_member(archive, f"files/{filename}", checksum)
+
+        existing = backend.list_collections()
+        with Progress() as progress:
+            for name, info in manifest["collections"].items():
+                task = progress.add_task(f"[cyan]Loading {name}...", total=info["count"])
+                with archive.open(f"{name}/embeddings.npy") as f:
+                    embeddings = np.load(io.BytesIO(f.read()))
+                with archive.open(f"{name}/records.jsonl") as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+
+                if name in existing:
+                    backend.delete_collection(name)
+                collection = backend.create_collection(name, None)
+                for i in range(0, len(records), batch_size):
+                    batch = records[i:i + batch_size]
+                    collection.add(
+                        ids=[record["id"] for record in batch],
+                        documents=[record["document"] for record in batch],
+                        metadatas=[record["metadata"] for record in batch],
+                        embeddings=embeddings[i:i + batch_size].tolist()
+                    )
+                    progress.update(task, advance=len(batch))
+                collection.save()
+                bump_collection_version(persist_directory, name)
+
+        # Drop collections of the previous layout (monolithic vs. sharded) that the snapshot replaces
+        base_name = manifest["collection_name"]
+        for name in existing:
+            if (name == base_name or name.startswith(f"{base_name}_")) and name not in manifest["collections"]:
+                backend.delete_collection(name)
+                console.print(f"[yellow]Deleted collection from previous layout: {name}[/yellow]")
+
+        for filename in manifest["files"]:
+            with open(os.path.join(persist_directory, filename), 'wb') as target:
+                target.write(archive.read(f"files/{filename}"))
+
+    # Queries address shards through the base collection name
+    bump_collection_version(persist_directory, manifest["collection_name"])
+    total = sum(info["count"] for info in manifest["collections"].values())
+    console.print(f"[green]Imported {total} documents in {len(manifest['collections'])} collection(s) from {snapshot_path}[/green]")
+    return manifest
@@ -0,0 +1,200 @@
+import os
+import time
+import hashlib
+import threading
+from typing import List, Dict, Any, Callable, Optional, Tuple
+from rich.console import Console
+
+from context_builder import ID_COLUMNS
+
+# Configure console for pretty printing
+console = Console()
+
+
+def row_hash(content: str) -> str:
+    """Fingerprint of one document (the text lists every non-empty column of its row)"""
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def element_type_of(excel_file: str) -> str:
+    """Element type of an export file (e.g. "ifc_wall_export.xlsx" -> "wall")"""
+    return os.path.basename(excel_file).split('_')[1].split('.')[0]
+
+
+def diff_rows(indexed: Dict[str, str], documents: List[Dict[str, Any]], element_type: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Compare the indexed rows of an element type ({id: row hash}) with freshly read documents
+
+    Rows are matched by content, so unchanged rows keep their ids even if rows
+    above them were inserted or removed. Returns the documents to add (with new
+    ids) and the ids to delete; an edited row is one of each.
+    """
+    ids_by_hash = {}
+    for doc_id, digest in indexed.items():
+        ids_by_hash.setdefault(digest, []).append(doc_id)
+
+    numbers = [int(doc_id.rsplit("_", 1)[1]) for doc_id in indexed if doc_id.rsplit("_", 1)[-1].isdigit()]
+    next_number = max(numbers, default=-1) + 1
+
+    upserts = []
+    for doc in documents:
+        matching = ids_by_hash.get(row_hash(doc["content"]))
+        if matching:
+            matching.pop()
+            continue
+        upserts.append({**doc, "id": f"{element_type}_{next_number}"})
+        next_number += 1
+
+    delete_ids = [doc_id for ids in ids_by_hash.values() for doc_id in ids]
+    return upserts, delete_ids
+
+
+class IndexWatcher:
+    """Keep a BIMQueryEngine's collection in sync with the export files of a data folder
+
+    A background thread polls the files' size and modification time. A change is
+    applied once the file has stopped changing for `debounce` seconds, so
+    half-written exports are not indexed. Only changed rows are re-embedded:
+    the file is diffed row by row against the collection and the differences
+    are applied as additions and deletions. on_change is called after every
+    applied change (e.g. to refresh the analysis results).
+
+    load_documents must raise if a file cannot be read; the file is then left
+    as indexed and retried on the next poll.
+    """
+
+    def __init__(self, engine, load_documents: Callable[[str], List[Dict[str, Any]]], excel_files: List[str],
+                 interval: float = 2.0, debounce: float = 2.0, on_change: Optional[Callable[[], None]] = None):
+        """Initialize the watcher for the given export files"""
+        self.engine = engine
+        self.load_documents = load_documents
+        self.excel_files = excel_files
+        self.interval = interval
+        self.debounce = debounce
+        self.on_change = on_change
+
+        self._signatures = {}
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _signature(path: str) -> Optional[Tuple[int, float]]:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime
+
+    def indexed_rows(self, element_type: str) -> Dict[str, str]:
+        """Ids and row hashes of the documents of an element type in the collection"""
+        if self.engine.collection is None:
+            shard = self.engine.shards.get(element_type)
+            if shard is None:
+                return {}
+            data = shard.get(include=["documents"])
+            return {doc_id: row_hash(document) for doc_id, document in zip(data["ids"], data["documents"])}
+
+        data = self.engine.collection.get(include=["documents", "metadatas"])
+        return {
+            doc_id: row_hash(document)
+            for doc_id, document, metadata in zip(data["ids"], data["documents"], data["metadatas"])
+            if (metadata or {}).get("ElementType") == element_type
+        }
+
+    def sync_file(self, excel_file: str) -> Tuple[int, int]:
+        """Apply the differences between one export file and the collection
+
+        A missing file removes all documents of its element type; errors reading
+        the file are raised without changing the collection. Returns the number
+        of rows added and deleted.
+        """
+        element_type = element_type_of(excel_file)
+        documents = self.load_documents(excel_file) if os.path.exists(excel_file) else []
+        upserts, delete_ids = diff_rows(self.indexed_rows(element_type), documents, element_type)
+        if not upserts and not delete_ids:
+            return 0, 0
+
+        self.engine.apply_changes(element_type, upserts, delete_ids)
+        elements = {
+            next((str(doc["metadata"][c]) for c in ID_COLUMNS if doc["metadata"].get(c)), doc["id"])
+            for doc in upserts
+        }
+        console.print(
+            f"[green]Reindexed {os.path.basename(excel_file)}: +{len(upserts)} / -{len(delete_ids)} rows "
+            f"({len(elements)} changed elements)[/green]"
+        )
+        return len(upserts), len(delete_ids)
+
+    def sync_all(self) -> bool:
+        """Bring every watched file in sync (used at start-up); returns True if anything changed"""
+        changed = False
+        for excel_file in self.excel_files:
+            self._signatures[excel_file] = self._signature(excel_file)
+            try:
+                changed |= any(self.sync_file(excel_file))
+            except Exception as e:
+                console.print(f"[red]Error reindexing {excel_file}: {e}[/red]")
+                self._pending[excel_file] = time.monotonic()
+        return changed
+
+    def poll(self) -> bool:
+        """Check the files once and apply changes that have settled; returns True if anything changed"""
+        now = time.monotonic()
+        for excel_file in self.excel_files:
+            signature = self._signature(excel_file)
+            if signature != self._signatures.get(excel_file):
+                # Still being written (or just changed): restart its debounce timer
+                self._signatures[excel_file] = signature
+                self._pending[excel_file] = now
+
+        changed = False
+        for excel_file, since in list(self._pending.items()):
+            if now - since < self.debounce:
+                continue
+            del self._pending[excel_file]
+            try:
+                changed |= any(self.sync_file(excel_file))
+            except Exception as e:
+                # Keep the indexed rows and retry after another debounce period
+                console.print(f"[red]Error reindexing {excel_file}: {e}[/red]")
+                self._pending[excel_file] = now
+
+        if changed and self.on_change is not None:
+            try:
+                self.on_change()
+            except Exception as e:
+                console.print(f"[red]Error refreshing after reindexing: {e}[/red]")
+        return changed
+
+    def _run(self) -> None:
+        try:
+            if self.sync_all() and self.on_change is not None:
+                self.on_change()
+        except Exception as e:
+            console.print(f"[red]Error syncing the index with the data folder: {e}[/red]")
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                console.print(f"[red]Error watching the data folder: {e}[/red]")
+
+    def start(self) -> None:
+        """Sync once, then keep watching in a background thread"""
+        self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+        self._thread.start()
+        console.print(f"[blue]Watching {len(self.excel_files)} export files for changes[/blue]")
+
+    def wait(self) -> None:
+        """Keep watching in the foreground until interrupted with Ctrl+C"""
+        try:
+            while self._thread is not None and self._thread.is_alive():
+                self._thread.join(0.5)
+        except KeyboardInterrupt:
+            console.print("[blue]Stopped watching[/blue]")
+            self.stop()
+
+    def stop(self) -> None:
+        """Stop watching"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,96 @@
+import time
+import asyncio
+import threading
+from typing import AsyncIterator, Optional
+
+
+class LLMClient:
+    """Interface for the language model that generates answers
+
+    Subclasses implement generate(); stream() falls back to yielding the whole
+    answer at once and should be overridden by clients that can stream.
+    """
+
+    name = "LLM"
+
+    def generate(self, prompt: str) -> str:
+        """Generate the full answer for a prompt"""
+        raise NotImplementedError
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Yield the answer for a prompt in chunks as they are generated"""
+        yield await asyncio.to_thread(self.generate, prompt)
+
+
+class GeminiClient(LLMClient):
+    """Google Gemini model accessed through google.generativeai
+
+    The library is imported and the model created on the first request.
+    """
+
+    def __init__(self, api_key: str, model_name: str = "gemini-2.0-flash"):
+        """Store the API key and model name"""
+        self.api_key = api_key
+        self.model_name = model_name
+        self.name = "Gemini Flash"
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The Gemini model, created on first use"""
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, prompt: str) -> str:
+        """Generate the full answer for a prompt"""
+        return self.model.generate_content(prompt).text
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream the answer using the async streaming generate API"""
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata only)
+                continue
+            if text:
+                yield text
+
+
+class StubLLMClient(LLMClient):
+    """Local stand-in for the LLM, for tests and benchmarks
+
+    Returns a fixed answer (or a short echo of the prompt) after a simulated
+    latency, streaming it word by word.
+    """
+
+    def __init__(self, answer: Optional[str] = None, latency: float = 0.0, token_delay: float = 0.0):
+        """Initialize with an optional fixed answer and simulated timings in seconds"""
+        self.answer = answer
+        self.latency = latency
+        self.token_delay = token_delay
+        self.name = "stub LLM"
+
+    def _answer_for(self, prompt: str) -> str:
+        if self.answer is not None:
+            return self.answer
+        question = prompt.split("QUESTION:")[-1].split("ANSWER:")[0].strip()
+        return f"Stub answer to: {question}"
+
+    def generate(self, prompt: str) -> str:
+        """Return the stub answer after the simulated latency"""
+        time.sleep(self.latency + self.token_delay * len(self._answer_for(prompt).split()))
+        return self._answer_for(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[str]:
+        """Stream the stub answer word by word"""
+        await asyncio.sleep(self.latency)
+        for i, word in enumerate(self._answer_for(prompt).split(" ")):
+            await asyncio.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
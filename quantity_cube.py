@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+# File the converter writes the cube to (in the persistence directory, next to the collections)
+QUANTITY_CUBE_FILE = "quantity_cube.json"
+
+# Version of the cube file layout; files with another version are rebuilt by the next conversion
+CUBE_FORMAT = 1
+
+# Storey or material of a rolled-up cell (the total over all storeys or materials)
+ALL = "*"
+
+# Columns holding an element's storey and material, in order of preference
+STOREY_COLUMNS = ["Location.Storey", "Storey", "BuildingStorey", "Building Storey"]
+MATERIAL_COLUMNS = ["Material", "Materials", "Material Name"]
+
+# Quantity units and their SI unit with the factor converting to it
+UNIT_CONVERSIONS = {
+    "MILLIMETRE": ("METRE", 1e-3), "MM": ("METRE", 1e-3),
+    "CENTIMETRE": ("METRE", 1e-2), "CM": ("METRE", 1e-2),
+    "METRE": ("METRE", 1.0), "M": ("METRE", 1.0),
+    "SQUARE_MILLIMETRE": ("SQUARE_METRE", 1e-6), "MM2": ("SQUARE_METRE", 1e-6), "MM²": ("SQUARE_METRE", 1e-6),
+    "SQUARE_CENTIMETRE": ("SQUARE_METRE", 1e-4), "CM2": ("SQUARE_METRE", 1e-4), "CM²": ("SQUARE_METRE", 1e-4),
+    "SQUARE_METRE": ("SQUARE_METRE", 1.0), "M2": ("SQUARE_METRE", 1.0), "M²": ("SQUARE_METRE", 1.0),
+    "CUBIC_MILLIMETRE": ("CUBIC_METRE", 1e-9), "MM3": ("CUBIC_METRE", 1e-9), "MM³": ("CUBIC_METRE", 1e-9),
+    "CUBIC_CENTIMETRE": ("CUBIC_METRE", 1e-6), "CM3": ("CUBIC_METRE", 1e-6), "CM³": ("CUBIC_METRE", 1e-6),
+    "CUBIC_METRE": ("CUBIC_METRE", 1.0), "M3": ("CUBIC_METRE", 1.0), "M³": ("CUBIC_METRE", 1.0),
+    "LITRE": ("CUBIC_METRE", 1e-3), "L": ("CUBIC_METRE", 1e-3),
+    "GRAM": ("KILOGRAM", 1e-3), "G": ("KILOGRAM", 1e-3),
+    "KILOGRAM": ("KILOGRAM", 1.0), "KG": ("KILOGRAM", 1.0),
+    "TONNE": ("KILOGRAM", 1e3), "T": ("KILOGRAM", 1e3),
+}
+
+# Words ignored when matching quantity names against a question
+STOP_WORDS = {"a", "an", "and", "by", "for", "in", "of", "on", "per", "the", "to", "with"}
+
+# (element type, set name, attribute name, unit) of a quantity
+QuantityKey = Tuple[str, str, str, str]
+
+
+def normalize_unit(unit: Any) -> Tuple[str, float]:
+    """SI unit of a quantity unit and the factor converting values to it (unknown units are kept)"""
+    if unit is None or unit != unit:
+        return "", 1.0
+    name = str(unit).strip().upper().replace(" ", "_")
+    return UNIT_CONVERSIONS.get(name, (name, 1.0))
+
+
+def words(text: str) -> set:
+    """Lower-case words of a quantity name or question ("NetVolume" -> {"net", "volume"})"""
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", str(text))
+    return set(re.findall(r"\w+", text.lower())) - STOP_WORDS
+
+
+def _dimension(df, columns: List[str]):
+    """First of columns present in df as strings ("" where missing), or "" for all rows"""
+    column = next((c for c in columns if c in df.columns), None)
+    if column is None:
+        return ""
+    values = df[column]
+    return values.where(values.notna(), "").astype(str).str.strip()
+
+
+def quantity_rows(element_type: str, df):
+    """Numeric quantity rows of one export in SI units, with their storey and material"""
+    import numpy as np
+    import pandas as pd
+
+    columns = ["element_type", "set_name", "attribute", "unit", "storey", "material", "value"]
+    if "Attribute Name" not in df.columns or "Value" not in df.columns:
+        return pd.DataFrame(columns=columns)
+    if "Data Type" in df.columns:
+        df = df[df["Data Type"].astype(str).str.strip().str.lower() == "quantity"]
+    values = pd.to_numeric(df["Value"], errors="coerce")
+    keep = np.isfinite(values.to_numpy(dtype=float))
+    df, values = df[keep], values[keep]
+
+    # Convert each distinct unit once
+    unit_codes, units = pd.factorize(df["Unit"] if "Unit" in df.columns else pd.Series("", index=df.index),
+                                      use_na_sentinel=False)
+    normalized = [normalize_unit(unit) for unit in units]
+    names = np.array([name for name, _ in normalized], dtype=object)
+    factors = np.array([factor for _, factor in normalized])
+
+    return pd.DataFrame({
+        "element_type": element_type,
+        "set_name": df["Set Name"].fillna("").astype(str) if "Set Name" in df.columns else "",
+        "attribute": df["Attribute Name"].astype(str).str.strip(),
+        "unit": names[unit_codes],
+        "storey": _dimension(df, STOREY_COLUMNS),
+        "material": _dimension(df, MATERIAL_COLUMNS),
+        "value": values.to_numpy(dtype=float) * factors[unit_codes]
+    }, columns=columns)
+
+
+class QuantityCube:
+    """Precomputed quantity takeoff: sum, count, min and max of every quantity
+
+    A cell holds the measures of one quantity (element type, set name,
+    attribute name and SI unit) on one storey and material. Cells with ALL as
+    storey and/or material hold the totals over them, so totals and breakdowns
+    per storey or material are dictionary lookups.
+    """
+
+    def __init__(self, cells: Dict[Tuple[str, ...], Tuple[float, int, float, float]]):
+        """Initialize the cube from cells: (*quantity key, storey, material) -> (sum, count, min, max)"""
+        self.cells = cells
+        self._quantities = {}
+        self._values = {}
+        for *key, storey, material in cells:
+            key = tuple(key)
+            if key not in self._values:
+                self._values[key] = {"storey": set(), "material": set()}
+                self._quantities.setdefault(key[0], []).append((key, words(key[2])))
+            if storey != ALL:
+                self._values[key]["storey"].add(storey)
+            if material != ALL:
+                self._values[key]["material"].add(material)
+
+    @classmethod
+    def build(cls, frames: Iterable[Tuple[str, Any]]) -> "QuantityCube":
+        """Build the cube from (element type, export frame) pairs"""
+        import pandas as pd
+
+        rows = [quantity_rows(element_type, df) for element_type, df in frames]
+        rows = pd.concat(rows, ignore_index=True) if rows else quantity_rows("", pd.DataFrame())
+        quantity = ["element_type", "set_name", "attribute", "unit"]
+        cells = {}
+        for storey_all in [False, True]:
+            for material_all in [False, True]:
+                grouped = rows.assign(
+                    storey=ALL if storey_all else rows["storey"],
+                    material=ALL if material_all else rows["material"]
+                ).groupby(quantity + ["storey", "material"], sort=False)["value"].agg(["sum", "count", "min", "max"])
+                for key, (total, count, low, high) in zip(grouped.index, grouped.itertuples(index=False)):
+                    cells[key] = (float(total), int(count), float(low), float(high))
+        return cls(cells)
+
+    @classmethod
+    def from_files(cls, frames: Dict[str, Any]) -> "QuantityCube":
+        """Build the cube from export frames keyed by file (e.g. "ifc_wall_export.xlsx" -> "wall")"""
+        return cls.build(
+            (os.path.basename(excel_file).split('_')[1].split('.')[0], df) for excel_file, df in frames.items()
+        )
+
+    def save(self, path: str) -> None:
+        """Write the cube to path (atomically)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"format": CUBE_FORMAT, "cells": [[*key, *measures] for key, measures in self.cells.items()]},
+                      f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QuantityCube":
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if data.get("format") != CUBE_FORMAT:
+            raise ValueError(f"unsupported quantity cube format {data.get('format')}")
+        return cls({tuple(cell[:6]): tuple(cell[6:]) for cell in data["cells"]})
+
+    @property
+    def element_types(self) -> List[str]:
+        return list(self._quantities)
+
+    def quantities(self, element_type: str) -> List[QuantityKey]:
+        """Quantities of an element type"""
+        return [key for key, _ in self._quantities.get(element_type, [])]
+
+    def find_quantities(self, element_type: str, text: str) -> List[QuantityKey]:
+        """Quantities of an element type named in text, most specific first
+
+        A quantity is named if all words of its attribute name appear in text
+        ("total slab area" names "Area"; "top surface area" names "Top Surface
+        Area (Net)"). Only the quantities matching the most words are returned.
+        """
+        text_words = words(text)
+        matches = [(len(name), key) for key, name in self._quantities.get(element_type, []) if name and name <= text_words]
+        best = max((count for count, _ in matches), default=0)
+        return [key for count, key in matches if count == best]
+
+    def values(self, key: QuantityKey, dimension: str) -> List[str]:
+        """Storeys or materials (dimension) holding values of a quantity"""
+        return sorted(self._values.get(tuple(key), {}).get(dimension, []))
+
+    def lookup(self, key: QuantityKey, storey: str = ALL, material: str = ALL) -> Optional[Dict[str, Any]]:
+        """Measures of a quantity on a storey and material (ALL for the total over them), or None"""
+        cell = self.cells.get((*key, storey, material))
+        if cell is None:
+            return None
+        return {"sum": cell[0], "count": cell[1], "min": cell[2], "max": cell[3], "unit": key[3]}
+
+    def breakdown(self, key: QuantityKey, by: str, storey: str = ALL, material: str = ALL) -> Dict[str, Dict[str, Any]]:
+        """Measures of a quantity per storey or material (by), within the given storey or material"""
+        result = {}
+        for value in self.values(key, by):
+            measures = self.lookup(key, value if by == "storey" else storey, value if by == "material" else material)
+            if measures is not None:
+                result[value] = measures
+        return result
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_quantity_cube(path: str) -> Optional[QuantityCube]:
+    """The cube at path, reloaded only when the file has changed; None if there is none"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_size, stat.st_mtime_ns)
+    with _loaded_lock:
+        cached = _loaded.get(os.path.abspath(path))
+        if cached is None or cached[0] != key:
+            try:
+                cached = (key, QuantityCube.load(path))
+            except Exception as e:
+                console.print(f"[yellow]Could not load quantity cube {path}: {e}[/yellow]")
+                return None
+            _loaded[os.path.abspath(path)] = cached
+        return cached[1]
+
+
+def write_quantity_cube(frames: Dict[str, Any], path: str) -> Optional[QuantityCube]:
+    """Build the cube from export frames keyed by file and save it to path; None on failure"""
+    try:
+        cube = QuantityCube.from_files(frames)
+        cube.save(path)
+    except Exception as e:
+        console.print(f"[yellow]Could not build quantity cube: {e}[/yellow]")
+        return None
+    console.print(f"[green]Precomputed {len(cube.cells)} quantity totals in {path}[/green]")
+    return cube
@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+# File (inside the ChromaDB directory) recording how often each collection was rewritten
+VERSION_FILE = "collection_versions.json"
+
+
+def normalize_query(query_text: str) -> str:
+    """Normalize a query so that trivially different phrasings share cache entries"""
+    return " ".join(query_text.lower().split()).rstrip("?.! ")
+
+
+def _write_json_atomic(path: str, data: Any) -> None:
+    """Write JSON to a temporary file and move it into place"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def get_collection_version(persist_directory: str, collection_name: str) -> int:
+    """Return the current version of a collection (0 if never written)"""
+    path = os.path.join(persist_directory, VERSION_FILE)
+    try:
+        with open(path, 'r') as f:
+            return int(json.load(f).get(collection_name, 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def bump_collection_version(persist_directory: str, collection_name: str) -> int:
+    """Increment the version of a collection after it has been written to"""
+    path = os.path.join(persist_directory, VERSION_FILE)
+    versions = {}
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                versions = json.load(f)
+        except (OSError, ValueError):
+            versions = {}
+    versions[collection_name] = int(versions.get(collection_name, 0)) + 1
+    _write_json_atomic(path, versions)
+    return versions[collection_name]
+
+
+class CacheStats:
+    """Hit/miss counters for a cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """In-memory LRU cache of normalized query text -> query embedding"""
+
+    def __init__(self, max_size: int = 1024):
+        """Initialize an empty cache holding at most max_size embeddings"""
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get(self, query_text: str) -> Optional[List[float]]:
+        """Return the cached embedding for a query, or None"""
+        key = normalize_query(query_text)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is not None:
+                self._entries.move_to_end(key)
+            self.stats.record(embedding is not None)
+            return embedding
+
+    def put(self, query_text: str, embedding: List[float]) -> None:
+        """Store an embedding, evicting the least recently used entry if full"""
+        key = normalize_query(query_text)
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class ResultCache:
+    """Persisted cache of retrieval results and answers
+
+    Entries are keyed by (normalized query, n_results, collection version), so a
+    converter run that bumps the collection version invalidates them automatically.
+    """
+
+    def __init__(self, cache_file: str, max_entries: int = 1000):
+        """Initialize the cache, loading previous entries from cache_file if present"""
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.result_stats = CacheStats()
+        self.answer_stats = CacheStats()
+
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    self._entries = OrderedDict(json.load(f))
+            except (OSError, ValueError) as e:
+                console.print(f"[yellow]Could not load query cache from {cache_file}: {e}[/yellow]")
+
+    @staticmethod
+    def make_key(query_text: str, n_results: int, version: int, variant: str = "") -> str:
+        """Build the cache key for a query; variant distinguishes retrieval settings"""
+        raw = json.dumps([normalize_query(query_text), n_results, version, variant])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_results(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached retrieval results for a key, or None"""
+        with self._lock:
+            results = self._entries.get(key, {}).get("results")
+            self.result_stats.record(results is not None)
+            return results
+
+    def get_answer(self, key: str) -> Optional[str]:
+        """Return a cached answer for a key, or None"""
+        with self._lock:
+            answer = self._entries.get(key, {}).get("answer")
+            self.answer_stats.record(answer is not None)
+            return answer
+
+    def put_results(self, key: str, version: int, results: List[Dict[str, Any]]) -> None:
+        """Store retrieval results for a key"""
+        self._update(key, version, results=results)
+
+    def put_many_results(self, items: List[Tuple[str, List[Dict[str, Any]]]], version: int) -> None:
+        """Store retrieval results for several keys, saving the cache once"""
+        self._update_many([(key, {"results": results}) for key, results in items], version)
+
+    def put_answer(self, key: str, version: int, answer: str) -> None:
+        """Store a generated answer for a key"""
+        self._update(key, version, answer=answer)
+
+    def _update(self, key: str, version: int, **fields) -> None:
+        self._update_many([(key, fields)], version)
+
+    def _update_many(self, updates: List[Tuple[str, Dict[str, Any]]], version: int) -> None:
+        with self._lock:
+            # Drop entries written against an older collection version
+            stale = [k for k, entry in self._entries.items() if entry.get("version") != version]
+            for k in stale:
+                del self._entries[k]
+
+            for key, fields in updates:
+                entry = self._entries.pop(key, {"version": version})
+                entry.update(fields)
+                self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            try:
+                _write_json_atomic(self.cache_file, self._entries)
+            except OSError as e:
+                console.print(f"[yellow]Could not save query cache to {self.cache_file}: {e}[/yellow]")
+
+
+class SemanticAnswerCache:
+    """In-memory cache reusing answers for semantically equivalent questions
+
+    A stored answer is reused when the new query embedding is within a cosine
+    similarity threshold of the stored one *and* retrieval returned the same
+    source documents from the same collection version.
+    """
+
+    def __init__(self, threshold: float = 0.9, ttl_seconds: float = 24 * 3600, max_entries: int = 512):
+        """Initialize an empty cache"""
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = []  # Oldest first
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        self._entries = [entry for entry in self._entries if entry["created_at"] >= cutoff]
+
+    def get(self, query_embedding: List[float], source_ids: List[str], version: int) -> Optional[str]:
+        """Return the answer of the most similar matching entry, or None"""
+        query_vector = self._normalize(query_embedding)
+        source_key = sorted(source_ids)
+
+        with self._lock:
+            self._expire()
+            candidates = [
+                entry for entry in self._entries
+                if entry["version"] == version and entry["source_ids"] == source_key
+            ]
+
+            best_answer = None
+            if candidates:
+                similarities = np.stack([entry["embedding"] for entry in candidates]) @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    best_answer = candidates[best]["answer"]
+
+            self.stats.record(best_answer is not None)
+            return best_answer
+
+    def put(self, query_embedding: List[float], source_ids: List[str], version: int, answer: str) -> None:
+        """Store an answer, evicting the oldest entries beyond max_entries"""
+        with self._lock:
+            self._expire()
+            self._entries.append({
+                "embedding": self._normalize(query_embedding),
+                "source_ids": sorted(source_ids),
+                "version": version,
+                "answer": answer,
+                "created_at": time.time()
+            })
+            if len(self._entries) > self.max_entries:
+                self._entries = self._entries[-self.max_entries:]
@@ -0,0 +1,104 @@
+import json
+import argparse
+import urllib.request
+import urllib.error
+from typing import List, Dict, Any
+from rich.console import Console
+from rich.panel import Panel
+
+# Configure console for pretty printing
+console = Console()
+
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+class RAGClient:
+    """Thin client for a running RAG server (see RAG.py --serve)
+
+    Only needs the standard library and rich, so it starts instantly.
+    """
+
+    def __init__(self, url: str = DEFAULT_URL, timeout: float = 300):
+        """Initialize the client with the server URL"""
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session_id = None
+
+    def _request(self, path: str, payload: Dict[str, Any] = None) -> Dict[str, Any]:
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        request = urllib.request.Request(
+            self.url + path,
+            data=data,
+            headers={"Content-Type": "application/json"}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.loads(e.read()).get("error", str(e)))
+
+    def health(self) -> bool:
+        """Return True if the server is up"""
+        try:
+            return self._request("/health").get("status") == "ok"
+        except (OSError, RuntimeError):
+            return False
+
+    def ask(self, question: str, n_results: int = 5) -> Dict[str, Any]:
+        """Answer one question within this client's server session"""
+        result = self._request("/query", {"question": question, "n_results": n_results, "session_id": self.session_id})
+        self.session_id = result.get("session_id", self.session_id)
+        return result
+
+    def ask_many(self, questions: List[str], n_results: int = 5) -> List[Dict[str, Any]]:
+        """Answer a batch of questions"""
+        return self._request("/batch", {"questions": questions, "n_results": n_results})["results"]
+
+
+def interactive_mode(client: RAGClient) -> None:
+    """Ask questions against the server until the user quits"""
+    console.print(Panel.fit(
+        f"[bold green]Building Model RAG Client[/bold green]\n"
+        f"Connected to {client.url}\n"
+        "Type 'exit' or 'quit' to end the session."
+    ))
+
+    while True:
+        query = console.input("\n[bold yellow]Ask a question:[/bold yellow] ")
+        if query.lower() in ["exit", "quit", "q"]:
+            break
+        if not query.strip():
+            continue
+
+        try:
+            result = client.ask(query)
+            console.print(Panel(
+                result["response"],
+                title=f"[bold green]Answer[/bold green] ({result['timings']['total']:.2f}s)",
+                expand=False
+            ))
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {str(e)}")
+
+
+def main():
+    """Connect to a RAG server and ask questions"""
+    parser = argparse.ArgumentParser(description="Query a running BIM RAG server")
+    parser.add_argument("--url", type=str, default=DEFAULT_URL, help=f"Server URL (default: {DEFAULT_URL})")
+    parser.add_argument("question", nargs="*", help="Question to ask (interactive mode if omitted)")
+    args = parser.parse_args()
+
+    client = RAGClient(args.url)
+    if not client.health():
+        console.print(f"[red]No RAG server reachable at {args.url}. Start one with: python RAG.py --serve[/red]")
+        return
+
+    if args.question:
+        result = client.ask(" ".join(args.question))
+        console.print(result["response"])
+    else:
+        interactive_mode(client)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any
+from rich.console import Console
+from rich.panel import Panel
+
+# Configure console for pretty printing
+console = Console()
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class RAGRequestHandler(BaseHTTPRequestHandler):
+    """JSON API over a shared, already loaded GeminiRAGSystem
+
+    GET  /health  -> {"status": "ok"}
+    POST /query   {"question": str, "n_results": int, "session_id": str} -> answer with sources and timings
+    POST /batch   {"questions": [str], "n_results": int} -> {"results": [...]}
+    """
+
+    # Set by serve()
+    rag = None
+
+    def log_message(self, format, *args):
+        console.print(f"[dim]{self.address_string()} - {format % args}[/dim]")
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        try:
+            request = self._read_json()
+            n_results = int(request.get("n_results", 5))
+
+            if self.path == "/query":
+                question = request.get("question", "").strip()
+                if not question:
+                    self._send_json(400, {"error": "Missing 'question'"})
+                    return
+                # Each client keeps its own session; a new one is created if none is given
+                session = self.rag.get_session(request.get("session_id"))
+                start = time.perf_counter()
+                result = session.ask(question, n_results)
+                result.setdefault("timings", {})["total"] = time.perf_counter() - start
+                result["session_id"] = session.session_id
+                self._send_json(200, result)
+
+            elif self.path == "/batch":
+                questions = request.get("questions", [])
+                results = self.rag.answer_questions(questions, n_results)
+                self._send_json(200, {"results": results})
+
+            else:
+                self._send_json(404, {"error": f"Unknown path {self.path}"})
+        except Exception as e:
+            console.print(f"[red]Error handling request: {e}[/red]")
+            self._send_json(500, {"error": str(e)})
+
+
+def serve(rag, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    """Serve a loaded GeminiRAGSystem until interrupted, one thread per request"""
+    RAGRequestHandler.rag = rag
+    server = ThreadingHTTPServer((host, port), RAGRequestHandler)
+    server.daemon_threads = True
+    console.print(Panel.fit(
+        f"[bold green]BIM RAG server listening on http://{host}:{port}[/bold green]\n"
+        f"Connect with: python rag_client.py --url http://{host}:{port}"
+    ))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[yellow]Shutting down server[/yellow]")
+    finally:
+        server.server_close()
@@ -0,0 +1,174 @@
+import os
+import json
+import html
+from typing import List, Iterable, Optional, Sequence
+
+# Tables with more rows than this are embedded as JSON and rendered on demand
+VIRTUALIZE_ROWS = 200
+
+STYLE = """
+    body { font-family: Arial, sans-serif; margin: 20px; }
+    h1, h2, h3 { color: #333; }
+    table { border-collapse: collapse; width: 100%; margin-bottom: 20px; }
+    th, td { padding: 8px; text-align: left; border: 1px solid #ddd; }
+    th { background-color: #f2f2f2; }
+    .missing { color: red; }
+    .extra { color: orange; }
+    .low-fill { background-color: #ffe6e6; }
+    .summary { background-color: #f9f9f9; padding: 10px; margin-bottom: 20px; }
+    .virtual-table { max-height: 480px; overflow-y: auto; margin-bottom: 20px; }
+    .virtual-table table { margin-bottom: 0; }
+    .virtual-table thead th { position: sticky; top: 0; }
+    .virtual-table td { white-space: nowrap; }
+"""
+
+# Renders the visible rows of each virtual table (plus a margin) from its JSON,
+# parsing the JSON only once the table scrolls into view
+SCRIPT = """
+(function () {
+    function setUp(container) {
+        var rows = JSON.parse(document.getElementById(container.getAttribute('data-rows')).textContent);
+        var body = container.querySelector('tbody');
+        var rowHeight = 0;
+        function render() {
+            var first = rowHeight ? Math.max(0, Math.floor(container.scrollTop / rowHeight) - 20) : 0;
+            var last = Math.min(rows.length, first + (rowHeight ? Math.ceil(container.clientHeight / rowHeight) : 1) + 40);
+            var parts = ['<tr style="height:' + first * rowHeight + 'px"></tr>'];
+            for (var i = first; i < last; i++) {
+                var row = rows[i];
+                var cls = row[row.length - 1];
+                parts.push('<tr' + (cls ? ' class="' + cls + '"' : '') + '><td>' + row.slice(0, -1).join('</td><td>') + '</td></tr>');
+            }
+            parts.push('<tr style="height:' + (rows.length - last) * rowHeight + 'px"></tr>');
+            body.innerHTML = parts.join('');
+            if (!rowHeight && body.rows.length > 2) {
+                rowHeight = body.rows[1].offsetHeight || 1;
+                render();
+            }
+        }
+        var pending = false;
+        container.addEventListener('scroll', function () {
+            if (!pending) {
+                pending = true;
+                window.requestAnimationFrame(function () { pending = false; render(); });
+            }
+        });
+        render();
+    }
+    var containers = document.querySelectorAll('.virtual-table');
+    if (!('IntersectionObserver' in window)) {
+        for (var i = 0; i < containers.length; i++) setUp(containers[i]);
+        return;
+    }
+    var observer = new IntersectionObserver(function (entries) {
+        entries.forEach(function (entry) {
+            if (entry.isIntersecting) {
+                observer.unobserve(entry.target);
+                setUp(entry.target);
+            }
+        });
+    }, { rootMargin: '200px' });
+    for (var j = 0; j < containers.length; j++) observer.observe(containers[j]);
+})();
+"""
+
+
+class RawHTML(str):
+    """Table cell content written as is (not escaped)"""
+
+
+def link(text: str, href: str) -> RawHTML:
+    return RawHTML(f"<a href='{html.escape(href, quote=True)}'>{html.escape(text)}</a>")
+
+
+def _cell(value) -> str:
+    return value if isinstance(value, RawHTML) else html.escape(str(value))
+
+
+class HTMLReportWriter:
+    """Write an HTML page to a file section by section
+
+    Nothing is accumulated in memory: every heading, paragraph and table row is
+    written as it is produced. Tables longer than VIRTUALIZE_ROWS rows are
+    written as JSON in a script element and rendered by a small script a screen
+    at a time, so browsers only lay out the rows in view. Use as a context
+    manager; the page is closed (and the script added) on exit.
+    """
+
+    def __init__(self, path: str, title: str, virtualize_rows: int = VIRTUALIZE_ROWS):
+        """Open path and write the page head"""
+        self.path = path
+        self.virtualize_rows = virtualize_rows
+        self._tables = 0
+        self._virtual_tables = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(
+            f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset='utf-8'>\n<title>{html.escape(title)}</title>\n"
+            f"<style>{STYLE}</style>\n</head>\n<body>\n<h1>{html.escape(title)}</h1>\n"
+        )
+
+    def __enter__(self) -> "HTMLReportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def write(self, markup: str) -> None:
+        """Write raw HTML"""
+        self._file.write(markup)
+
+    def heading(self, level: int, text: str) -> None:
+        self._file.write(f"<h{level}>{html.escape(text)}</h{level}>\n")
+
+    def paragraph(self, text: str) -> None:
+        self._file.write(f"<p>{html.escape(text)}</p>\n")
+
+    def table(self, headers: List[str], rows: Iterable[Sequence], row_count: int,
+              row_classes: Optional[Iterable[str]] = None) -> None:
+        """Write a table of row_count rows; rows and row_classes may be generators"""
+        self._tables += 1
+        header = "".join(f"<th>{html.escape(h)}</th>" for h in headers)
+        classes = row_classes if row_classes is not None else iter(lambda: "", None)
+        if row_count <= self.virtualize_rows:
+            self._file.write(f"<table>\n<tr>{header}</tr>\n")
+            for row, cls in zip(rows, classes):
+                attribute = f" class='{cls}'" if cls else ""
+                self._file.write(f"<tr{attribute}>" + "".join(f"<td>{_cell(v)}</td>" for v in row) + "</tr>\n")
+            self._file.write("</table>\n")
+            return
+
+        self._virtual_tables += 1
+        data_id = f"table-data-{self._tables}"
+        self._file.write(
+            f"<div class='virtual-table' data-rows='{data_id}'>\n"
+            f"<table><thead><tr>{header}</tr></thead><tbody></tbody></table>\n</div>\n"
+            f"<script type='application/json' id='{data_id}'>["
+        )
+        separator = ""
+        for row, cls in zip(rows, classes):
+            # Cells are escaped HTML; "</" cannot end the script element early
+            encoded = json.dumps([_cell(v) for v in row] + [cls or ""], ensure_ascii=False).replace("</", "<\\/")
+            self._file.write(separator + encoded)
+            separator = ",\n"
+        self._file.write("]</script>\n")
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self._virtual_tables:
+            self._file.write(f"<script>{SCRIPT}</script>\n")
+        self._file.write("</body>\n</html>\n")
+        self._file.close()
+
+
+def remove_stale_pages(folder: str, keep: List[str]) -> None:
+    """Delete report pages of a previous run that the current one did not write"""
+    if not os.path.isdir(folder):
+        return
+    keep = {os.path.abspath(path) for path in keep}
+    for name in os.listdir(folder):
+        path = os.path.join(folder, name)
+        if name.endswith(".html") and os.path.abspath(path) not in keep:
+            os.remove(path)
+    if not os.listdir(folder):
+        os.rmdir(folder)
@@ -0,0 +1,75 @@
+import time
+import threading
+from typing import List, Dict, Any, Tuple
+from rich.console import Console
+
+# Configure console for pretty printing
+console = Console()
+
+
+class CrossEncoderReranker:
+    """Rerank retrieved documents with a small local cross-encoder on CPU
+
+    Candidates are scored in batches. If scoring takes longer than the
+    per-query time budget, the original vector order is kept. The budget is
+    checked after every batch (including the last), and a batch that the
+    latency measured so far says would overrun is not started.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 batch_size: int = 16, time_budget: float = 0.5):
+        """Load the cross-encoder; time_budget is the maximum rerank time per query in seconds"""
+        from sentence_transformers import CrossEncoder
+        
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.time_budget = time_budget
+        self.model = CrossEncoder(model_name, device="cpu")
+
+        # Running statistics (rerank may be called from several threads)
+        self._stats_lock = threading.Lock()
+        self.queries = 0
+        self.fallbacks = 0
+        self.total_time = 0.0
+        console.print(f"[green]Loaded reranker {model_name}[/green]")
+
+    def rerank(self, query_text: str, documents: List[Dict[str, Any]], n_results: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """Return the n_results best documents according to the cross-encoder
+
+        The second value is False if the budget ran out and the documents are
+        in vector order instead.
+        """
+        start = time.perf_counter()
+        scores = []
+
+        for i in range(0, len(documents), self.batch_size):
+            batch = documents[i:i + self.batch_size]
+            elapsed = time.perf_counter() - start
+            if scores and elapsed + len(batch) * elapsed / len(scores) > self.time_budget:
+                break
+            pairs = [(query_text, doc["content"]) for doc in batch]
+            scores.extend(float(score) for score in self.model.predict(pairs, batch_size=self.batch_size))
+            if time.perf_counter() - start > self.time_budget:
+                break
+
+        elapsed = time.perf_counter() - start
+        complete = len(scores) == len(documents) and elapsed <= self.time_budget
+        with self._stats_lock:
+            self.queries += 1
+            self.total_time += elapsed
+            if not complete:
+                self.fallbacks += 1
+
+        if not complete:
+            # Budget exceeded: fall back to vector order
+            return documents[:n_results], False
+
+        reranked = [dict(doc, rerank_score=score) for doc, score in zip(documents, scores)]
+        reranked.sort(key=lambda doc: doc["rerank_score"], reverse=True)
+        return reranked[:n_results], True
+
+    @property
+    def average_latency(self) -> float:
+        """Average rerank time per query in seconds"""
+        with self._stats_lock:
+            return self.total_time / self.queries if self.queries else 0.0
@@ -0,0 +1,317 @@
+import os
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+import numpy as np
+from rich.console import Console
+
+from context_builder import ID_COLUMNS
+
+# Configure console for pretty printing
+console = Console()
+
+# File the converter writes the index to (in the persistence directory, next to the collections)
+SPATIAL_INDEX_FILE = "spatial_index.npz"
+
+# Corner of an element's bounding box and its extent along x, y and z (as written by the extract scripts)
+CORNER_COLUMNS = ["Geometry.Global X", "Geometry.Global Y", "Geometry.Global Z"]
+EXTENT_COLUMNS = ["Geometry.Bounding Box Length", "Geometry.Bounding Box Width", "Geometry.Bounding Box Height"]
+
+# Average number of elements per grid cell the cell size is chosen for
+ELEMENTS_PER_CELL = 8
+
+# Elements covering more grid cells than this are kept in a separate list checked by every query
+MAX_CELLS_PER_ELEMENT = 64
+
+
+def element_boxes(df) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Optional[str]]:
+    """Bounding boxes of the elements of one export
+
+    Returns the element ids, the lower and upper corners (n x 3) and the id
+    column (None if the export has no geometry or no id column). Elements
+    without a corner are left out; a missing extent counts as zero.
+    """
+    import pandas as pd
+
+    id_column = next((column for column in ID_COLUMNS if column in df.columns), None)
+    empty = np.empty((0, 3))
+    if id_column is None or not all(column in df.columns for column in CORNER_COLUMNS):
+        return np.array([], dtype=str), empty, empty, None
+
+    # Geometry columns repeat on every property row of an element
+    ids = df[id_column].astype(str).str.strip()
+    df = df[(ids != "") & df[id_column].notna() & ~ids.duplicated()]
+    corner = np.column_stack([pd.to_numeric(df[column], errors="coerce") for column in CORNER_COLUMNS]).astype(float)
+    extent = np.column_stack([
+        pd.to_numeric(df[column], errors="coerce") if column in df.columns else np.zeros(len(df))
+        for column in EXTENT_COLUMNS
+    ]).astype(float)
+    extent = np.nan_to_num(extent)
+    keep = np.isfinite(corner).all(axis=1)
+    corner, extent = corner[keep], extent[keep]
+    ids = df[id_column].astype(str).str.strip().to_numpy()[keep]
+    return ids.astype(str), np.minimum(corner, corner + extent), np.maximum(corner, corner + extent), id_column
+
+
+def _ranges(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Concatenation of arange(start, end) for every pair, without a Python loop"""
+    lengths = ends - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return offsets + np.arange(total)
+
+
+class SpatialIndex:
+    """Uniform grid over the plan (x/y) extent of element bounding boxes
+
+    Every element is registered in the grid cells its box covers; a query
+    reads the cells its region covers and tests only those elements' boxes.
+    Elements covering very many cells (e.g. large slabs) are tested by every
+    query instead. Queries spanning the whole plan (e.g. an elevation) use a
+    second, one-dimensional grid over z. Coordinates are in the model's units,
+    as exported.
+    """
+
+    def __init__(self, ids: np.ndarray, type_codes: np.ndarray, element_types: List[str], id_columns: List[str],
+                 lower: np.ndarray, upper: np.ndarray, grid: Optional[Dict[str, np.ndarray]] = None):
+        """Initialize the index for element boxes, building the grid unless given"""
+        self.ids = ids
+        self.type_codes = type_codes
+        self.element_types = element_types
+        self.id_columns = id_columns
+        self.lower = lower
+        self.upper = upper
+        self.grid = grid if grid is not None else self._build_grid()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, frames: Iterable[Tuple[str, Any]]) -> "SpatialIndex":
+        """Build the index from (element type, export frame) pairs"""
+        ids, codes, lower, upper = [], [], [], []
+        element_types, id_columns = [], []
+        for element_type, df in frames:
+            element_ids, low, high, id_column = element_boxes(df)
+            if not len(element_ids):
+                continue
+            if element_type not in element_types:
+                element_types.append(element_type)
+                id_columns.append(id_column)
+            ids.append(element_ids)
+            codes.append(np.full(len(element_ids), element_types.index(element_type), dtype=np.int32))
+            lower.append(low)
+            upper.append(high)
+        if not ids:
+            return cls(np.array([], dtype=str), np.array([], dtype=np.int32), [], [], np.empty((0, 3)), np.empty((0, 3)))
+        return cls(np.concatenate(ids), np.concatenate(codes), element_types, id_columns,
+                   np.concatenate(lower), np.concatenate(upper))
+
+    @classmethod
+    def from_files(cls, frames: Dict[str, Any]) -> "SpatialIndex":
+        """Build the index from export frames keyed by file (e.g. "ifc_door_export.xlsx" -> "door")"""
+        return cls.build(
+            (os.path.basename(excel_file).split('_')[1].split('.')[0], df) for excel_file, df in frames.items()
+        )
+
+    @staticmethod
+    def _cell_lists(lower: np.ndarray, upper: np.ndarray, origin: np.ndarray, cell: float, ny: int) -> Dict[str, np.ndarray]:
+        """Grid cells (key ix * ny + iy) with the elements whose 2-D extent [lower, upper] covers them"""
+        first = np.floor((lower - origin) / cell).astype(np.int64)
+        last = np.floor((upper - origin) / cell).astype(np.int64)
+        width = last - first + 1
+        cells = width[:, 0] * width[:, 1]
+        large = np.flatnonzero(cells > MAX_CELLS_PER_ELEMENT)
+        small = np.flatnonzero(cells <= MAX_CELLS_PER_ELEMENT)
+
+        # One entry per (element, covered cell)
+        elements = np.repeat(small, cells[small])
+        k = np.arange(len(elements)) - np.repeat(np.cumsum(cells[small]) - cells[small], cells[small])
+        keys = (first[elements, 0] + k % width[elements, 0]) * ny + first[elements, 1] + k // width[elements, 0]
+        order = np.argsort(keys, kind="stable")
+        keys, elements = keys[order], elements[order]
+        cell_keys, starts = np.unique(keys, return_index=True)
+        return {
+            "origin": np.asarray(origin, dtype=float),
+            "cell": np.array(cell),
+            "ny": np.array(ny),
+            "cell_keys": cell_keys,
+            "cell_starts": np.append(starts, len(keys)).astype(np.int64),
+            "cell_elements": elements.astype(np.int64),
+            "large": large.astype(np.int64)
+        }
+
+    def _build_grid(self) -> Dict[str, np.ndarray]:
+        """Cell lists of the plan (x/y) grid and of the elevation (z) grid (keys prefixed with z_)"""
+        if len(self.ids) == 0:
+            empty = self._cell_lists(np.empty((0, 2)), np.empty((0, 2)), np.zeros(2), 1.0, 1)
+            return {**empty, **{f"z_{name}": value for name, value in empty.items()}}
+
+        # Plan cells hold about ELEMENTS_PER_CELL elements, but are not smaller than a typical element
+        origin = self.lower[:, :2].min(axis=0)
+        span = np.maximum(self.upper[:, :2].max(axis=0) - origin, 1e-9)
+        typical = float(np.median((self.upper[:, :2] - self.lower[:, :2]).max(axis=1)))
+        cell = max(float(np.sqrt(span[0] * span[1] * ELEMENTS_PER_CELL / len(self))), typical, float(span.max()) / 1e6)
+        grid = self._cell_lists(self.lower[:, :2], self.upper[:, :2], origin, cell, int(span[1] // cell) + 1)
+
+        # Elevation cells are as high as a typical element
+        z_origin = float(self.lower[:, 2].min())
+        z_span = max(float(self.upper[:, 2].max()) - z_origin, 1e-9)
+        z_cell = max(float(np.median(self.upper[:, 2] - self.lower[:, 2])), z_span / 1e6)
+        zeros = np.zeros((len(self), 1))
+        z_grid = self._cell_lists(np.hstack([self.lower[:, 2:], zeros]), np.hstack([self.upper[:, 2:], zeros]),
+                                  np.array([z_origin, 0.0]), z_cell, 1)
+        grid.update({f"z_{name}": value for name, value in z_grid.items()})
+        return grid
+
+    def save(self, path: str) -> None:
+        """Write the index to path (atomically)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, ids=self.ids.astype(str), type_codes=self.type_codes,
+                 element_types=np.asarray(self.element_types, dtype=str), id_columns=np.asarray(self.id_columns, dtype=str),
+                 lower=self.lower, upper=self.upper, **{f"grid_{name}": value for name, value in self.grid.items()})
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SpatialIndex":
+        with np.load(path, allow_pickle=False) as data:
+            grid = {name[len("grid_"):]: data[name] for name in data.files if name.startswith("grid_")}
+            return cls(data["ids"], data["type_codes"], data["element_types"].tolist(), data["id_columns"].tolist(),
+                       data["lower"], data["upper"], grid)
+
+    def _grid_candidates(self, lower: np.ndarray, upper: np.ndarray, prefix: str = "") -> np.ndarray:
+        """Elements registered in the grid cells overlapping [lower, upper] (plan grid, or z grid with prefix "z_")"""
+        grid = {name[len(prefix):]: value for name, value in self.grid.items() if name.startswith(prefix)}
+        cell, ny, cell_keys = float(grid["cell"]), int(grid["ny"]), grid["cell_keys"]
+        first = np.floor((lower - grid["origin"]) / cell).astype(np.int64)
+        last = np.floor((upper - grid["origin"]) / cell).astype(np.int64)
+        first = np.maximum(first, 0)
+        last = np.minimum(last, [cell_keys[-1] // ny if len(cell_keys) else 0, ny - 1])
+        if (last < first).any():
+            return grid["large"]
+
+        if (last - first + 1).prod() > len(cell_keys):
+            # Region larger than the occupied grid: select the occupied cells in range
+            ix, iy = cell_keys // ny, cell_keys % ny
+            found = np.flatnonzero((ix >= first[0]) & (ix <= last[0]) & (iy >= first[1]) & (iy <= last[1]))
+        else:
+            ix, iy = np.meshgrid(np.arange(first[0], last[0] + 1), np.arange(first[1], last[1] + 1), indexing="ij")
+            keys = (ix * ny + iy).ravel()
+            found = np.searchsorted(cell_keys, keys)
+            found = found[(found < len(cell_keys)) & (cell_keys[np.minimum(found, len(cell_keys) - 1)] == keys)]
+        elements = grid["cell_elements"][_ranges(grid["cell_starts"][found], grid["cell_starts"][found + 1])]
+        return np.union1d(elements, grid["large"])
+
+    def _type_mask(self, element_types: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if not element_types:
+            return None
+        codes = [i for i, element_type in enumerate(self.element_types) if element_type in element_types]
+        return np.isin(self.type_codes, codes)
+
+    def in_box(self, lower: Sequence[Optional[float]], upper: Sequence[Optional[float]],
+               element_types: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Elements whose box intersects the region [lower, upper] (None leaves an axis unbounded)"""
+        low = np.array([-np.inf if v is None else v for v in lower], dtype=float)
+        high = np.array([np.inf if v is None else v for v in upper], dtype=float)
+        if np.isfinite(low[:2]).all() and np.isfinite(high[:2]).all():
+            candidates = self._grid_candidates(low[:2], high[:2])
+        elif np.isfinite(low[2]) and np.isfinite(high[2]):
+            candidates = self._grid_candidates(np.array([low[2], 0.0]), np.array([high[2], 0.0]), "z_")
+        else:
+            candidates = np.arange(len(self))
+
+        hit = ((self.lower[candidates] <= high) & (self.upper[candidates] >= low)).all(axis=1)
+        mask = self._type_mask(element_types)
+        if mask is not None:
+            hit &= mask[candidates]
+        return np.sort(candidates[hit])
+
+    def near(self, point: Sequence[float], radius: float, element_types: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Elements whose box is within radius of point"""
+        point = np.asarray(point, dtype=float)
+        candidates = self.in_box(point - radius, point + radius, element_types)
+        gap = np.maximum(np.maximum(self.lower[candidates] - point, point - self.upper[candidates]), 0)
+        return candidates[(gap ** 2).sum(axis=1) <= radius ** 2]
+
+    def at_elevation(self, z: float, element_types: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Elements whose box spans the elevation z (e.g. slabs intersecting a storey level)"""
+        return self.in_box([None, None, z], [None, None, z], element_types)
+
+    def scan_box(self, lower: Sequence[float], upper: Sequence[float]) -> np.ndarray:
+        """Linear scan over all boxes (the reference the grid is checked and benchmarked against)"""
+        return np.flatnonzero(((self.lower <= np.asarray(upper)) & (self.upper >= np.asarray(lower))).all(axis=1))
+
+    def search(self, near: Optional[Sequence[float]] = None, radius: Optional[float] = None,
+               box: Optional[Sequence[Sequence[Optional[float]]]] = None, elevation: Optional[float] = None,
+               element_types: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Elements matching a spatial query given as near + radius, box (lower, upper) or elevation"""
+        if near is not None:
+            if radius is None:
+                raise ValueError("a spatial query with 'near' needs a 'radius'")
+            return self.near(near, radius, element_types)
+        if box is not None:
+            return self.in_box(box[0], box[1], element_types)
+        if elevation is not None:
+            return self.at_elevation(elevation, element_types)
+        raise ValueError("a spatial query needs 'near' and 'radius', 'box' or 'elevation'")
+
+    def describe(self, elements: np.ndarray) -> List[Dict[str, Any]]:
+        """Id, element type and box of elements"""
+        return [
+            {"id": str(self.ids[i]), "element_type": self.element_types[self.type_codes[i]],
+             "lower": self.lower[i].tolist(), "upper": self.upper[i].tolist()}
+            for i in elements
+        ]
+
+    def where(self, elements: np.ndarray) -> Dict[str, Any]:
+        """Chroma-style metadata filter selecting the documents of elements"""
+        ids_by_column = {}
+        for code in np.unique(self.type_codes[elements]):
+            in_type = elements[self.type_codes[elements] == code]
+            ids_by_column.setdefault(self.id_columns[code], set()).update(self.ids[in_type].tolist())
+        clauses = [{column: {"$in": sorted(ids)}} for column, ids in ids_by_column.items()]
+        return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_spatial_index(path: str) -> Optional[SpatialIndex]:
+    """The index at path, reloaded only when the file has changed; None if there is none"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_size, stat.st_mtime_ns)
+    with _loaded_lock:
+        cached = _loaded.get(os.path.abspath(path))
+        if cached is None or cached[0] != key:
+            try:
+                cached = (key, SpatialIndex.load(path))
+            except Exception as e:
+                console.print(f"[yellow]Could not load spatial index {path}: {e}[/yellow]")
+                return None
+            _loaded[os.path.abspath(path)] = cached
+        return cached[1]
+
+
+def write_spatial_index(frames: Dict[str, Any], path: str) -> Optional[SpatialIndex]:
+    """Build the index from export frames keyed by file and save it to path
+
+    Exports without geometry columns give no index; a previous index is then
+    removed. Returns None in that case or on failure.
+    """
+    try:
+        index = SpatialIndex.from_files(frames)
+        if not len(index):
+            if os.path.exists(path):
+                os.remove(path)
+            return None
+        index.save(path)
+    except Exception as e:
+        console.print(f"[yellow]Could not build spatial index: {e}[/yellow]")
+        return None
+    console.print(f"[green]Indexed the bounding boxes of {len(index)} elements in {path}[/green]")
+    return index
@@ -0,0 +1,62 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+RAG = pytest.importorskip("RAG")
+from quantity_cube import QuantityCube
+from violation_index import ViolationIndex
+
+
+@pytest.fixture
+def system(tmp_path):
+    frame = pd.DataFrame({
+        "Attribute Name": ["Thickness", "Area", "Area"],
+        "Value": [0.2, 30.0, 12.5],
+        "Unit": ["METRE", "SQUARE_METRE", "SQUARE_METRE"],
+        "Data Type": ["Quantity"] * 3,
+    })
+    path = str(tmp_path / "quantity_cube.json")
+    QuantityCube.from_files({"ifc_slab_export.xlsx": frame, "ifc_wall_export.xlsx": frame}).save(path)
+    index_path = str(tmp_path / "violation_index.npz")
+    presence = np.array([[True], [False]])
+    ViolationIndex.build({"door": (np.array(["D1", "D2"]), presence, ["FireRating"])}).save(index_path)
+
+    system = RAG.GeminiRAGSystem.__new__(RAG.GeminiRAGSystem)
+    system.quantity_cube_path = path
+    system.violation_index_path = index_path
+    return system
+
+
+def test_aggregation_question_is_answered_from_the_cube(system):
+    answer = system.answer_quantity_takeoff("What is the total slab area?")
+    assert answer is not None
+    assert answer["quantities"]["slab Area"]["total"]["sum"] == pytest.approx(42.5)
+
+
+@pytest.mark.parametrize("query", [
+    "Summarize the slab thickness and area",
+    "Give me a summary of the slab area",
+    "What's the energy consumption of the wall area?",
+])
+def test_words_containing_sum_are_not_aggregations(system, query):
+    assert system.answer_quantity_takeoff(query) is None
+
+
+def test_violation_question_is_answered_from_the_index(system):
+    answer = system.answer_element_violations("Which doors lack a FireRating?")
+    assert answer is not None
+    assert answer["elements"] == {"door without FireRating": ["D2"]}
+
+
+@pytest.mark.parametrize("query", [
+    "Which black doors have a FireRating?",
+    "Is the FireRating of the doors part of the mission brief?",
+    "Can we dismiss the door FireRating?",
+])
+def test_words_containing_miss_or_lack_are_not_violation_questions(system, query):
+    assert system.answer_element_violations(query) is None
@@ -0,0 +1,30 @@
+import os
+import sys
+import json
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vector_store import NumpyVectorStore
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_reopened_store_keeps_its_precision(tmp_path, precision):
+    directory = str(tmp_path / "collection")
+    rng = np.random.default_rng(0)
+    store = NumpyVectorStore(directory, precision=precision)
+    store.add(["a", "b"], ["door", "wall"], [{}, {}], embeddings=rng.normal(size=(2, 8)))
+    store.save()
+    store.close()
+
+    # Reopening with the default precision must not rewrite the collection as float32
+    store = NumpyVectorStore(directory)
+    store.add(["c"], ["window"], [{}], embeddings=rng.normal(size=(1, 8)))
+    store.save()
+    store.close()
+
+    with open(os.path.join(directory, "manifest.json")) as f:
+        assert json.load(f)["precision"] == precision
+    assert NumpyVectorStore(directory).count() == 3
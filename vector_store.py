@@ -0,0 +1,459 @@
+import os
+import json
+import mmap
+import shutil
+from typing import List, Dict, Any, Optional
+import numpy as np
+from rich.console import Console
+
+from locks import ReadWriteLock
+
+# Configure console for pretty printing
+console = Console()
+
+BACKENDS = ["chroma", "numpy"]
+
+# Storage precisions of the numpy backend
+PRECISIONS = ["float32", "float16", "int8"]
+
+# Rows converted to float32 at a time when scanning a quantized matrix
+SCAN_CHUNK_ROWS = 65536
+
+
+def _json_default(value: Any) -> Any:
+    """Convert numpy scalars and other values from pandas rows to JSON"""
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def quantize(embeddings: np.ndarray, precision: str, directory: str) -> np.ndarray:
+    """Convert normalized float32 embeddings to the given precision
+
+    int8 rows are scaled by their own largest absolute value; the scales are
+    written to scales.npy in directory.
+    """
+    if precision == "float16":
+        return embeddings.astype(np.float16)
+    if precision == "int8":
+        scales = np.abs(embeddings).max(axis=1) / 127 if len(embeddings) else np.zeros(0, dtype=np.float32)
+        scales = np.where(scales > 0, scales, 1).astype(np.float32)
+        np.save(os.path.join(directory, "scales.npy"), scales)
+        return np.round(embeddings / scales[:, None]).astype(np.int8)
+    return embeddings
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest finite scores, best first"""
+    if k == 0:
+        return np.array([], dtype=int)
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return top[np.isfinite(scores[top])]
+
+
+class VectorStore:
+    """A searchable collection of embedded documents
+
+    Mirrors the subset of the ChromaDB collection API used by the converter and
+    BIMQueryEngine, so a backend can be swapped without touching either.
+    """
+
+    name = ""
+
+    def count(self) -> int:
+        """Number of documents in the collection"""
+        raise NotImplementedError
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[List[List[float]]] = None) -> None:
+        """Add documents, embedding them unless embeddings are given"""
+        raise NotImplementedError
+
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents by id"""
+        raise NotImplementedError
+
+    def save(self) -> None:
+        """Persist documents added or deleted so far (no-op for backends that persist immediately)"""
+
+    def query(self, query_embeddings: List[List[float]], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """Return the nearest documents per query in Chroma's result layout
+        (ids, documents, metadatas, distances; one list per query)"""
+        raise NotImplementedError
+
+    def get(self, include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Return all ids, plus documents, metadatas and/or embeddings if included"""
+        raise NotImplementedError
+
+
+class VectorBackend:
+    """A place where named vector collections are stored"""
+
+    def list_collections(self) -> List[str]:
+        raise NotImplementedError
+
+    def get_collection(self, name: str, embedding_function) -> VectorStore:
+        raise NotImplementedError
+
+    def create_collection(self, name: str, embedding_function) -> VectorStore:
+        raise NotImplementedError
+
+    def delete_collection(self, name: str) -> None:
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    """VectorStore backed by a ChromaDB collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.name = collection.name
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[List[List[float]]] = None) -> None:
+        self.collection.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, where=where)
+
+    def get(self, include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        return self.collection.get(include=include or [])
+
+
+class ChromaBackend(VectorBackend):
+    """Collections stored in a ChromaDB persistent client"""
+
+    def __init__(self, persist_directory: str):
+        import chromadb
+        self.client = chromadb.PersistentClient(path=persist_directory)
+
+    def list_collections(self) -> List[str]:
+        return [col if isinstance(col, str) else col.name for col in self.client.list_collections()]
+
+    def get_collection(self, name: str, embedding_function) -> VectorStore:
+        return ChromaVectorStore(self.client.get_collection(name=name, embedding_function=embedding_function))
+
+    def create_collection(self, name: str, embedding_function) -> VectorStore:
+        return ChromaVectorStore(self.client.create_collection(name=name, embedding_function=embedding_function))
+
+    def delete_collection(self, name: str) -> None:
+        self.client.delete_collection(name=name)
+
+
+class NumpyVectorStore(VectorStore):
+    """In-process exact-search collection stored as a memory-mapped matrix
+
+    Files in the collection directory:
+      embeddings.npy          L2-normalized embeddings, one row per document, stored
+                              as float32, float16 or int8 (see precision)
+      scales.npy              per-row scale of int8 embeddings
+      embeddings_float32.npy  full-precision copy of quantized embeddings, only
+                              read to re-score the top candidates
+      records.jsonl           one {"id", "document", "metadata"} object per row
+      offsets.npy             byte offset of every row in records.jsonl (plus the end)
+      manifest.json           row count, embedding dimension and precision
+
+    Opening only maps the .npy files, so it takes milliseconds; records
+    are read on demand. Search is one matrix product plus argpartition.
+
+    float16 halves and int8 quarters the memory of the searched matrix. With
+    rescore_candidates, that many candidates are found on the quantized matrix
+    and re-ranked with their float32 vectors.
+    """
+
+    def __init__(self, directory: str, embedding_function=None, precision: str = "float32", rescore_candidates: int = 0):
+        """Open (or prepare to build) the collection stored in directory
+
+        precision is used when the collection is written; an existing collection
+        keeps the precision it was built with.
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}' (choose from {', '.join(PRECISIONS)})")
+        self.directory = directory
+        self.name = os.path.basename(os.path.normpath(directory))
+        self.embedding_function = embedding_function
+        self.precision = precision
+        self.rescore_candidates = rescore_candidates
+        self._pending = []
+        self._deleted = set()
+        # Queries read under the shared lock; swapping in rewritten files takes it exclusively
+        self._lock = ReadWriteLock()
+        self._open()
+
+    def _open(self) -> None:
+        """Map the files of the collection (an empty collection if none exist yet)"""
+        self._columns = {}
+        self._records = None
+        manifest_path = os.path.join(self.directory, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+            self.manifest.setdefault("precision", "float32")
+            # Rewrites keep the precision the collection was built with
+            self.precision = self.manifest["precision"]
+            self.embeddings = np.load(os.path.join(self.directory, "embeddings.npy"), mmap_mode="r")
+            self.offsets = np.load(os.path.join(self.directory, "offsets.npy"), mmap_mode="r")
+        else:
+            self.manifest = {"count": 0, "dimension": 0, "precision": self.precision}
+            self.embeddings = np.zeros((0, 0), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+        self.scales = self._load_optional("scales.npy")
+        self.full_embeddings = self._load_optional("embeddings_float32.npy")
+
+    def _load_optional(self, filename: str) -> Optional[np.ndarray]:
+        path = os.path.join(self.directory, filename)
+        return np.load(path, mmap_mode="r") if os.path.exists(path) else None
+
+    def count(self) -> int:
+        return int(self.manifest["count"])
+
+    def index_bytes(self) -> int:
+        """Size of the matrix (and scales) scanned by every query"""
+        size = self.embeddings.nbytes
+        if self.scales is not None:
+            size += self.scales.nbytes
+        return int(size)
+
+    def vectors(self, rows=None) -> np.ndarray:
+        """Normalized float32 embeddings of the given rows (all rows by default)
+
+        Uses the full-precision copy if there is one, otherwise dequantizes.
+        """
+        rows = slice(None) if rows is None else rows
+        if self.full_embeddings is not None:
+            return np.asarray(self.full_embeddings[rows], dtype=np.float32)
+        vectors = np.asarray(self.embeddings[rows], dtype=np.float32)
+        if self.scales is not None:
+            vectors = vectors * np.asarray(self.scales[rows])[:, None]
+        return vectors
+
+    # --- Building -----------------------------------------------------------
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]],
+            embeddings: Optional[List[List[float]]] = None) -> None:
+        """Embed documents (unless embeddings are given) and buffer them until save()"""
+        if embeddings is None:
+            embeddings = self.embedding_function(documents)
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        for doc_id, document, metadata, vector in zip(ids, documents, metadatas, vectors):
+            self._pending.append(({"id": doc_id, "document": document, "metadata": metadata}, vector))
+
+    def delete(self, ids: List[str]) -> None:
+        """Mark documents for removal on the next save()"""
+        self._deleted.update(ids)
+
+    def save(self) -> None:
+        """Rewrite the collection with buffered additions and deletions applied"""
+        if not self._pending and not self._deleted:
+            return
+        with self._lock.read_lock():
+            kept = [i for i in range(self.count()) if self._record(i)["id"] not in self._deleted]
+            records = [self._record(i) for i in kept]
+            vectors = [self.vectors(np.asarray(kept, dtype=np.int64))] if kept else []
+        records += [record for record, _ in self._pending]
+        if self._pending:
+            vectors.append(np.stack([vector for _, vector in self._pending]))
+        self._pending = []
+        self._deleted = set()
+        dimension = self.manifest["dimension"]
+        self.write(records, np.vstack(vectors) if vectors else np.zeros((0, dimension), dtype=np.float32))
+
+    def write(self, records: List[Dict[str, Any]], embeddings: np.ndarray) -> None:
+        """Replace the collection with the given records and embeddings"""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms > 0, norms, 1)
+
+        # Write into a fresh directory and swap it in, so readers never see a partial index
+        tmp_directory = self.directory.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(tmp_directory, ignore_errors=True)
+        os.makedirs(tmp_directory)
+
+        offsets = [0]
+        with open(os.path.join(tmp_directory, "records.jsonl"), 'wb') as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False, default=_json_default).encode("utf-8") + b"\n")
+                offsets.append(f.tell())
+        np.save(os.path.join(tmp_directory, "embeddings.npy"), quantize(embeddings, self.precision, tmp_directory))
+        if self.precision != "float32":
+            np.save(os.path.join(tmp_directory, "embeddings_float32.npy"), embeddings)
+        np.save(os.path.join(tmp_directory, "offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        with open(os.path.join(tmp_directory, "manifest.json"), 'w') as f:
+            json.dump({
+                "count": len(records),
+                "dimension": int(embeddings.shape[1]) if len(records) else 0,
+                "precision": self.precision
+            }, f)
+
+        with self._lock.write_lock():
+            self.close()
+            shutil.rmtree(self.directory, ignore_errors=True)
+            os.replace(tmp_directory, self.directory)
+            self._open()
+
+    def close(self) -> None:
+        """Release the memory maps"""
+        if self._records is not None:
+            self._records.close()
+            self._records = None
+        self.embeddings = self.offsets = self.scales = self.full_embeddings = None
+
+    # --- Reading ------------------------------------------------------------
+
+    def _record(self, row: int) -> Dict[str, Any]:
+        if self._records is None:
+            # Slicing a memory map needs no shared file position, so concurrent queries are safe
+            with open(os.path.join(self.directory, "records.jsonl"), 'rb') as f:
+                self._records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._records[start:end])
+
+    def _column(self, field: str) -> np.ndarray:
+        """Values of a metadata field for all rows (built on first use)"""
+        if field not in self._columns:
+            self._columns[field] = np.array(
+                [self._record(i)["metadata"].get(field) for i in range(self.count())], dtype=object
+            )
+        return self._columns[field]
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Evaluate a Chroma-style metadata filter ($and, $or, $eq, $ne, $in, $nin) to a row mask"""
+        mask = np.ones(self.count(), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._mask(sub)
+            elif key == "$or":
+                mask &= np.logical_or.reduce([self._mask(sub) for sub in condition])
+            else:
+                column = self._column(key)
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for op, value in condition.items():
+                    if op == "$eq":
+                        mask &= column == value
+                    elif op == "$ne":
+                        mask &= column != value
+                    elif op == "$in":
+                        mask &= np.isin(column, list(value))
+                    elif op == "$nin":
+                        mask &= ~np.isin(column, list(value))
+                    else:
+                        raise ValueError(f"Unsupported filter operator {op}")
+        return mask
+
+    def _scan(self, queries: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of every query to every row"""
+        if self.count() == 0:
+            return np.zeros((len(queries), 0), dtype=np.float32)
+        if self.embeddings.dtype == np.float32:
+            # One matrix product for the whole batch: (queries x documents)
+            return queries @ np.asarray(self.embeddings).T
+
+        # Quantized rows are widened chunk by chunk, so no float32 copy of the matrix is made
+        similarities = np.empty((len(queries), self.count()), dtype=np.float32)
+        for start in range(0, self.count(), SCAN_CHUNK_ROWS):
+            end = min(start + SCAN_CHUNK_ROWS, self.count())
+            block = np.asarray(self.embeddings[start:end], dtype=np.float32)
+            similarities[:, start:end] = queries @ block.T
+            if self.scales is not None:
+                similarities[:, start:end] *= self.scales[start:end]
+        return similarities
+
+    def query(self, query_embeddings: List[List[float]], n_results: int,
+              where: Optional[Dict[str, Any]] = None) -> Dict[str, List[List[Any]]]:
+        """Cosine search for a batch of queries (exact for float32 or with re-scoring)"""
+        with self._lock.read_lock():
+            queries = np.asarray(query_embeddings, dtype=np.float32)
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+            similarities = self._scan(queries)
+            if where:
+                similarities[:, ~self._mask(where)] = -np.inf
+
+            n_results = min(n_results, similarities.shape[1])
+            n_candidates = n_results
+            if self.full_embeddings is not None and self.rescore_candidates > n_results:
+                n_candidates = min(self.rescore_candidates, similarities.shape[1])
+
+            results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            for query, row in zip(queries, similarities):
+                top = _top_k(row, n_candidates)
+                if n_candidates > n_results:
+                    # Re-score the candidates of the quantized scan with their float32 vectors
+                    top = np.sort(top)
+                    row = row.copy()
+                    row[top] = self.vectors(top) @ query
+                    top = top[np.argsort(-row[top])][:n_results]
+                records = [self._record(int(i)) for i in top]
+                results["ids"].append([record["id"] for record in records])
+                results["documents"].append([record["document"] for record in records])
+                results["metadatas"].append([record["metadata"] for record in records])
+                # Cosine distance, as ChromaDB reports for cosine spaces
+                results["distances"].append([float(1 - row[i]) for i in top])
+            return results
+
+    def get(self, include: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        with self._lock.read_lock():
+            include = include or []
+            records = [self._record(i) for i in range(self.count())]
+            result = {"ids": [record["id"] for record in records]}
+            if "documents" in include:
+                result["documents"] = [record["document"] for record in records]
+            if "metadatas" in include:
+                result["metadatas"] = [record["metadata"] for record in records]
+            if "embeddings" in include:
+                result["embeddings"] = self.vectors() if self.count() else np.zeros((0, 0), dtype=np.float32)
+            return result
+
+
+class NumpyBackend(VectorBackend):
+    """Collections stored as NumpyVectorStore directories under <persist_directory>/numpy"""
+
+    def __init__(self, persist_directory: str, precision: str = "float32", rescore_candidates: int = 0):
+        self.root = os.path.join(persist_directory, "numpy")
+        self.precision = precision
+        self.rescore_candidates = rescore_candidates
+        os.makedirs(self.root, exist_ok=True)
+
+    def list_collections(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.root)
+            if os.path.exists(os.path.join(self.root, name, "manifest.json"))
+        )
+
+    def get_collection(self, name: str, embedding_function) -> VectorStore:
+        return NumpyVectorStore(os.path.join(self.root, name), embedding_function,
+                                self.precision, self.rescore_candidates)
+
+    def create_collection(self, name: str, embedding_function) -> VectorStore:
+        return NumpyVectorStore(os.path.join(self.root, name), embedding_function,
+                                self.precision, self.rescore_candidates)
+
+    def delete_collection(self, name: str) -> None:
+        shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def open_backend(backend: str, persist_directory: str, precision: str = "float32",
+                 rescore_candidates: int = 0) -> VectorBackend:
+    """Open the named vector backend ("chroma" or "numpy") in persist_directory
+
+    precision and rescore_candidates configure quantized storage, which only
+    the numpy backend supports.
+    """
+    if backend == "chroma":
+        if precision != "float32":
+            raise ValueError("Quantized embeddings require the numpy backend (--backend numpy)")
+        return ChromaBackend(persist_directory)
+    if backend == "numpy":
+        return NumpyBackend(persist_directory, precision, rescore_candidates)
+    raise ValueError(f"Unknown vector backend '{backend}' (choose from {', '.join(BACKENDS)})")
@@ -0,0 +1,194 @@
+import os
+import threading
+from typing import List, Dict, Iterable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from rich.console import Console
+
+from attribute_analysis import LONG_FORMAT_COLUMNS, filled_mask, element_ids
+
+# Configure console for pretty printing
+console = Console()
+
+# File the analyzer writes the index to (next to analysis_results.json)
+VIOLATION_INDEX_FILE = "violation_index.npz"
+
+
+def required_presence(frames: Iterable[pd.DataFrame], parameters: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Which elements have a value for which of the given parameters
+
+    frames are the rows of one export, whole or in chunks (an element's rows
+    may span chunks). A parameter is a base column or an Attribute Name; an
+    element has it if any of its rows holds a value for it. Returns the element
+    ids and a boolean matrix of elements x parameters.
+    """
+    parameter_index = pd.Index(parameters)
+    rows_of = {}
+    blocks = []
+    for df in frames:
+        if not len(df):
+            continue
+        id_codes, ids = pd.factorize(element_ids(df).astype(str))
+        # Global element row of each id of the chunk
+        rows = np.array([rows_of.setdefault(element_id, len(rows_of)) for element_id in ids], dtype=np.int64)
+        local = np.zeros((len(ids), len(parameters)), dtype=bool)
+
+        for j, parameter in enumerate(parameters):
+            if parameter in df.columns and parameter not in LONG_FORMAT_COLUMNS:
+                local[id_codes[filled_mask(df[parameter]).values], j] = True
+
+        if "Attribute Name" in df.columns and "Value" in df.columns:
+            has_value = (filled_mask(df["Attribute Name"]) & filled_mask(df["Value"])).values
+            columns = parameter_index.get_indexer(df["Attribute Name"][has_value].astype(str).str.strip())
+            known = columns >= 0
+            local[id_codes[has_value][known], columns[known]] = True
+
+        blocks.append((rows, local))
+
+    matrix = np.zeros((len(rows_of), len(parameters)), dtype=bool)
+    for rows, local in blocks:
+        matrix[rows] |= local
+    return np.array(list(rows_of), dtype=str), matrix
+
+
+class ViolationIndex:
+    """Bitmap of element x required parameter presence, per element type
+
+    Each element type stores its element ids (GlobalId, GUID or Tag), its
+    required parameters, one bit per (element, parameter) set when the element
+    has a value for the parameter, and the number of required parameters each
+    element misses. Questions like "which doors lack FireRating?" are a column
+    of the bitmap, "which elements miss 2 or more?" a comparison on the counts.
+    The file is an .npz whose members load lazily, one element type at a time.
+    """
+
+    def __init__(self, types: Optional[Dict[str, Dict[str, np.ndarray]]] = None):
+        """Initialize from {element type: {"ids", "parameters", "bits", "missing_counts"}}"""
+        self._types = types or {}
+        self._archive = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, presence: Dict[str, Tuple[np.ndarray, np.ndarray, List[str]]]) -> "ViolationIndex":
+        """Index {element type: (element ids, presence matrix, required parameters)}"""
+        types = {}
+        for element_type, (ids, matrix, parameters) in presence.items():
+            types[element_type] = {
+                "ids": np.asarray(ids, dtype=str),
+                "parameters": np.asarray(parameters, dtype=str),
+                "bits": np.packbits(matrix, axis=1),
+                "missing_counts": (len(parameters) - matrix.sum(axis=1)).astype(np.int32)
+            }
+        return cls(types)
+
+    def save(self, path: str = VIOLATION_INDEX_FILE) -> None:
+        """Write the index atomically"""
+        arrays = {
+            f"{element_type}/{name}": array
+            for element_type in self.element_types
+            for name, array in self._type(element_type).items()
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @classmethod
+    def load(cls, path: str = VIOLATION_INDEX_FILE) -> "ViolationIndex":
+        """Open an index file; element types are read on first use"""
+        index = cls()
+        index._archive = np.load(path, allow_pickle=False)
+        return index
+
+    @property
+    def element_types(self) -> List[str]:
+        if self._archive is not None:
+            return list(dict.fromkeys(name.split("/", 1)[0] for name in self._archive.files))
+        return list(self._types)
+
+    def _type(self, element_type: str) -> Dict[str, np.ndarray]:
+        with self._lock:
+            if element_type not in self._types:
+                if self._archive is None or f"{element_type}/ids" not in self._archive.files:
+                    raise KeyError(f"No violation index for element type '{element_type}'")
+                self._types[element_type] = {
+                    name: self._archive[f"{element_type}/{name}"]
+                    for name in ["ids", "parameters", "bits", "missing_counts"]
+                }
+            return self._types[element_type]
+
+    def parameters(self, element_type: str) -> List[str]:
+        """Required parameters of an element type"""
+        return self._type(element_type)["parameters"].tolist()
+
+    def element_count(self, element_type: str) -> int:
+        return len(self._type(element_type)["ids"])
+
+    def _presence(self, data: Dict[str, np.ndarray], rows: Optional[np.ndarray] = None) -> np.ndarray:
+        bits = data["bits"] if rows is None else data["bits"][rows]
+        return np.unpackbits(bits, axis=1, count=len(data["parameters"])).astype(bool)
+
+    def missing(self, element_type: str, parameter: str) -> List[str]:
+        """Ids of the elements of a type without a value for a required parameter"""
+        data = self._type(element_type)
+        matches = np.flatnonzero(data["parameters"] == parameter)
+        if not len(matches):
+            raise KeyError(f"'{parameter}' is not a required parameter of {element_type}")
+        column = int(matches[0])
+        byte, bit = divmod(column, 8)
+        has_value = (data["bits"][:, byte] >> (7 - bit)) & 1
+        return data["ids"][has_value == 0].tolist()
+
+    def missing_at_least(self, count: int, element_type: Optional[str] = None) -> Dict[str, List[Tuple[str, List[str]]]]:
+        """Elements missing at least count required parameters, with the parameters they miss
+
+        Covers one element type, or all of them if element_type is None.
+        """
+        result = {}
+        for name in ([element_type] if element_type else self.element_types):
+            data = self._type(name)
+            rows = np.flatnonzero(data["missing_counts"] >= count)
+            if not len(rows):
+                continue
+            # Elements share few distinct combinations of missing parameters: list each once
+            patterns, inverse = np.unique(data["bits"][rows], axis=0, return_inverse=True)
+            parameters = data["parameters"]
+            missing = [parameters[~row].tolist() for row in self._presence({**data, "bits": patterns})]
+            result[name] = list(zip(data["ids"][rows].tolist(), [missing[i] for i in inverse.ravel()]))
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Per element type and required parameter, the number of elements missing it"""
+        result = {}
+        for name in self.element_types:
+            data = self._type(name)
+            missing = len(data["ids"]) - self._presence(data).sum(axis=0)
+            result[name] = dict(zip(data["parameters"].tolist(), missing.astype(int).tolist()))
+        return result
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_violation_index(path: str = VIOLATION_INDEX_FILE) -> Optional[ViolationIndex]:
+    """The index at path, reopened only when the file has changed; None if there is none"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (stat.st_size, stat.st_mtime_ns)
+    with _loaded_lock:
+        cached = _loaded.get(os.path.abspath(path))
+        if cached is None or cached[0] != key:
+            try:
+                cached = (key, ViolationIndex.load(path))
+            except Exception as e:
+                console.print(f"[yellow]Could not load violation index {path}: {e}[/yellow]")
+                return None
+            _loaded[os.path.abspath(path)] = cached
+        return cached[1]